@@ -5,6 +5,14 @@ Acceleration Envelope Calculator - OLS
 
 This  class computes the Performance Envelope (Ax, Ay, vcar).
 
+Optional setup keys:
+    - "nSteps":  number of speed steps of the envelope (default 10)
+    - "nAx":     number of ay slices of the GGV per speed (default 20)
+    - "envMode": "loop" (default, reference implementation) or "vector"
+                 (array based: all speeds x gears x ay slices computed in
+                 single NumPy operations, same top speed criterion as
+                 the loop, see calcVxmax)
+
 ---------------------------
 @autor: Davide Strassera
 @first release: 2019-12-21
@@ -15,12 +23,11 @@ by Python 3.7
 
 # Import Packages
 import numpy as np
-import scipy.constants as sc
 
 
 class AccEnvCalc:
 
-    def __init__(self, setupDict):
+    def __init__(self, setupDict, bVerbose=1):
         # inputs
         self.mcar = setupDict["mcar"]
         self.clt = setupDict["clt"]
@@ -37,11 +44,13 @@ class AccEnvCalc:
         self.EngRpm = setupDict["EngRpm"]
         self.rho = setupDict["rho"]
         # constants
-        self.g = sc.g     # 9.80665
-        self.pi = sc.pi    # 3.14159
+        self.g = 9.80665  # standard gravity [m/s^2]
+        self.pi = np.pi    # 3.14159
         # parameters
-        self.nSteps = 10
-        self.nAx = 20
+        self.nSteps = setupDict.get("nSteps", 10)
+        self.nAx = setupDict.get("nAx", 20)
+        self.envMode = setupDict.get("envMode", "loop")
+        self.bVerbose = bVerbose
         self.LOAD_EFF_SCALE = 10000  # [N]
         # outputs
         self.accEnvDict = {
@@ -63,9 +72,140 @@ class AccEnvCalc:
             "GGVacc": None,
             "GGVdec": None,
             "GGVfull": None,
+            # split GGV for the lap (LapTimeSimCalc.getSplitGGV)
+            "GGVaccSplit": None,
+            "GGVdecSplit": None,
             }
 
     def Run(self):
+        if self.envMode == "vector":
+            self.RunVector()
+        elif self.envMode == "loop":
+            self.RunLoop()
+        else:
+            raise ValueError("Unknown envMode: " + str(self.envMode))
+
+        if self.bVerbose == 1:
+            print("AccEnvCalc completed")
+
+    @staticmethod
+    def mirrorGGV(GGVacc, GGVdec):
+        """ Mirror the GGV to left and concat GGVacc and GGVdec """
+        GGVaccLeft = GGVacc*[1, -1, 1]
+        GGVacc = np.concatenate((GGVacc, GGVaccLeft))
+        GGVdecLeft = GGVdec*[1, -1, 1]
+        GGVdec = np.concatenate((GGVdec, GGVdecLeft))
+        GGVfull = np.concatenate((GGVacc, GGVdec))
+        return GGVacc, GGVdec, GGVfull
+
+    @staticmethod
+    def generateGGVVect(axacc, axdec, ay, vxvect, nAx):
+        """ Array version of generateGGV: same (ax, ay, vx) rows, ordered
+            by speed then ay slice, without the nSteps x nAx loop. """
+        axacc = np.asarray(axacc, dtype=float)[:, np.newaxis]
+        axdec = np.asarray(axdec, dtype=float)[:, np.newaxis]
+        ay = np.asarray(ay, dtype=float)[:, np.newaxis]
+        vx = np.asarray(vxvect, dtype=float)[:, np.newaxis]
+        ayStep = np.absolute(ay)/nAx
+        ayreal = ay - ayStep*np.arange(nAx)  # (nVx, nAx)
+        ellipse = np.absolute(1-(np.power(ayreal, 2)/np.power(ay, 2)))
+        axcombAcc = np.sqrt(np.absolute(np.power(axacc, 2) * ellipse))
+        axcombDec = - np.sqrt(np.absolute(np.power(axdec, 2) * ellipse))
+        ayCol = np.round(ayreal, 2).ravel()
+        vxCol = np.round(np.broadcast_to(vx, ayreal.shape), 2).ravel()
+        GGVacc = np.column_stack((np.round(axcombAcc, 2).ravel(),
+                                  ayCol, vxCol))
+        GGVdec = np.column_stack((np.round(axcombDec, 2).ravel(),
+                                  ayCol, vxCol))
+        return GGVacc, GGVdec
+
+    def MfinaldriveVect(self, vx):
+        """ Mfinaldrive for an array of speeds: all speeds x gears at once.
+            Returns the max final drive torque, engine torque, engine rpm
+            and gear (1 based) for every speed. """
+        vx = np.atleast_1d(np.asarray(vx, dtype=float))
+        rGear = np.asarray(self.rGearRat, dtype=float)
+        ntyre = vx/(2*self.pi*self.rtyre)*60
+        neng = ntyre[:, np.newaxis]*rGear  # (nVx, nGear)
+        meng = np.interp(neng, self.EngRpm, self.EngNm)
+        # nengine in range of rmp max(revlimit) and min(stall)
+        bInRange = (neng > min(self.EngRpm)) & (neng < max(self.EngRpm))
+        meng = np.where(bInRange, meng, 0)
+        Mfinaldrive = meng*rGear
+        index = np.argmax(Mfinaldrive, axis=1)  # first gear with max torque
+        rows = np.arange(len(vx))
+        return (Mfinaldrive[rows, index], meng[rows, index],
+                neng[rows, index], index+1)
+
+    def calcVxmax(self):
+        """ Top speed, as the loop mode: scan from 1 m/s in 0.1 m/s steps
+            for the first speed where the free acceleration (drive force
+            minus aero drag) is <= 0.05 m/s2, one step more, rounded. """
+        def axFree(vx):
+            Mfd = self.MfinaldriveVect(vx)[0]
+            Fxaero = 0.5*self.rho*np.power(vx, 2)*self.afrcar*self.cx
+            return (Mfd/self.rtyre - Fxaero)/self.mcar
+
+        # speed at the rev limit in the longest gear: above it ax < 0
+        vxRevLimit = (max(self.EngRpm)/min(self.rGearRat)/60
+                      * 2*self.pi*self.rtyre)
+        vxScan = 1 + 0.1*np.arange(int((vxRevLimit*1.01 - 1)/0.1) + 2)
+        axScan = axFree(vxScan)
+        if not (axScan <= 0.05).any():
+            raise ValueError("AccEnvCalc: no top speed below the rev limit")
+        iStop = np.argmax(axScan <= 0.05)
+        return np.round(vxScan[iStop] + 0.1, 1)
+
+    def RunVector(self):
+        # VxMax Calculation (forces equilibrium, speed scan)
+        vxmax = self.calcVxmax()
+
+        # Ax & Ay Calculation (all speeds at once)
+        small = 0.00000001  # to avoid division by zero
+        vxvect = np.linspace(small, vxmax, self.nSteps)
+        Fzaero_ = 0.5*self.rho*np.power(vxvect, 2)*self.afrcar*self.clt
+        Fxaero_ = 0.5*self.rho*np.power(vxvect, 2)*self.afrcar*self.cx
+        Fz = Fzaero_ + self.mcar*self.g
+        gripYcurrent = self.gripy - self.gripy*(self.loadEff
+                                                * (Fz/self.LOAD_EFF_SCALE))
+        gripXcurrent = self.gripx - self.gripx*(self.loadEff
+                                                * (Fz/self.LOAD_EFF_SCALE))
+        ay = Fz * gripYcurrent / self.mcar
+        Fxgrip = Fz * gripXcurrent  # grip limit Fx
+        Fxbrk = self.mbrk/self.rtyre
+        outMfd, outmeng, outneng, outnGear = self.MfinaldriveVect(vxvect)
+        Fxdrive = outMfd*self.reff/self.rtyre
+        axacc = np.maximum(0, (np.minimum(Fxdrive, Fxgrip)-Fxaero_)/self.mcar)
+        axdec = -(np.minimum(Fxbrk, Fxgrip)+Fxaero_)/self.mcar
+
+        GGVacc, GGVdec = AccEnvCalc.generateGGVVect(axacc, axdec, ay, vxvect,
+                                                    self.nAx)
+        GGVacc, GGVdec, GGVfull = AccEnvCalc.mirrorGGV(GGVacc, GGVdec)
+
+        self.accEnvDict = {
+            "vxvect": vxvect,
+            "axacc": axacc,
+            "axdec": axdec,
+            "ay": ay,
+            # extra Channels
+            "nGear": outnGear,
+            "EngNm": outmeng,
+            "EngRpm": outneng,
+            "Fzaero": Fzaero_,
+            "Fxaero": Fxaero_,
+            "gripx": None,
+            "gripy": None,
+            "Fxgrip": Fxgrip,
+            "Fxdrive": Fxdrive,
+            # GGV
+            "GGVacc": GGVacc,
+            "GGVdec": GGVdec,
+            "GGVfull": GGVfull,
+            "GGVaccSplit": None,
+            "GGVdecSplit": None,
+        }
+
+    def RunLoop(self):
 
         # Functions Definitions
         def Mfinaldrive(vx, EngNm, EngRpm, rGear):
@@ -205,14 +345,10 @@ class AccEnvCalc:
         GGVacc, GGVdec = generateGGV(axacc, axdec, ay, vxvect)
 
         # Mirror the GGV to left and concat GGVacc and GGVdec
-        GGVaccLeft = GGVacc*[1, -1, 1]
-        GGVacc = np.concatenate((GGVacc, GGVaccLeft))
-        GGVdecLeft = GGVdec*[1, -1, 1]
-        GGVdec = np.concatenate((GGVdec, GGVdecLeft))
-        GGVfull = np.concatenate((GGVacc, GGVdec))
+        GGVacc, GGVdec, GGVfull = AccEnvCalc.mirrorGGV(GGVacc, GGVdec)
 
         self.accEnvDict["GGVacc"] = GGVacc
         self.accEnvDict["GGVdec"] = GGVdec
         self.accEnvDict["GGVfull"] = GGVfull
-
-        print("AccEnvCalc completed")
+        self.accEnvDict["GGVaccSplit"] = None
+        self.accEnvDict["GGVdecSplit"] = None
@@ -0,0 +1,183 @@
+"""
+---------------------------
+Batch Lap Solver - OLS
+---------------------------
+
+This class solves the lap of K setups (K Performance Envelopes) on one
+track at once: the K speed traces advance together in the acceleration
+and deceleration passes, one NumPy operation on K values per track point,
+so the Python loop over the track is shared by the whole batch.
+
+The GGV of every envelope is sampled on a common regular (ay, vx) grid,
+stacked as a (K, nAy, nVx) lookup tensor (nan outside the envelope) for
+the acc and for the dec part (size: the largest GGVSurface.gridSize of
+the batch, unless nAy/nVx are given). The lookup is the bilinear
+interpolation of GGVSurface (method "grid"), so each trace is the one of
+LapTimeSimCalc with surfMethod="grid" up to the grid resolution.
+
+The results (batchDict) have one row per setup:
+    - "laptime", "vcarmax", "nIter", "bConverged": (K,)
+    - "vcar", "vxacc", "vxdec", "vxcor", "time": (K, nPoints)
+    - "dist": (nPoints,)
+
+"""
+# Import Packages
+import numpy as np
+
+# import packages (OLP)
+from GGVSurface import GGVSurface
+from LapTimeSimCalc import LapTimeSimCalc
+
+
+class BatchLapSolver:
+
+    def __init__(self, TrackFile, accEnvDicts, vxaccStart=10, nAy=None,
+                 nVx=None, bVerbose=1):
+        # inputs
+        self.TrackFile = TrackFile
+        self.accEnvDicts = accEnvDicts  # K envelopes (AccEnvCalc)
+        self.vxaccStart = vxaccStart
+        self.nAy = nAy  # None: from the GGV resolution
+        self.nVx = nVx
+        self.bVerbose = bVerbose
+        # track, lookup tensors and cornering speed limit (see prepare)
+        self.dist = None
+        self.curv = None
+        self.vxcor = None  # (K, nPoints)
+        self.accTensor = None  # (axTensor, ay0, dAy, vx0, dVx)
+        self.decTensor = None
+        # outputs
+        self.batchDict = None
+
+    @staticmethod
+    def stackGrids(GGVs, nAy, nVx):
+        """ samples the K GGV surfaces on one regular (ay, vx) grid, returns
+            (axTensor (K, nAy, nVx), ay0, dAy, vx0, dVx) """
+        ayMin = min(np.min(GGV[:, 1]) for GGV in GGVs)
+        ayMax = max(np.max(GGV[:, 1]) for GGV in GGVs)
+        vxMin = min(np.min(GGV[:, 2]) for GGV in GGVs)
+        vxMax = max(np.max(GGV[:, 2]) for GGV in GGVs)
+        gridSizes = [GGVSurface.gridSize(GGV) for GGV in GGVs]
+        nAy = nAy or max(size[0] for size in gridSizes)
+        nVx = nVx or max(size[1] for size in gridSizes)
+        ayGrid = np.linspace(ayMin, ayMax, nAy)
+        vxGrid = np.linspace(vxMin, vxMax, nVx)
+        ayMesh, vxMesh = np.meshgrid(ayGrid, vxGrid, indexing="ij")
+        axTensor = np.stack([GGVSurface(GGV).triInterp((ayMesh, vxMesh))
+                             for GGV in GGVs])
+        return (axTensor, ayGrid[0], ayGrid[1]-ayGrid[0], vxGrid[0],
+                vxGrid[1]-vxGrid[0])
+
+    @staticmethod
+    def tensorInterp(tensor, vx, ay):
+        """ bilinear interpolation of the K grids, one (vx, ay) query per
+            grid, nan outside (as GGVSurface.gridInterp) """
+        axTensor, ay0, dAy, vx0, dVx = tensor
+        nK, nAy, nVx = axTensor.shape
+        fi = (ay - ay0) / dAy
+        fj = (vx - vx0) / dVx
+        bInside = (fi >= 0) & (fi <= nAy-1) & (fj >= 0) & (fj <= nVx-1)
+        i = np.clip(np.where(bInside, fi, 0).astype(int), 0, nAy-2)
+        j = np.clip(np.where(bInside, fj, 0).astype(int), 0, nVx-2)
+        ti = fi - i
+        tj = fj - j
+        k = np.arange(nK)
+        ax = ((1-ti)*(1-tj)*axTensor[k, i, j] + ti*(1-tj)*axTensor[k, i+1, j]
+              + (1-ti)*tj*axTensor[k, i, j+1] + ti*tj*axTensor[k, i+1, j+1])
+        return np.where(bInside, ax, np.nan)
+
+    def prepare(self):
+        """ loads the track, stacks the lookup tensors and computes the
+            cornering speed limit of every envelope (once) """
+        if self.vxcor is not None:
+            return
+        self.dist, self.curv = LapTimeSimCalc.loadTrack(self.TrackFile)
+        splits = [LapTimeSimCalc.getSplitGGV(accEnvDict)
+                  for accEnvDict in self.accEnvDicts]
+        self.accTensor = BatchLapSolver.stackGrids(
+            [GGVacc for GGVacc, _ in splits], self.nAy, self.nVx)
+        self.decTensor = BatchLapSolver.stackGrids(
+            [GGVdec for _, GGVdec in splits], self.nAy, self.nVx)
+        self.vxcor = np.stack([
+            LapTimeSimCalc.calcVxcor(self.curv,
+                                     *LapTimeSimCalc.calcVxcorTable(GGVacc))
+            for GGVacc, _ in splits])
+
+    def lapPasses(self, vxaccStart):
+        """ acceleration and deceleration passes of the K setups, returns
+            (vxacc, vxdec) of shape (K, nPoints). A nan ax (outside the
+            envelope) gives the cornering speed, as in LapKernel. """
+        dist, curv, vxcor = self.dist, self.curv, self.vxcor
+        small = 0.00000001  # to avoid division by zero
+        n = len(dist)
+
+        # Max Acceleration Speed
+        vxacc = np.zeros(vxcor.shape)
+        vxacc[:, 0] = vxaccStart
+        for i in range(n-1):
+            vx = vxacc[:, i]
+            ayreal = vx*vx/(1/max(curv[i], small))
+            axcombine = BatchLapSolver.tensorInterp(self.accTensor, vx,
+                                                    ayreal)
+            vxnext = vx+(dist[i+1]-dist[i])/vx*axcombine
+            vxacc[:, i+1] = np.where(vxnext < vxcor[:, i+1], vxnext,
+                                     vxcor[:, i+1])
+
+        # Max Deceleration Speed
+        vxdec = np.zeros(vxcor.shape)
+        vxdec[:, n-1] = vxacc[:, n-1]
+        for i in range(n-1, 0, -1):
+            vx = vxdec[:, i]
+            ayreal = vx*vx/(1/max(curv[i], small))
+            axcombine = BatchLapSolver.tensorInterp(self.decTensor, vx,
+                                                    ayreal)
+            vxnext = vx+(dist[i-1]-dist[i])/vx*axcombine
+            vxdec[:, i-1] = np.where(vxnext < vxcor[:, i-1], vxnext,
+                                     vxcor[:, i-1])
+        return vxacc, vxdec
+
+    def RunFlyingLap(self, tol=0.001, maxIter=10):
+        """ flying lap of the K setups (as LapTimeSimCalc.RunFlyingLap):
+            a setup keeps the traces of the lap where its start and end
+            speed matched within tol [m/s] """
+        self.prepare()
+        nK, n = self.vxcor.shape
+        vxaccStart = np.full(nK, float(self.vxaccStart))
+        bActive = np.ones(nK, dtype=bool)
+        nIter = np.zeros(nK, dtype=int)
+        vxacc = np.zeros((nK, n))
+        vxdec = np.zeros((nK, n))
+        vcar = np.zeros((nK, n))
+        for _ in range(maxIter):
+            lapVxacc, lapVxdec = self.lapPasses(vxaccStart)
+            lapVcar = np.minimum(np.minimum(self.vxcor, lapVxacc), lapVxdec)
+            lapVcar[:, -1] = lapVcar[:, -2]
+            vxacc[bActive] = lapVxacc[bActive]
+            vxdec[bActive] = lapVxdec[bActive]
+            vcar[bActive] = lapVcar[bActive]
+            nIter[bActive] += 1
+            vxaccEnd = lapVcar[:, -1]
+            bActive &= np.absolute(vxaccEnd - vxaccStart) >= tol
+            if not bActive.any():
+                break
+            vxaccStart = np.where(bActive, vxaccEnd, vxaccStart)
+
+        timestep = np.diff(self.dist)/vcar[:, :-1]
+        time = np.cumsum(timestep, axis=1)
+        time = np.column_stack((time, time[:, -1]))
+        self.batchDict = {
+            "vcar": vcar,
+            "dist": self.dist,
+            "time": time,
+            "laptime": np.round(time[:, -1], 3),
+            "vcarmax": np.round(np.max(vcar, axis=1), 3),
+            "vxacc": vxacc,
+            "vxdec": vxdec,
+            "vxcor": self.vxcor,
+            "nIter": nIter,
+            "bConverged": ~bActive,
+        }
+
+        if self.bVerbose == 1:
+            print("BatchLapSolver completed (" + str(nK) + " setups)")
+        return self.batchDict
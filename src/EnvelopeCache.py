@@ -0,0 +1,152 @@
+"""
+---------------------------
+Envelope Cache - OLS
+---------------------------
+
+This class caches the Performance Envelope (accEnvDict of AccEnvCalc),
+keyed on a canonical hash of the setupDict and the envelope resolution,
+so the same car run on many tracks (or many times in a sweep) computes
+its envelope only once.
+
+Tiers:
+    - memory: LRU of maxSize envelopes.
+    - disk (optional, cacheDir): one .npz file per envelope, the least
+      recently used files are removed above maxDiskBytes. The files are
+      written to a temporary file and renamed, so the workers sharing a
+      cacheDir never read a half-written envelope. The keys holding None
+      are stored by name and restored on load.
+
+The cached accEnvDict is shared by all the callers: it must be treated as
+read only (LapTimeSimCalc only adds the split GGV to it).
+
+"""
+# Import Packages
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+
+# import packages (OLP)
+from AccEnvCalc import AccEnvCalc
+
+# setup keys which do not change the envelope
+IGNORED_KEYS = ("setupName",)
+# .npz entry listing the accEnvDict keys holding None
+NONE_KEYS = "_noneKeys"
+# envelope options and their AccEnvCalc defaults
+ENV_DEFAULTS = {"nSteps": 10, "nAx": 20, "envMode": "loop"}
+
+
+class EnvelopeCache:
+
+    def __init__(self, maxSize=32, cacheDir=None, maxDiskBytes=500e6):
+        # inputs
+        self.maxSize = maxSize
+        self.cacheDir = cacheDir
+        self.maxDiskBytes = maxDiskBytes
+        if cacheDir is not None:
+            os.makedirs(cacheDir, exist_ok=True)
+        # memory tier {key: accEnvDict}, least recently used first
+        self.memCache = collections.OrderedDict()
+        # statistics
+        self.nMemHits = 0
+        self.nDiskHits = 0
+        self.nMisses = 0
+
+    @staticmethod
+    def setupHash(setupDict):
+        """ canonical hash of the setup: key order, int/float types and the
+            setup name do not change it, the envelope resolution does """
+        def canonical(value):
+            if value is None or isinstance(value, str):
+                return value
+            if isinstance(value, dict):
+                return {k: canonical(v) for k, v in value.items()}
+            if np.ndim(value) > 0:
+                return [canonical(v) for v in value]
+            return float(value)
+
+        keyDict = dict(ENV_DEFAULTS)
+        keyDict.update({k: v for k, v in setupDict.items()
+                        if k not in IGNORED_KEYS})
+        keyString = json.dumps(canonical(keyDict), sort_keys=True)
+        return hashlib.sha256(keyString.encode()).hexdigest()
+
+    def getEnvelope(self, setupDict):
+        """ returns the accEnvDict of the setup: from memory, from disk or
+            computed with AccEnvCalc """
+        key = EnvelopeCache.setupHash(setupDict)
+        if key in self.memCache:
+            self.nMemHits += 1
+            self.memCache.move_to_end(key)
+            return self.memCache[key]
+        accEnvDict = self.loadDisk(key)
+        if accEnvDict is not None:
+            self.nDiskHits += 1
+        else:
+            self.nMisses += 1
+            aE = AccEnvCalc(setupDict, bVerbose=0)
+            aE.Run()
+            accEnvDict = aE.accEnvDict
+            self.saveDisk(key, accEnvDict)
+        self.memCache[key] = accEnvDict
+        if len(self.memCache) > self.maxSize:
+            self.memCache.popitem(last=False)
+        return accEnvDict
+
+    def diskPath(self, key):
+        return os.path.join(self.cacheDir, "AccEnv_" + key + ".npz")
+
+    def loadDisk(self, key):
+        if self.cacheDir is None or not os.path.exists(self.diskPath(key)):
+            return None
+        path = self.diskPath(key)
+        try:
+            with np.load(path) as data:
+                accEnvDict = {name: data[name] for name in data.files
+                              if name != NONE_KEYS}
+                if NONE_KEYS in data.files:
+                    for name in data[NONE_KEYS]:
+                        accEnvDict[str(name)] = None
+            os.utime(path)  # most recently used
+        except FileNotFoundError:  # removed by another worker
+            return None
+        return accEnvDict
+
+    def saveDisk(self, key, accEnvDict):
+        if self.cacheDir is None:
+            return
+        arrays = {name: np.asarray(value)
+                  for name, value in accEnvDict.items() if value is not None}
+        arrays[NONE_KEYS] = np.array([name for name, value in
+                                      accEnvDict.items() if value is None],
+                                     dtype=str)
+        # write a temporary file in cacheDir, then rename it (atomic)
+        fd, tempPath = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tempPath, self.diskPath(key))
+        except BaseException:
+            os.remove(tempPath)
+            raise
+        self.limitDiskSize()
+
+    def limitDiskSize(self):
+        """ removes the least recently used files above maxDiskBytes """
+        paths = [os.path.join(self.cacheDir, f)
+                 for f in os.listdir(self.cacheDir)
+                 if f.startswith("AccEnv_") and f.endswith(".npz")]
+        paths.sort(key=os.path.getmtime)
+        sizes = [os.path.getsize(p) for p in paths]
+        total = sum(sizes)
+        for path, size in zip(paths, sizes):
+            if total <= self.maxDiskBytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        self.memCache.clear()
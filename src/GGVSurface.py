@@ -0,0 +1,92 @@
+"""
+---------------------------
+GGV Surface - OLS
+---------------------------
+
+This class builds the GGV surface ax = f(ay, vx) once per Performance
+Envelope, so the lap time simulation can query it cheaply for every
+track point.
+
+Methods:
+    - "delaunay": linear interpolation on the Delaunay triangulation of the
+                  GGV points (same result as scipy griddata, which
+                  re-triangulates the whole GGV on every call).
+    - "grid":     bilinear interpolation on a regular (ay, vx) lookup grid
+                  sampled from the triangulation. Outside the envelope the
+                  grid holds nan, as griddata does. The grid is sized from
+                  the GGV resolution (see gridSize): the laptime is within
+                  0.02 s of "delaunay" from nSteps x nAx = 10x20 to 200x100.
+
+The triangulation (scipy, imported on demand) is built lazily: on the
+first query of a "delaunay" surface, or once to sample the "grid" (then
+released, the grid queries are pure NumPy).
+
+"""
+# Import Packages
+import numpy as np
+
+
+class GGVSurface:
+
+    def __init__(self, GGV, method="delaunay", nAy=None, nVx=None):
+        # inputs
+        self.X = GGV[:, 0]  # ax
+        self.Y = GGV[:, 1]  # ay
+        self.Z = GGV[:, 2]  # vx
+        self.method = method
+        # triangulation (see triInterp)
+        self.tri = None
+        # regular lookup grid
+        self.ayGrid = None
+        self.vxGrid = None
+        self.axGrid = None  # shape (nAy, nVx)
+        if method == "grid":
+            gridSize = GGVSurface.gridSize(GGV)
+            self.buildGrid(nAy or gridSize[0], nVx or gridSize[1])
+        elif method != "delaunay":
+            raise ValueError("Unknown GGVSurface method: " + str(method))
+
+    @staticmethod
+    def gridSize(GGV):
+        """ lookup grid (nAy, nVx) of a GGV: 10 ay nodes per GGV point of a
+            speed, 4 vx nodes per GGV speed, at least 101 each """
+        nSpeeds = len(np.unique(GGV[:, 2]))
+        return (max(101, int(10*len(GGV)/nSpeeds) + 1),
+                max(101, 4*nSpeeds + 1))
+
+    def triInterp(self, points):
+        """ linear interpolation on the Delaunay triangulation of the GGV
+            (built on the first call), points = (ay, vx) """
+        if self.tri is None:
+            import scipy.interpolate as interp  # imported on demand
+            self.tri = interp.LinearNDInterpolator((self.Y, self.Z), self.X)
+        return self.tri(points)
+
+    def buildGrid(self, nAy, nVx):
+        """ samples the triangulated surface on a regular (ay, vx) grid """
+        self.ayGrid = np.linspace(np.min(self.Y), np.max(self.Y), nAy)
+        self.vxGrid = np.linspace(np.min(self.Z), np.max(self.Z), nVx)
+        ayMesh, vxMesh = np.meshgrid(self.ayGrid, self.vxGrid, indexing="ij")
+        self.axGrid = self.triInterp((ayMesh, vxMesh))
+        self.tri = None  # only the grid is queried
+
+    def gridInterp(self, vx, ay):
+        """ bilinear interpolation of the lookup grid, nan outside """
+        ayGrid, vxGrid, axGrid = self.ayGrid, self.vxGrid, self.axGrid
+        fi = (ay - ayGrid[0]) / (ayGrid[1] - ayGrid[0])
+        fj = (vx - vxGrid[0]) / (vxGrid[1] - vxGrid[0])
+        nAy, nVx = axGrid.shape
+        if not (0 <= fi <= nAy-1 and 0 <= fj <= nVx-1):
+            return np.nan
+        i = min(int(fi), nAy-2)
+        j = min(int(fj), nVx-2)
+        ti = fi - i
+        tj = fj - j
+        return ((1-ti)*(1-tj)*axGrid[i, j] + ti*(1-tj)*axGrid[i+1, j]
+                + (1-ti)*tj*axGrid[i, j+1] + ti*tj*axGrid[i+1, j+1])
+
+    def interp(self, vx, ay):
+        """ given vx and ay returns the ax combined from the surface """
+        if self.method == "grid":
+            return self.gridInterp(vx, ay)
+        return self.triInterp((ay, vx))
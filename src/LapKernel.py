@@ -0,0 +1,101 @@
+"""
+---------------------------
+Lap Kernel - OLS
+---------------------------
+
+Compiled kernel of the lap time simulation: the acceleration and the
+deceleration passes are run in one call on the regular (ay, vx) lookup
+grids of the GGV (see GGVSurface, method "grid").
+
+The kernel is compiled with Numba (njit) when it is installed, otherwise
+the same functions run as plain Python. Both give the same speed traces
+as LapTimeSimCalc with surfMethod="grid" (reference implementation).
+
+"""
+# Import Packages
+import numpy as np
+
+try:
+    from numba import njit
+    bNumba = True
+except ImportError:
+    bNumba = False
+
+    def njit(*args, **kwargs):
+        """ fallback decorator: no compilation without Numba """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+
+@njit(cache=True)
+def gridInterp(axGrid, ay0, dAy, vx0, dVx, vx, ay):
+    """ bilinear interpolation of a GGV lookup grid (same as
+        GGVSurface.gridInterp), nan outside the grid """
+    fi = (ay - ay0) / dAy
+    fj = (vx - vx0) / dVx
+    nAy, nVx = axGrid.shape
+    if not (0 <= fi <= nAy-1 and 0 <= fj <= nVx-1):
+        return np.nan
+    i = min(int(fi), nAy-2)
+    j = min(int(fj), nVx-2)
+    ti = fi - i
+    tj = fj - j
+    return ((1-ti)*(1-tj)*axGrid[i, j] + ti*(1-tj)*axGrid[i+1, j]
+            + (1-ti)*tj*axGrid[i, j+1] + ti*tj*axGrid[i+1, j+1])
+
+
+@njit(cache=True)
+def lapPasses(dist, curv, vxcor, vxaccStart,
+              accGrid, accAy0, accDAy, accVx0, accDVx,
+              decGrid, decAy0, decDAy, decVx0, decDVx):
+    """ acceleration and deceleration passes, returns (vxacc, vxdec).
+        A nan ax (outside the envelope) gives the cornering speed, as
+        min(vxcor, nan) in LapTimeSimCalc.solveLap. """
+    small = 0.00000001  # to avoid division by zero
+    n = len(dist)
+
+    # Max Acceleration Speed
+    vxacc = np.zeros(n)
+    vxacc[0] = vxaccStart
+    for i in range(n-1):
+        ayreal = vxacc[i]*vxacc[i]/(1/max(curv[i], small))
+        axcombine = gridInterp(accGrid, accAy0, accDAy, accVx0, accDVx,
+                               vxacc[i], ayreal)
+        vxnext = vxacc[i]+(dist[i+1]-dist[i])/vxacc[i]*axcombine
+        if vxnext < vxcor[i+1]:
+            vxacc[i+1] = vxnext
+        else:
+            vxacc[i+1] = vxcor[i+1]
+
+    # Max Deceleration Speed
+    vxdec = np.zeros(n)
+    vxdec[n-1] = vxacc[n-1]
+    for i in range(n-1, 0, -1):
+        ayreal = vxdec[i]*vxdec[i]/(1/max(curv[i], small))
+        axcombine = gridInterp(decGrid, decAy0, decDAy, decVx0, decDVx,
+                               vxdec[i], ayreal)
+        vxnext = vxdec[i]+(dist[i-1]-dist[i])/vxdec[i]*axcombine
+        if vxnext < vxcor[i-1]:
+            vxdec[i-1] = vxnext
+        else:
+            vxdec[i-1] = vxcor[i-1]
+
+    return vxacc, vxdec
+
+
+def gridArgs(GGVSurf):
+    """ kernel arguments (grid, ay0, dAy, vx0, dVx) of a GGVSurface
+        built with method "grid" """
+    ayGrid, vxGrid = GGVSurf.ayGrid, GGVSurf.vxGrid
+    return (np.ascontiguousarray(GGVSurf.axGrid, dtype=np.float64),
+            ayGrid[0], ayGrid[1]-ayGrid[0], vxGrid[0], vxGrid[1]-vxGrid[0])
+
+
+def runLapPasses(dist, curv, vxcor, vxaccStart, GGVaccSurf, GGVdecSurf):
+    """ runs the kernel on the lookup grids of the acc and dec surfaces """
+    return lapPasses(np.ascontiguousarray(dist, dtype=np.float64),
+                     np.ascontiguousarray(curv, dtype=np.float64),
+                     np.ascontiguousarray(vxcor, dtype=np.float64),
+                     float(vxaccStart),
+                     *gridArgs(GGVaccSurf), *gridArgs(GGVdecSurf))
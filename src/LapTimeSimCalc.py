@@ -6,6 +6,17 @@ Lap Time Simulation Calculator - OLS
 This class computes the speed trace given the Performance Envelope and
 the track file (track curvature).
 
+TrackFile can be the path of a track file (.txt or .npy, loaded and
+cached by TrackFileLoader) or an already loaded track array (columns:
+dist, curv).
+
+With bKernel=1 the acceleration and deceleration passes run in the
+LapKernel (Numba compiled when installed) on the GGV lookup grids.
+
+After a local curvature edit, updateCurvature re-integrates only the
+window of the speed traces affected by the edit (see its docstring), with
+bKernel=1 it solves the whole lap again.
+
 ---------------------------
 @autor: Davide Strassera
 @first release: 2019-12-21
@@ -15,18 +26,36 @@ by Python 3.7
 """
 # Import Packages
 import numpy as np
-import scipy.interpolate as interp
+from GGVSurface import GGVSurface
+from StageTimer import StageTimer
+from TrackFileLoader import TrackFileLoader
 
 
 class LapTimeSimCalc:
 
-    def __init__(self, TrackFile, accEnvDict, vxaccStart):
+    def __init__(self, TrackFile, accEnvDict, vxaccStart,
+                 surfMethod="delaunay", bVerbose=1, bKernel=0, timer=None):
         # inputs
         self.TrackFile = TrackFile
         self.GGVacc = None
         self.GGVdec = None
+        self.accEnvDict = accEnvDict
         self.GGVfull = accEnvDict["GGVfull"]  # ax,ay,vx
         self.vxaccStart = vxaccStart
+        self.surfMethod = surfMethod  # "delaunay" or "grid" (GGVSurface)
+        self.bKernel = bKernel  # 1: LapKernel passes on the grid surfaces
+        if bKernel == 1:
+            self.surfMethod = "grid"
+        self.GGVaccSurf = None
+        self.GGVdecSurf = None
+        self.bVerbose = bVerbose
+        self.timer = timer or StageTimer()  # per-stage timings
+        # track and cornering speed limit (see prepare)
+        self.dist = None
+        self.curv = None
+        self.vxcor = None
+        self.curvTable = None
+        self.vxTable = None
         # outputs
         self.lapTimeSimDict = {
             "vcar": None,
@@ -40,114 +69,202 @@ class LapTimeSimCalc:
             "vxcor": None,
             "GGVacc": None,
             "GGVdec": None,
+            "nIter": None,
+            "bConverged": None,
         }
 
     @staticmethod
-    def splitGGVfull(GGVfull):
+    def splitGGVfull(GGVfull, bDedup=1):
         """This method split the GGVfull (which means complete acc, dec and
            mirror left, right), and split it into two matrices: GGVacc
-           and GGVdec. This is needed for proper griddata interpolation."""
-        GGVacc = np.array([])
-        GGVdec = np.array([])
-        j, k = 0, 0
-        for i in range(len(GGVfull[:, 0])):
-            # GGVacc with ax >=0
-            if GGVfull[i, 0] >= 0:
-                GGVacc = np.concatenate((GGVacc, GGVfull[i, :]))
-                j += 1
-            # GGVdec with ax < 0 or (with ax=0 and not max speed)
-            vxmax = max(GGVfull[:, 2])
-            bAxZeroAndNotTopSpeed = GGVfull[i, 0] == 0 and GGVfull[i, 2] < vxmax
-            if GGVfull[i, 0] < 0 or bAxZeroAndNotTopSpeed:
-                GGVdec = np.concatenate((GGVdec, GGVfull[i, :]))
-                k += 1
-        # ncol = np.size(GGVfull, axis=1)
-        GGVacc = np.resize(GGVacc, (j, 3))
-        GGVdec = np.resize(GGVdec, (k, 3))
+           and GGVdec. This is needed for proper griddata interpolation.
+           With bDedup=1 the repeated (ax, ay, vx) rows (e.g. the ax=0 rows
+           of both the acc and dec GGV) are kept only once."""
+        ax, vx = GGVfull[:, 0], GGVfull[:, 2]
+        vxmax = np.max(vx)
+        # GGVacc with ax >=0
+        GGVacc = GGVfull[ax >= 0]
+        # GGVdec with ax < 0 or (with ax=0 and not max speed)
+        GGVdec = GGVfull[(ax < 0) | ((ax == 0) & (vx < vxmax))]
+        if bDedup == 1:
+            GGVacc = LapTimeSimCalc.uniqueRows(GGVacc)
+            GGVdec = LapTimeSimCalc.uniqueRows(GGVdec)
         return GGVacc, GGVdec
 
+    @staticmethod
+    def uniqueRows(GGV):
+        """ removes the repeated rows, keeping the order of the first
+            occurrences (+0.0 makes -0.0 and 0.0 the same) """
+        index = np.unique(GGV + 0.0, axis=0, return_index=True)[1]
+        return GGV[np.sort(index)]
+
+    @staticmethod
+    def getSplitGGV(accEnvDict):
+        """ returns the split GGV (GGVacc, GGVdec) of an envelope. It is
+            computed once and stored in the accEnvDict, so all the laps
+            run with the same envelope reuse it. """
+        if accEnvDict.get("GGVaccSplit") is None:
+            GGVacc, GGVdec = LapTimeSimCalc.splitGGVfull(
+                accEnvDict["GGVfull"])
+            accEnvDict["GGVaccSplit"] = GGVacc
+            accEnvDict["GGVdecSplit"] = GGVdec
+        return accEnvDict["GGVaccSplit"], accEnvDict["GGVdecSplit"]
+
+    @staticmethod
+    def loadTrack(TrackFile):
+        """ returns dist and curv from a TrackFile path (through the
+            TrackFileLoader cache) or from an already loaded track array """
+        if isinstance(TrackFile, np.ndarray):
+            return TrackFile[:, 0], TrackFile[:, 1]
+        return TrackFileLoader(TrackFile).load()
+
+    @staticmethod
+    def calcVxcorTable(GGVacc):
+        """ builds the max cornering speed table of an envelope from the
+            pure lateral points of the GGVacc (ax = 0, ay >= 0), curvature
+            C = ay/v^2. Returns (curvTable, vxTable) sorted by curvature. """
+        small = 0.00000001  # to avoid division by zero
+        bPureLat = (GGVacc[:, 0] == 0) & (GGVacc[:, 1] >= 0)
+        vxvect = np.maximum(GGVacc[bPureLat, 2], small)
+        curvvect = GGVacc[bPureLat, 1]/np.power(vxvect, 2)  # C=ay/v^2
+        curvvect[0] = 0.5
+        order = np.argsort(curvvect, kind="stable")
+        return curvvect[order], vxvect[order]
+
+    @staticmethod
+    def calcVxcor(curv, curvTable, vxTable):
+        """ max cornering speed (pure lateral, ay) for an array of track
+            curvatures, given the table from calcVxcorTable. The curvature
+            is clipped to the min of the table (max speed). """
+        curvclipped = np.maximum(np.absolute(curv), curvTable[0])
+        return np.interp(curvclipped, curvTable, vxTable)
+
+    @staticmethod
+    def calcVcar(vxcor, vxacc, vxdec):
+        """ final speed: element-wise min of the cornering, acceleration and
+            deceleration speeds, the last point takes the previous value """
+        vcar = np.minimum(np.minimum(vxcor, vxacc), vxdec)
+        vcar[-1] = vcar[-2]
+        return vcar
+
+    @staticmethod
+    def calcLapTime(vcar, dist):
+        """ time and laptime of a speed trace (distance based).
+            time[i] is the time at the end of the step i (dist[i] to
+            dist[i+1]), the last point holds the total, laptime is rounded
+            to ms. """
+        timestep = np.diff(dist)/vcar[:-1]
+        time = np.cumsum(timestep)
+        time = np.append(time, time[-1])
+        laptime = np.round(time[-1], 3)
+        return time, laptime
+
     # GGV surface
     @staticmethod
     def GGVSurfInterp(vx, ay, X, Y, Z):
         """ given vx, ay and the GGV vectors (X=ax, Y=ay, Z=speed) returns
-            the ax combined using griddata interpolation """
+            the ax combined using griddata interpolation.
+            NOTE: griddata triangulates the whole GGV on every call, inside
+            the lap use the GGVSurface objects built once in Run. """
+        import scipy.interpolate as interp  # legacy path only
         axcombine = interp.griddata((Y, Z), X, (ay, vx),
                                     method='linear')  # ,fill_value=0.0)
         return axcombine
 
-    def Run(self):
+    def prepare(self):
+        """ split the GGV, build the GGV surfaces, load the track and
+            compute the cornering speed limit. These only depend on the
+            envelope and the track, so they are computed once and reused by
+            every lap solved by this object. """
+        if self.vxcor is not None:
+            return
+        timer = self.timer
         # Split the full GGV in acc and dec
-        self.GGVacc, self.GGVdec = LapTimeSimCalc.splitGGVfull(self.GGVfull)
+        with timer.stage("ggvSplit"):
+            self.GGVacc, self.GGVdec = LapTimeSimCalc.getSplitGGV(
+                self.accEnvDict)
+        with timer.stage("ggvSurface"):
+            self.GGVaccSurf = GGVSurface(self.GGVacc, self.surfMethod)
+            self.GGVdecSurf = GGVSurface(self.GGVdec, self.surfMethod)
 
         # Load TrackFile
-        track = np.loadtxt(self.TrackFile)
-        dist = track[:, 0]
-        curv = track[:, 1]
-
-        # Speed Calculations
-        small = 0.00000001  # to avoid division by zero
+        with timer.stage("trackLoad"):
+            self.dist, self.curv = LapTimeSimCalc.loadTrack(self.TrackFile)
 
         # 1. Max Cornering Speed ---------------------------------------------
-        curvvect = np.array([])
-        vxvect = np.array([])
-        for i in range(len(self.GGVacc[:, 2])):
-            # if ax == 0 & ay is positive
-            if(self.GGVacc[i, 0] == 0) and (self.GGVacc[i, 1] >= 0):
-                vxclipped = max(self.GGVacc[i, 2], small)  # to avoid div by zero
-                curvvect = np.append(curvvect, self.GGVacc[i, 1]/pow(vxclipped, 2))  # C=ay/v^2
-                vxvect = np.append(vxvect, vxclipped)
-        curvvect[0] = 0.5
-        curvclipped = np.zeros(len(curv))
-        for i in range(len(curv)):
-            # curvature clipped to max speed
-            curvclipped[i] = max(np.absolute(curv[i]), min(curvvect))
-        # v corner from pure lateral (ay)
-        vxcor = np.interp(curvclipped, curvvect, vxvect, period=360)
+        with timer.stage("vxcor"):
+            self.curvTable, self.vxTable = LapTimeSimCalc.calcVxcorTable(
+                self.GGVacc)
+            self.vxcor = LapTimeSimCalc.calcVxcor(self.curv, self.curvTable,
+                                                  self.vxTable)
+
+    def accPass(self, vxaccStart):
+        """ max acceleration speed (reference implementation) """
+        dist, curv, vxcor = self.dist, self.curv, self.vxcor
+        small = 0.00000001  # to avoid division by zero
 
-        # 2. Max Acceleration Speed ------------------------------------------
         vxacc = np.zeros(len(curv))
-        vxacc[0] = self.vxaccStart  # must be the last vacc
+        vxacc[0] = vxaccStart  # must be the last vacc
         ayreal = np.zeros(len(curv))
         axcombine = np.zeros(len(curv))
 
-        X, Y, Z = self.GGVacc[:, 0], self.GGVacc[:, 1], self.GGVacc[:, 2]
         for i in range(len(dist)-1):
             ayreal[i] = pow(vxacc[i], 2)/(1/max(curv[i], small))
-            axcombine[i] = LapTimeSimCalc.GGVSurfInterp(vxacc[i], ayreal[i],
-                                                        X, Y, Z)
+            axcombine[i] = self.GGVaccSurf.interp(vxacc[i], ayreal[i])
             vxacc[i+1] = min(vxcor[i+1], (vxacc[i]+(dist[i+1]-dist[i])
                                           / vxacc[i]*axcombine[i]))
+        return vxacc
+
+    def decPass(self, vxaccEnd):
+        """ max deceleration speed (reference implementation), backwards
+            from the end speed of the acceleration pass """
+        dist, curv, vxcor = self.dist, self.curv, self.vxcor
+        small = 0.00000001  # to avoid division by zero
 
-        # 3. Max Deceleration Speed ------------------------------------------
         vxdec = np.zeros(len(curv))
-        vxdec[-1] = vxacc[-1]
+        vxdec[-1] = vxaccEnd
         ayreal = np.zeros(len(curv))
         axcombine = np.zeros(len(curv))
 
-        X, Y, Z = self.GGVdec[:, 0], self.GGVdec[:, 1], self.GGVdec[:, 2]
         for i in reversed(range(len(dist))):
             ayreal[i] = pow(vxdec[i], 2)/(1/max(curv[i], small))
-            axcombine[i] = LapTimeSimCalc.GGVSurfInterp(vxdec[i], ayreal[i],
-                                                        X, Y, Z)
+            axcombine[i] = self.GGVdecSurf.interp(vxdec[i], ayreal[i])
             vxdec[i-1] = min(vxcor[i-1], (vxdec[i]+(dist[i-1]-dist[i])
                                           / vxdec[i]*axcombine[i]))
-        vxdec[-1] = vxacc[-1]
+        vxdec[-1] = vxaccEnd
+        return vxdec
 
-        # Final speed (vcar) ---------------------------------------------
-        vcar = np.zeros(len(dist))
-        timestep = np.zeros(len(dist))
-        time = np.zeros(len(dist))
-        for i in range(len(dist)-1):
-            vcar[i] = min(vxcor[i], vxacc[i], vxdec[i])
-            timestep[i] = (dist[i+1]-dist[i])/vcar[i]
-            time[i] = sum(timestep)
+    def lapPasses(self, vxaccStart):
+        """ acceleration and deceleration passes (reference
+            implementation), returns (vxacc, vxdec) """
+        # 2. Max Acceleration Speed ------------------------------------------
+        with self.timer.stage("accPass"):
+            vxacc = self.accPass(vxaccStart)
+        # 3. Max Deceleration Speed ------------------------------------------
+        with self.timer.stage("decPass"):
+            vxdec = self.decPass(vxacc[-1])
+        return vxacc, vxdec
 
-        vcar[(len(vcar)-1)] = vcar[(len(vcar)-2)]
+    def solveLap(self, vxaccStart):
+        """ solves one lap (acceleration, deceleration and final speed)
+            starting at vxaccStart, returns the lapTimeSimDict """
+        dist, vxcor = self.dist, self.vxcor
+        if self.bKernel == 1:
+            import LapKernel  # imported on demand (Numba compilation)
+            with self.timer.stage("lapKernel"):
+                vxacc, vxdec = LapKernel.runLapPasses(dist, self.curv, vxcor,
+                                                      vxaccStart,
+                                                      self.GGVaccSurf,
+                                                      self.GGVdecSurf)
+        else:
+            vxacc, vxdec = self.lapPasses(vxaccStart)
 
-        laptime = np.round(max(time), 3)
+        # Final speed (vcar) ---------------------------------------------
+        vcar = LapTimeSimCalc.calcVcar(vxcor, vxacc, vxdec)
+        time, laptime = LapTimeSimCalc.calcLapTime(vcar, dist)
         vcarmax = np.round(max(vcar), 3)
 
-        self.lapTimeSimDict = {
+        lapTimeSimDict = {
             "vcar": vcar,
             "dist": dist,
             "time": time,
@@ -159,6 +276,131 @@ class LapTimeSimCalc:
             "vxcor": vxcor,
             "GGVacc": self.GGVacc,
             "GGVdec": self.GGVdec,
+            "nIter": 1,
+            "bConverged": None,
         }
+        return lapTimeSimDict
+
+    def Run(self):
+        self.prepare()
+        self.lapTimeSimDict = self.solveLap(self.vxaccStart)
+
+        if self.bVerbose == 1:
+            print("LapSimTimeCalc completed")
+
+    def RunFlyingLap(self, tol=0.001, maxIter=10, vxaccStart=None):
+        """ flying lap: the lap is solved again starting from the end speed
+            of the previous one until start and end speed match within tol
+            [m/s]. The track, the split GGV and vxcor are reused between the
+            iterations, "nIter" reports the number of laps solved. """
+        self.prepare()
+        if vxaccStart is None:
+            vxaccStart = self.vxaccStart
+        bConverged = False
+        for nIter in range(1, maxIter+1):
+            lapTimeSimDict = self.solveLap(vxaccStart)
+            vxaccEnd = lapTimeSimDict["vxaccEnd"]
+            if abs(vxaccEnd - vxaccStart) < tol:
+                bConverged = True
+                break
+            vxaccStart = vxaccEnd
+        lapTimeSimDict["nIter"] = nIter
+        lapTimeSimDict["bConverged"] = bConverged
+        self.lapTimeSimDict = lapTimeSimDict
+
+        if self.bVerbose == 1:
+            print("LapSimTimeCalc completed (flying lap, nIter: "
+                  + str(nIter) + ")")
+
+    # Incremental re-solve ---------------------------------------------------
+    def accStep(self, vxacc, i):
+        """ vxacc[i+1] from vxacc[i], one step of accPass """
+        small = 0.00000001  # to avoid division by zero
+        ayreal = pow(vxacc[i], 2)/(1/max(self.curv[i], small))
+        axcombine = self.GGVaccSurf.interp(vxacc[i], ayreal)
+        return min(self.vxcor[i+1], (vxacc[i]+(self.dist[i+1]-self.dist[i])
+                                     / vxacc[i]*axcombine))
+
+    def decStep(self, vxdec, i):
+        """ vxdec[i-1] from vxdec[i], one step of decPass """
+        small = 0.00000001  # to avoid division by zero
+        ayreal = pow(vxdec[i], 2)/(1/max(self.curv[i], small))
+        axcombine = self.GGVdecSurf.interp(vxdec[i], ayreal)
+        return min(self.vxcor[i-1], (vxdec[i]+(self.dist[i-1]-self.dist[i])
+                                     / vxdec[i]*axcombine))
+
+    def updateCurvature(self, iStart, curvWindow, tol=0.001):
+        """ re-solves the lap after the curvature of the points iStart to
+            iStart+len(curvWindow)-1 is replaced by curvWindow. The
+            acceleration pass is integrated again from the window start
+            until it rejoins the previous trace after the window, the
+            deceleration pass backwards from the window end in the same way
+            (the whole deceleration pass if the end speed changed). A flying
+            lap whose start and end speed no longer match within tol is
+            solved again (RunFlyingLap from the new end speed).
+            With bKernel=1 the whole lap is solved again in the LapKernel.
+            Returns the number of track points integrated again. """
+        lapTimeSimDict = self.lapTimeSimDict
+        n = len(self.dist)
+        iEnd = iStart + len(curvWindow) - 1
+
+        # edited curvature and cornering speed limit
+        self.curv = np.array(self.curv)
+        self.curv[iStart:iEnd+1] = curvWindow
+        self.vxcor = np.array(self.vxcor)
+        self.vxcor[iStart:iEnd+1] = LapTimeSimCalc.calcVxcor(
+            self.curv[iStart:iEnd+1], self.curvTable, self.vxTable)
+
+        # kernel traces: solved again in full, the Python steps (with
+        # GGVSurface.interp) may round differently and never rejoin them
+        if self.bKernel == 1:
+            if lapTimeSimDict["bConverged"] is not None:
+                self.RunFlyingLap(tol, vxaccStart=lapTimeSimDict["vxacc"][0])
+                return n*self.lapTimeSimDict["nIter"]
+            self.lapTimeSimDict = self.solveLap(self.vxaccStart)
+            return n
+
+        # acceleration pass, from the window start until it rejoins
+        vxacc = np.array(lapTimeSimDict["vxacc"])
+        nSteps = 0
+        i = max(iStart-1, 0)
+        while i < n-1:
+            vxnext = self.accStep(vxacc, i)
+            bRejoined = vxnext == vxacc[i+1]
+            vxacc[i+1] = vxnext
+            nSteps += 1
+            i += 1
+            if bRejoined and i > iEnd:
+                break
+
+        # deceleration pass, from the window end until it rejoins
+        if vxacc[-1] != lapTimeSimDict["vxacc"][-1]:
+            vxdec = self.decPass(vxacc[-1])
+            nSteps += n
+        else:
+            vxdec = np.array(lapTimeSimDict["vxdec"])
+            i = min(iEnd+1, n-1)
+            while i > 0:
+                vxprev = self.decStep(vxdec, i)
+                bRejoined = vxprev == vxdec[i-1]
+                vxdec[i-1] = vxprev
+                nSteps += 1
+                i -= 1
+                if bRejoined and i < iStart:
+                    break
+
+        # final speed and laptime
+        vcar = LapTimeSimCalc.calcVcar(self.vxcor, vxacc, vxdec)
+        time, laptime = LapTimeSimCalc.calcLapTime(vcar, self.dist)
+        self.lapTimeSimDict = dict(lapTimeSimDict, vcar=vcar, time=time,
+                                   laptime=laptime,
+                                   vcarmax=np.round(max(vcar), 3),
+                                   vxaccEnd=vcar[-1], vxacc=vxacc,
+                                   vxdec=vxdec, vxcor=self.vxcor)
 
-        print("LapSimTimeCalc completed")
+        # flying lap: start and end speed must still match
+        if (lapTimeSimDict["bConverged"] is not None
+                and abs(vcar[-1] - vxacc[0]) >= tol):
+            self.RunFlyingLap(tol, vxaccStart=vcar[-1])
+            nSteps += n*self.lapTimeSimDict["nIter"]
+        return nSteps
@@ -4,6 +4,11 @@ Post Processing - OLS
 ---------------------------
 
 This class computes the post processing of the simulation.
+matplotlib (and scipy) are imported by the plot methods only, so the
+headless runs (bPlot=0) do not load them.
+
+The inputs can be the accEnvDict and lapTimeSimDict or the compact
+AccEnvResult and LapResult (SimResults) stored with the traces.
 
 ---------------------------
 @autor: Davide Strassera
@@ -13,9 +18,10 @@ by Python 3.7
 
 """
 # Import packages
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.interpolate as interp
+
+# import packages (OLP)
+from LapTimeSimCalc import LapTimeSimCalc
 
 
 class PostProc:
@@ -24,8 +30,11 @@ class PostProc:
         self.size = 10
         # inputs
         self.GGVfull = accEnvDict["GGVfull"]
-        self.GGVacc = lapSimTimeDict["GGVacc"]
-        self.GGVdec = lapSimTimeDict["GGVdec"]
+        self.GGVacc = lapSimTimeDict.get("GGVacc")
+        self.GGVdec = lapSimTimeDict.get("GGVdec")
+        if self.GGVacc is None:  # LapResult: GGV not stored
+            self.GGVacc, self.GGVdec = LapTimeSimCalc.splitGGVfull(
+                self.GGVfull)
 
         self.vxvect = accEnvDict["vxvect"]
         self.ay = accEnvDict["ay"]
@@ -48,6 +57,7 @@ class PostProc:
         self.Fxdrive = accEnvDict["Fxdrive"]
 
     def plotAccEnv(self):
+        import matplotlib.pyplot as plt
         plt.figure(1, figsize=(self.size/2, self.size/2))
         plt.title("Acceleration Envelope")
         plt.plot(self.ay, self.vxvect, 'c-', label="ay")
@@ -60,6 +70,8 @@ class PostProc:
         plt.ylim(0, self.vcarmax*1.2)
 
     def plotGGV(self, bPlotGGVfull=0):
+        import matplotlib.pyplot as plt
+        import scipy.interpolate as interp
         GGVacc = self.GGVacc
         GGVdec = self.GGVdec
         GGVfull = self.GGVfull
@@ -112,6 +124,7 @@ class PostProc:
         ax.set_zlabel('velocity [m/s]')
 
     def plotAccEnvExtra(self):
+        import matplotlib.pyplot as plt
         f, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4,
                                                figsize=(self.size*1.5,
                                                         self.size/2))
@@ -139,6 +152,7 @@ class PostProc:
         ax4.grid(b=True, which='major', linestyle=':')
 
     def plotLapTimeSim(self):
+        import matplotlib.pyplot as plt
         plt.figure(2, figsize=(self.size, self.size/2))
         plt.title("OpenLapSim - Lap Time Simulation")
         plt.plot(self.dist, self.vcar, 'b-', linewidth=2, label="vcar")
@@ -150,6 +164,7 @@ class PostProc:
         plt.xlim(0, max(self.dist))
 
     def plotLapTimeSimExtra(self):
+        import matplotlib.pyplot as plt
         plt.figure(3, (self.size, self.size/2))
         plt.title("Lap Time Simulation - Extra")
         plt.plot(self.dist, self.vxcor, 'c-', label="vxcor")
@@ -163,6 +178,12 @@ class PostProc:
         plt.ylim(0, self.vcarmax*1.2)
         plt.xlim(0, max(self.dist))
 
+    @staticmethod
+    def showPlots():
+        """ shows all the figures once at the end """
+        import matplotlib.pyplot as plt
+        plt.show()
+
     def printData(self):
         print("PostProc completed")
         print("---------------------------")
@@ -0,0 +1,301 @@
+"""
+---------------------------
+Benchmarks - OLS
+---------------------------
+
+This class times the simulation stages and writes the results as JSON, so
+regressions can be caught between versions.
+
+Benchmarks:
+    - "AccEnvCalc.Run":   envelope, per envMode and resolution (nSteps, nAx)
+    - "splitGGVfull":     GGV split, per resolution
+    - "GGVSurfInterp":    one griddata call, per resolution
+    - "GGVSurface.interp": one query of the prebuilt surface, per resolution
+    - "accPass", "decPass": reference passes, per track length
+    - "lapKernel":        LapKernel passes (both), per track length
+    - "pipeline":         AccEnvCalc + flying lap, per track length
+    - "batchLap":         BatchLapSolver flying lap of K setups (1000 points)
+    - "importTime":       cold start of a new interpreter importing the
+                          simulation core, the headless RunOpenLapSim and
+                          (reference) the plotting/scipy modules
+    - "coldRun":          new interpreter running a headless RunOpenLapSim
+                          end to end (imports, envelope, lap; the GGV
+                          triangulation still loads scipy.interpolate)
+
+Memory footprint per run ("memory", bytes): the accEnvDict and
+lapTimeSimDict against the SimResults types (float64/float32, with and
+without the per point traces), on TrackFile.txt.
+
+The tracks are synthetic (see syntheticTrack), from 100 to 100k points.
+Every benchmark makes one untimed warm-up call (first-call imports, Numba
+compilation, caches), then repeat timed calls, repeat capped by the number
+of track points solved per call (see repeatFor).
+
+Command line (from /src):
+    python3 RunBenchmarks.py                  # full suite
+    python3 RunBenchmarks.py --quick          # small sizes only
+    python3 RunBenchmarks.py --compare benchFiles/Bench_old.json
+
+"""
+# Import Packages
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+# import packages (OLP)
+import LapKernel
+from AccEnvCalc import AccEnvCalc
+from BatchLapSolver import BatchLapSolver
+from GGVSurface import GGVSurface
+from LapTimeSimCalc import LapTimeSimCalc
+from SetupFileLoader import SetupFileLoader
+from SimResults import AccEnvResult, LapResult, dictBytes
+
+# cold start imports: {name: import statement}
+IMPORTS = {
+    "core": "import AccEnvCalc, LapTimeSimCalc, SetupFileLoader",
+    "RunOpenLapSim": "import RunOpenLapSim",
+    "matplotlib+scipy": ("import matplotlib.pyplot, scipy.interpolate, "
+                         "scipy.optimize"),
+}
+# cold start runs: {name: statement}
+COLD_RUNS = {
+    "RunOpenLapSim": ("from RunOpenLapSim import RunOpenLapSim; "
+                      "RunOpenLapSim('SetupFile.json', 'TrackFile.txt', "
+                      "0, 0, 0).run()"),
+}
+SRC_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+class RunBenchmarks:
+
+    def __init__(self, setupFileName="SetupFile.json",
+                 trackSizes=(100, 1000, 10000, 100000),
+                 envResolutions=((10, 20), (50, 50), (200, 100)),
+                 batchSizes=(1, 64), repeat=5):
+        # inputs
+        self.setupFileName = setupFileName
+        self.trackSizes = trackSizes
+        self.envResolutions = envResolutions  # (nSteps, nAx)
+        self.batchSizes = batchSizes  # setups per BatchLapSolver
+        self.repeat = repeat
+        self.setupFilesPath = "setupFiles/"
+        self.trackFilesPath = "trackFiles/"
+        self.benchFilesPath = "benchFiles/"
+        # outputs
+        self.benchDict = None
+
+    @staticmethod
+    def syntheticTrack(nPoints, ds=10.0):
+        """ returns a (nPoints, 2) track (dist, curv): straights and
+            corners of different radius, with smooth transitions """
+        dist = np.arange(nPoints)*ds
+        phase = dist/2000.0*2*np.pi
+        curv = 0.02*np.power(np.sin(phase), 9) + 0.005*np.sin(3.3*phase)
+        return np.column_stack((dist, curv))
+
+    @staticmethod
+    def timeit(function, repeat):
+        """ returns the min and mean wall time [s] of repeat calls, after
+            one untimed warm-up call """
+        function()
+        times = []
+        for _ in range(repeat):
+            tstart = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - tstart)
+        return {"min": min(times), "mean": sum(times)/len(times),
+                "repeat": repeat}
+
+    @staticmethod
+    def importModules(statement):
+        """ runs the statement (imports or a whole run) in a new
+            interpreter (cold start), returns the modules it loaded """
+        code = (statement + "\nimport sys; print(); "
+                "print(' '.join(sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], cwd=SRC_PATH,
+                                check=True, capture_output=True, text=True)
+        return output.stdout.splitlines()[-1].split()
+
+    def repeatFor(self, nPoints):
+        """ timed calls of a benchmark solving nPoints track points per
+            call (about 10k points in total) """
+        return max(1, min(self.repeat, 10000 // nPoints))
+
+    def record(self, name, params, function, repeat=None):
+        result = {"name": name, "params": params}
+        result.update(RunBenchmarks.timeit(function, repeat or self.repeat))
+        self.benchDict["results"].append(result)
+        print(name, params, "%.6f s" % result["min"])
+
+    def recordMemory(self, name, params, nbytes):
+        self.benchDict["memory"].append({"name": name, "params": params,
+                                         "bytes": nbytes})
+        print(name, params, nbytes, "bytes")
+
+    def runMemory(self, accEnvDict, trackFileName="TrackFile.txt"):
+        """ memory footprint of the results of one run """
+        lS = LapTimeSimCalc(self.trackFilesPath + trackFileName, accEnvDict,
+                            10, bVerbose=0)
+        lS.RunFlyingLap()
+        self.recordMemory("accEnvDict", {}, dictBytes(accEnvDict))
+        self.recordMemory("lapTimeSimDict", {},
+                          dictBytes(lS.lapTimeSimDict))
+        for dtype in (np.float64, np.float32):
+            for bTraces in (1, 0):
+                params = {"dtype": dtype.__name__, "bTraces": bTraces}
+                self.recordMemory("AccEnvResult", params,
+                                  AccEnvResult.fromDict(accEnvDict, dtype,
+                                                        bTraces).nbytes())
+                self.recordMemory("LapResult", params,
+                                  LapResult.fromDict(lS.lapTimeSimDict,
+                                                     dtype, bTraces).nbytes())
+
+    def run(self):
+        self.benchDict = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "numba": LapKernel.bNumba,
+            "results": [],
+            "memory": [],
+        }
+        s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+        s.loadJSON()
+
+        # Import time (cold start) -------------------------------------------
+        for name, statement in IMPORTS.items():
+            self.record("importTime", {"modules": name},
+                        lambda: RunBenchmarks.importModules(statement))
+        for name, statement in COLD_RUNS.items():
+            self.record("coldRun", {"run": name},
+                        lambda: RunBenchmarks.importModules(statement))
+
+        # Envelope, GGV split and GGV surface ---------------------------------
+        for nSteps, nAx in self.envResolutions:
+            params = {"nSteps": nSteps, "nAx": nAx}
+            for envMode in ("loop", "vector"):
+                setupDict = dict(s.setupDict, nSteps=nSteps, nAx=nAx,
+                                 envMode=envMode)
+                aE = AccEnvCalc(setupDict, bVerbose=0)
+                self.record("AccEnvCalc.Run",
+                            dict(params, envMode=envMode), aE.Run)
+            GGVfull = aE.accEnvDict["GGVfull"]
+            self.record("splitGGVfull", params,
+                        lambda: LapTimeSimCalc.splitGGVfull(GGVfull))
+            GGVacc, GGVdec = LapTimeSimCalc.splitGGVfull(GGVfull)
+            X, Y, Z = GGVdec[:, 0], GGVdec[:, 1], GGVdec[:, 2]
+            vxq = 0.5*np.max(Z)
+            self.record("GGVSurfInterp", params,
+                        lambda: LapTimeSimCalc.GGVSurfInterp(vxq, 0, X, Y, Z))
+            surf = GGVSurface(GGVdec)
+            self.record("GGVSurface.interp", params,
+                        lambda: surf.interp(vxq, 0))
+
+        # Lap passes and full pipeline, per track length ----------------------
+        aE = AccEnvCalc(s.setupDict, bVerbose=0)
+        aE.Run()
+        self.runMemory(aE.accEnvDict)
+        for nPoints in self.trackSizes:
+            params = {"nPoints": nPoints}
+            repeat = self.repeatFor(nPoints)
+            track = RunBenchmarks.syntheticTrack(nPoints)
+            lS = LapTimeSimCalc(track, aE.accEnvDict, 10, bVerbose=0)
+            lS.prepare()
+            vxacc = lS.accPass(10)
+            self.record("accPass", params, lambda: lS.accPass(10), repeat)
+            self.record("decPass", params, lambda: lS.decPass(vxacc[-1]),
+                        repeat)
+            lK = LapTimeSimCalc(track, aE.accEnvDict, 10, bVerbose=0,
+                                bKernel=1)
+            lK.prepare()
+            self.record("lapKernel", params,
+                        lambda: LapKernel.runLapPasses(lK.dist, lK.curv,
+                                                       lK.vxcor, 10,
+                                                       lK.GGVaccSurf,
+                                                       lK.GGVdecSurf),
+                        repeat)
+
+            def pipeline():
+                aEp = AccEnvCalc(s.setupDict, bVerbose=0)
+                aEp.Run()
+                lP = LapTimeSimCalc(track, aEp.accEnvDict, 10, bVerbose=0)
+                lP.RunFlyingLap()
+            self.record("pipeline", params, pipeline, repeat)
+
+        # Batch of setups on one track ----------------------------------------
+        nPoints = 1000
+        track = RunBenchmarks.syntheticTrack(nPoints)
+        for nSetups in self.batchSizes:
+            bS = BatchLapSolver(track, [aE.accEnvDict]*nSetups, 10,
+                                bVerbose=0)
+            bS.prepare()
+            self.record("batchLap", {"nSetups": nSetups}, bS.RunFlyingLap,
+                        self.repeatFor(nPoints*nSetups))
+
+        return self.benchDict
+
+    def saveJSON(self, benchFileName=None):
+        if benchFileName is None:
+            os.makedirs(self.benchFilesPath, exist_ok=True)
+            timestrf = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+            benchFileName = (self.benchFilesPath + "Bench_" + timestrf
+                             + ".json")
+        with open(benchFileName, "w") as f:
+            json.dump(self.benchDict, f, indent=1)
+        return benchFileName
+
+    @staticmethod
+    def compareBenchmarks(oldBenchDict, newBenchDict, threshold=1.2):
+        """ returns the benchmarks slower than threshold x the old min time
+            as a list of (name, params, ratio) """
+        def key(result):
+            return result["name"], json.dumps(result["params"],
+                                              sort_keys=True)
+        oldResults = {key(r): r for r in oldBenchDict["results"]}
+        regressions = []
+        for result in newBenchDict["results"]:
+            old = oldResults.get(key(result))
+            if old is None:
+                continue
+            ratio = result["min"]/old["min"]
+            if ratio > threshold:
+                regressions.append((result["name"], result["params"], ratio))
+        return regressions
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="OpenLapSim benchmarks")
+    parser.add_argument("--quick", action="store_true",
+                        help="small track sizes and resolutions only")
+    parser.add_argument("--out", default=None, help="results JSON file")
+    parser.add_argument("--compare", default=None,
+                        help="previous results JSON to check regressions")
+    args = parser.parse_args()
+
+    if args.quick:
+        runBenchmarks = RunBenchmarks(trackSizes=(100, 1000),
+                                      envResolutions=((10, 20),), repeat=3)
+    else:
+        runBenchmarks = RunBenchmarks()
+    runBenchmarks.run()
+    benchFileName = runBenchmarks.saveJSON(args.out)
+    print("Benchmarks saved: ", benchFileName)
+
+    if args.compare:
+        with open(args.compare) as f:
+            oldBenchDict = json.load(f)
+        regressions = RunBenchmarks.compareBenchmarks(oldBenchDict,
+                                                      runBenchmarks.benchDict)
+        for name, params, ratio in regressions:
+            print("REGRESSION: ", name, params, "x%.2f" % ratio)
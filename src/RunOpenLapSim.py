@@ -12,6 +12,18 @@ Steps:
     3 - Calculate the Lap Time Simulation (vcar)
     4 - Plot Results
 
+The results dict reports the high resolution time and call count of every
+stage (see StageTimer). Set profiler="cProfile" (or "pyinstrument", if
+installed) to add a profiler report of the whole run.
+
+The export (bExport=1) writes all the channels and the run metadata to
+exportFiles/SimExport_<runId><exportFormat> (".npz" by default, ".txt" for
+the legacy dist/vcar text file), see SimExport.
+
+Headless runs (bPlot=0 and bPlotExtra=0) never import matplotlib and do
+not need a display. They still import scipy.interpolate for the GGV
+triangulation (see GGVSurface).
+
 ---------------------------
 @autor: Davide Strassera
 @first release: 2019-12-21
@@ -23,27 +35,33 @@ by Python 3.7
 # ----------------------------------------------------------------------------
 
 # import packages generic
-import datetime
-import matplotlib.pyplot as plt
+import cProfile
+import io
+import pstats
 import time
 
 # import packages (OLP)
 from AccEnvCalc import AccEnvCalc
 from LapTimeSimCalc import LapTimeSimCalc
 from PostProc import PostProc
+from SimExport import SimExport
 from SetupFileLoader import SetupFileLoader
+from StageTimer import StageTimer
 
 
 class RunOpenLapSim:
 
     def __init__(self, setupFileName, trackFileName,
-                 bExport, bPlot, bPlotExtra):
+                 bExport, bPlot, bPlotExtra, profiler=None,
+                 exportFormat=".npz"):
         # inputs
         self.setupFileName = setupFileName
         self.trackFileName = trackFileName
         self.bExport = bExport
         self.bPlot = bPlot
         self.bPlotExtra = bPlotExtra
+        self.profiler = profiler  # None, "cProfile" or "pyinstrument"
+        self.exportFormat = exportFormat  # ".npz", ".h5", ".parquet", ".txt"
         self.trackFilesPath = "trackFiles/"
         self.exportFilesPath = "exportFiles/"
         self.setupFilesPath = "setupFiles/"
@@ -51,52 +69,60 @@ class RunOpenLapSim:
         self.laptime = None
         self.vcarmax = None
         self.tcomp = None  # computational time
+        self.nIter = None  # laps solved by the flying lap solver
+        self.exportFileName = None
+        self.resultsDict = None  # outputs, stage timings and profile
 
     @staticmethod
     def createExportSimFile(vcar, dist, exportFilesPath):
-        time = datetime.datetime.now()
-        timestrf = time.strftime("%b-%d-%Y")
+        """ legacy text export (dist, vcar) with a unique run id """
         NewExportFileName = (exportFilesPath + "SimExport_"
-                             + str(timestrf) + ".txt")
-        newFile = open(NewExportFileName, "w")
-
-        for i in range(len(dist)):
-            lineToWrite = (str(dist[i]) + "\t" + str(vcar[i]) + "\n")
-            newFile.write(lineToWrite)
-        newFile.close()
-        return NewExportFileName
+                             + SimExport.newRunId() + ".txt")
+        return SimExport.writeExportFile(NewExportFileName,
+                                         {"dist": dist, "vcar": vcar}, {})
 
     def run(self):
         print("---------------------------")
         print("OpenLapSim")
         print("---------------------------")
 
+        # Profiler (optional)
+        profiler = None
+        if self.profiler == "cProfile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif self.profiler == "pyinstrument":
+            import pyinstrument
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+
         # Computation time start
         tstart = time.time()
+        timer = StageTimer()
 
         # SetupFile obj instantiation
-        s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
-        s.loadJSON()
+        with timer.stage("setupLoad"):
+            s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+            s.loadJSON()
 
         # Run Acceleration Envelope
-        aE = AccEnvCalc(s.setupDict)
-        aE.Run()
+        with timer.stage("envelope"):
+            aE = AccEnvCalc(s.setupDict)
+            aE.Run()
 
-        # Run Lap time Simulation
+        # Run Lap time Simulation (flying lap, start at 10 m/s)
         trackFile = (self.trackFilesPath+self.trackFileName)
-        l1 = LapTimeSimCalc(trackFile, aE.accEnvDict, 10)
-        l1.Run()
-        l2 = LapTimeSimCalc(trackFile, aE.accEnvDict,
-                            l1.lapTimeSimDict["vxaccEnd"])
-        l2.Run()
-
-        # set output channels from simulation for Export
-        vcar = l2.lapTimeSimDict["vcar"]  # car speed [m/s]
-        dist = l2.lapTimeSimDict["dist"]  # circuit dist [m]
+        lS = LapTimeSimCalc(trackFile, aE.accEnvDict, 10, timer=timer)
+        lS.RunFlyingLap()
 
-        # export
+        # export (all channels, see SimExport)
         if self.bExport == 1:
-            RunOpenLapSim.createExportSimFile(vcar, dist, self.exportFilesPath)
+            with timer.stage("export"):
+                sE = SimExport(self.exportFilesPath, self.exportFormat)
+                self.exportFileName = sE.export(aE.accEnvDict,
+                                                lS.lapTimeSimDict,
+                                                s.setupDict, trackFile,
+                                                timer.timingDict)
 
         # Computation time end
         tend = time.time()
@@ -104,21 +130,44 @@ class RunOpenLapSim:
         print("Computational time: ", tcomp)
 
         # Post Processing
-        pP = PostProc(aE.accEnvDict, l2.lapTimeSimDict)
+        pP = PostProc(aE.accEnvDict, lS.lapTimeSimDict)
         pP.printData()
-        if self.bPlot == 1:
-            # pP.plotAccEnv()
-            pP.plotGGV()
-            pP.plotLapTimeSim()
-        if self.bPlotExtra == 1:
-            pP.plotLapTimeSimExtra()
-            pP.plotAccEnvExtra()
-        plt.show()  # plot all figure once at the end
+        if self.bPlot == 1 or self.bPlotExtra == 1:
+            with timer.stage("plot"):
+                if self.bPlot == 1:
+                    # pP.plotAccEnv()
+                    pP.plotGGV()
+                    pP.plotLapTimeSim()
+                if self.bPlotExtra == 1:
+                    pP.plotLapTimeSimExtra()
+                    pP.plotAccEnvExtra()
+                PostProc.showPlots()  # plot all figure once at the end
+
+        # Profiler report
+        profile = None
+        if self.profiler == "cProfile":
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(
+                "cumulative").print_stats(30)
+            profile = stream.getvalue()
+        elif self.profiler == "pyinstrument":
+            profiler.stop()
+            profile = profiler.output_text()
 
         # output values
-        self.laptime = l2.lapTimeSimDict["laptime"]
-        self.vcarmax = l2.lapTimeSimDict["vcarmax"]
+        self.laptime = lS.lapTimeSimDict["laptime"]
+        self.vcarmax = lS.lapTimeSimDict["vcarmax"]
+        self.nIter = lS.lapTimeSimDict["nIter"]
         self.tcomp = tcomp
+        self.resultsDict = {
+            "laptime": self.laptime,
+            "vcarmax": self.vcarmax,
+            "nIter": self.nIter,
+            "tcomp": tcomp,
+            "timings": timer.timingDict,  # {stage: {"time", "calls"}}
+            "profile": profile,  # profiler text report (or None)
+        }
 
 # ----------------------------------------------------------------------------
 
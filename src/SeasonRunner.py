@@ -0,0 +1,153 @@
+"""
+---------------------------
+Season Runner - OLS
+---------------------------
+
+This class runs one setup on a list of circuits (a championship calendar):
+the Performance Envelope (and its GGV split) is computed once and the lap
+time simulations of the circuits run in parallel on a process pool (or a
+thread pool), so the wall time is close to the one of the slowest track.
+
+Tracks are a list of file names or a glob pattern (e.g. "*.txt"), in the
+trackFiles/ folder.
+
+The results are returned as one columnar table (dict of arrays):
+    - "track":    track file name
+    - "laptime":  [s]
+    - "vcarmax":  [m/s]
+    - "nIter":    laps solved by the flying lap solver
+    - "tSolve":   lap time simulation time [s] of every track
+and the scalars "totalLaptime" [s] (sum of the laptimes) and "tWall" [s].
+
+Command line example (from /src):
+    python3 SeasonRunner.py SetupFile.json "*.txt" --workers 4
+
+"""
+# Import Packages
+import argparse
+import concurrent.futures as cf
+import glob
+import os
+import time
+import numpy as np
+
+# import packages (OLP)
+from EnvelopeCache import EnvelopeCache
+from LapTimeSimCalc import LapTimeSimCalc
+from SetupFileLoader import SetupFileLoader
+
+# envelope sent once per worker process (see initWorker)
+_workerAccEnvDict = None
+
+
+def initWorker(accEnvDict):
+    """ process pool initializer: the envelope is pickled once per worker """
+    global _workerAccEnvDict
+    _workerAccEnvDict = accEnvDict
+
+
+def runWorker(trackFile):
+    """ pool task: flying lap of the worker envelope on one track """
+    tstart = time.perf_counter()
+    lS = LapTimeSimCalc(trackFile, _workerAccEnvDict, 10, bVerbose=0)
+    lS.RunFlyingLap()
+    return {"laptime": lS.lapTimeSimDict["laptime"],
+            "vcarmax": lS.lapTimeSimDict["vcarmax"],
+            "nIter": lS.lapTimeSimDict["nIter"],
+            "tSolve": time.perf_counter() - tstart}
+
+
+class SeasonRunner:
+
+    def __init__(self, setupFileName, trackFileNames, nWorkers=None,
+                 poolType="process", envCache=None):
+        # inputs
+        self.setupFileName = setupFileName
+        self.trackFileNames = trackFileNames  # list or glob pattern
+        self.nWorkers = nWorkers  # None: all cores, 1: no pool
+        self.poolType = poolType  # "process" or "thread"
+        self.envCache = envCache or EnvelopeCache()
+        self.trackFilesPath = "trackFiles/"
+        self.setupFilesPath = "setupFiles/"
+        # outputs
+        self.resultsDict = None
+
+    def trackFiles(self):
+        """ returns the track file paths of the list or glob pattern """
+        if isinstance(self.trackFileNames, str):
+            trackFiles = sorted(glob.glob(self.trackFilesPath
+                                          + self.trackFileNames))
+            if not trackFiles:
+                raise FileNotFoundError("No track files: "
+                                        + self.trackFileNames)
+            return trackFiles
+        return [self.trackFilesPath + name for name in self.trackFileNames]
+
+    def run(self):
+        tstart = time.perf_counter()
+        trackFiles = self.trackFiles()
+
+        # Envelope and GGV split, once for all the tracks
+        s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+        s.loadJSON()
+        accEnvDict = self.envCache.getEnvelope(s.setupDict)
+        LapTimeSimCalc.getSplitGGV(accEnvDict)
+
+        # Lap time simulations, one task per track
+        nWorkers = min(self.nWorkers or os.cpu_count() or 1, len(trackFiles))
+        if nWorkers == 1:
+            initWorker(accEnvDict)
+            results = [runWorker(trackFile) for trackFile in trackFiles]
+        elif self.poolType == "thread":
+            initWorker(accEnvDict)
+            with cf.ThreadPoolExecutor(max_workers=nWorkers) as pool:
+                results = list(pool.map(runWorker, trackFiles))
+        else:
+            with cf.ProcessPoolExecutor(max_workers=nWorkers,
+                                        initializer=initWorker,
+                                        initargs=(accEnvDict,)) as pool:
+                results = list(pool.map(runWorker, trackFiles))
+
+        # columnar results table
+        resultsDict = {"track": np.array([os.path.basename(trackFile)
+                                          for trackFile in trackFiles])}
+        for name in ("laptime", "vcarmax", "nIter", "tSolve"):
+            resultsDict[name] = np.array([r[name] for r in results])
+        resultsDict["totalLaptime"] = round(float(np.sum(
+            resultsDict["laptime"])), 3)
+        resultsDict["tWall"] = time.perf_counter() - tstart
+        self.resultsDict = resultsDict
+        return resultsDict
+
+    def printResults(self):
+        for i, track in enumerate(self.resultsDict["track"]):
+            print(track, ": %.3f s" % self.resultsDict["laptime"][i],
+                  "(vcarmax %.1f kph)" % (self.resultsDict["vcarmax"][i]*3.6))
+        print("Total: %.3f s" % self.resultsDict["totalLaptime"])
+        print("Wall time: %.2f s" % self.resultsDict["tWall"])
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="OpenLapSim season runner")
+    parser.add_argument("setupFileName", help="setup in setupFiles/")
+    parser.add_argument("trackFileNames", nargs="+",
+                        help="tracks in trackFiles/ or one glob pattern")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", action="store_true",
+                        help="thread pool instead of process pool")
+    args = parser.parse_args()
+
+    trackFileNames = args.trackFileNames
+    if len(trackFileNames) == 1 and glob.has_magic(trackFileNames[0]):
+        trackFileNames = trackFileNames[0]
+
+    # object instantiation
+    seasonRunner = SeasonRunner(args.setupFileName, trackFileNames,
+                                args.workers,
+                                "thread" if args.threads else "process")
+    seasonRunner.run()
+    seasonRunner.printResults()
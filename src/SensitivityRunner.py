@@ -0,0 +1,161 @@
+"""
+---------------------------
+Sensitivity Runner - OLS
+---------------------------
+
+This class computes the lap time sensitivity of a setup: every parameter
+is perturbed up and down (central finite differences, step relStep of
+the value, or of MIN_SCALE for the values close to 0) and all the
+perturbed laps run concurrently with SweepRunner (process pool, track
+loaded once per worker).
+
+The laptime is not a smooth function of every parameter: the GGV and the
+top speed are rounded, the gear choice and the rev limit are discrete, so
+a difference can cross a step of the laptime and grow like 1/step
+instead of estimating a derivative (e.g. the gear ratios). Every
+derivative is therefore computed again with half the step, and the
+parameters whose two estimates differ by more than consistencyTol
+(relative) are flagged and left out of the exchange rates.
+
+Parameters: the setup scalars (mcar, clt, cx, afrcar, mbrk, gripx, gripy,
+loadEff, rho) and every entry of rGearRat ("rGearRat[i]").
+
+The results (sensitivityDict):
+    - "params":     parameter names
+    - "value":      baseline values
+    - "step":       finite difference steps
+    - "laptime":    baseline laptime [s]
+    - "dTdp":       d(laptime)/d(param) [s/unit]
+    - "dTdpHalf":   same, with half the step
+    - "bConsistent": dTdp and dTdpHalf agree within consistencyTol
+    - "dTpct":      laptime change [s] for +1% of the parameter
+    - "exchangeRate": matrix, exchangeRate[i, j] = dTdp[i]/dTdp[j] is the
+                    change of param j worth +1 unit of param i (nan if
+                    param j has no laptime effect, or i or j is not
+                    consistent)
+
+Command line example (from /src):
+    python3 SensitivityRunner.py SetupFile.json TrackFile.txt --workers 4
+
+"""
+# Import Packages
+import argparse
+import numpy as np
+
+# import packages (OLP)
+from SetupFileLoader import SetupFileLoader
+from SweepRunner import SweepRunner
+
+SCALAR_PARAMS = ("mcar", "clt", "cx", "afrcar", "mbrk", "gripx", "gripy",
+                 "loadEff", "rho")
+# min scale of the step (step = relStep*max(|value|, scale)), default 1
+MIN_SCALE = {"loadEff": 0.1}
+
+
+class SensitivityRunner:
+
+    def __init__(self, setupFileName, trackFileName, params=None,
+                 relStep=0.01, nWorkers=None, consistencyTol=0.1):
+        # inputs
+        self.setupFileName = setupFileName
+        self.trackFileName = trackFileName
+        self.params = params  # None: scalars and every rGearRat entry
+        self.relStep = relStep
+        self.nWorkers = nWorkers
+        self.consistencyTol = consistencyTol  # step vs half step
+        self.setupFilesPath = "setupFiles/"
+        # outputs
+        self.sensitivityDict = None
+
+    @staticmethod
+    def defaultParams(setupDict):
+        """ setup scalars and one "rGearRat[i]" per gear """
+        return (list(SCALAR_PARAMS)
+                + ["rGearRat[" + str(i) + "]"
+                   for i in range(len(setupDict["rGearRat"]))])
+
+    @staticmethod
+    def paramValue(setupDict, name):
+        if name.endswith("]"):
+            key, index = name[:-1].split("[")
+            return float(setupDict[key][int(index)])
+        return float(setupDict[name])
+
+    def run(self):
+        s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+        s.loadJSON()
+        params = self.params or SensitivityRunner.defaultParams(s.setupDict)
+        value = np.array([SensitivityRunner.paramValue(s.setupDict, name)
+                          for name in params])
+        minScale = np.array([MIN_SCALE.get(name.split("[")[0], 1.0)
+                             for name in params])
+        step = self.relStep*np.maximum(np.absolute(value), minScale)
+
+        # baseline, then (down, up, down/2, up/2) per parameter, all run
+        # concurrently
+        doeTable = [{}]
+        for name, v, h in zip(params, value, step):
+            doeTable += [{name: v - h}, {name: v + h},
+                         {name: v - 0.5*h}, {name: v + 0.5*h}]
+        sweepRunner = SweepRunner(self.setupFileName, self.trackFileName,
+                                  doeTable=doeTable, nWorkers=self.nWorkers)
+        sweepRunner.setupFilesPath = self.setupFilesPath
+        resultsDict = sweepRunner.run()
+
+        laptime = resultsDict["laptimeRaw"]
+        dTdp = (laptime[2::4] - laptime[1::4])/(2*step)
+        dTdpHalf = (laptime[4::4] - laptime[3::4])/step
+        bConsistent = (np.absolute(dTdp - dTdpHalf)
+                       <= self.consistencyTol*np.maximum(
+                           np.absolute(dTdp), np.absolute(dTdpHalf)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exchangeRate = dTdp[:, np.newaxis]/dTdp[np.newaxis, :]
+        exchangeRate[:, dTdp == 0] = np.nan  # no laptime effect
+        exchangeRate[~bConsistent, :] = np.nan
+        exchangeRate[:, ~bConsistent] = np.nan
+        self.sensitivityDict = {
+            "params": params,
+            "value": value,
+            "step": step,
+            "laptime": laptime[0],
+            "dTdp": dTdp,
+            "dTdpHalf": dTdpHalf,
+            "bConsistent": bConsistent,
+            "dTpct": dTdp*0.01*value,
+            "exchangeRate": exchangeRate,
+        }
+        return self.sensitivityDict
+
+    def printReport(self):
+        sD = self.sensitivityDict
+        print("Laptime: %.3f s" % sD["laptime"])
+        print("Sensitivity (sorted by the effect of +1%):")
+        for i in np.argsort(-np.absolute(sD["dTpct"])):
+            print("  ", sD["params"][i], "= %g" % sD["value"][i],
+                  ": dT/dp %+.6g s/unit," % sD["dTdp"][i],
+                  "+1%%: %+.4f s" % sD["dTpct"][i],
+                  "" if sD["bConsistent"][i] else
+                  "(NOT CONSISTENT, half step: %+.6g)" % sD["dTdpHalf"][i])
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="OpenLapSim laptime "
+                                     "sensitivity")
+    parser.add_argument("setupFileName", help="setup in setupFiles/")
+    parser.add_argument("trackFileName", help="track in trackFiles/")
+    parser.add_argument("--step", type=float, default=0.01,
+                        help="relative finite difference step")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # object instantiation
+    sensitivityRunner = SensitivityRunner(args.setupFileName,
+                                          args.trackFileName,
+                                          relStep=args.step,
+                                          nWorkers=args.workers)
+    sensitivityRunner.run()
+    sensitivityRunner.printReport()
@@ -0,0 +1,240 @@
+"""
+---------------------------
+Setup Batch - OLS
+---------------------------
+
+This class loads many setups at once from one table into a validated,
+column-oriented batch (one array per setup parameter, one row per setup):
+    - ".csv":     one column per parameter, one row per setup.
+    - ".parquet": same table (needs pyarrow).
+    - ".jsonl":   one JSON setup per line (as SetupFile.json, on one line).
+
+Columns:
+    - scalars, e.g. "mcar", "clt"; array entries as "rGearRat[6]", or (in
+      JSON lines) the whole array "rGearRat": [...].
+    - an optional unit in the column name, e.g. "mcar (kg)", "rtyre (mm)",
+      converted to the SetupFile.json units (see SCHEMA).
+    - the parameters not in the table are taken from the base setupDict
+      (e.g. the loaded SetupFile.json), so a DOE table only needs the
+      varied columns.
+
+The whole batch is checked once when loaded: known parameters, units,
+finite values within the limits, array lengths (EngNm/EngRpm), no value
+missing in a row. Unknown columns raise KeyError, the other errors
+ValueError.
+
+setupDict(i) (or iterating the batch) gives the setupDict of a row for
+AccEnvCalc, SweepRunner and BatchLapSolver, without any file access.
+
+"""
+# Import Packages
+import csv
+import json
+import re
+import numpy as np
+
+# {name: (unit, min, max, bArray)} in the SetupFile.json units
+SCHEMA = {
+    "mcar": ("kg", 0, np.inf, False),
+    "clt": ("-", 0, np.inf, False),
+    "cx": ("-", 0, np.inf, False),
+    "afrcar": ("m2", 0, np.inf, False),
+    "mbrk": ("Nm", 0, np.inf, False),
+    "gripx": ("-", 0, np.inf, False),
+    "gripy": ("-", 0, np.inf, False),
+    "loadEff": ("-", -np.inf, np.inf, False),
+    "rtyre": ("m", 0, np.inf, False),
+    "rGearRat": ("-", 0, np.inf, True),
+    "reff": ("-", 0, 1, False),
+    "EngNm": ("Nm", 0, np.inf, True),
+    "EngRpm": ("rpm", 0, np.inf, True),
+    "rho": ("kg/m3", 0, np.inf, False),
+    "nSteps": ("-", 1, np.inf, False),
+    "nAx": ("-", 1, np.inf, False),
+}
+INT_PARAMS = ("nSteps", "nAx")  # envelope resolution
+TEXT_PARAMS = ("setupName", "envMode")
+# {unit: (SetupFile.json unit, factor)}
+UNITS = {
+    "kg": ("kg", 1.0), "g": ("kg", 0.001), "t": ("kg", 1000.0),
+    "m": ("m", 1.0), "cm": ("m", 0.01), "mm": ("m", 0.001),
+    "m2": ("m2", 1.0), "cm2": ("m2", 0.0001),
+    "Nm": ("Nm", 1.0), "kNm": ("Nm", 1000.0),
+    "rpm": ("rpm", 1.0),
+    "kg/m3": ("kg/m3", 1.0), "g/cm3": ("kg/m3", 1000.0),
+    "-": ("-", 1.0), "%": ("-", 0.01),
+}
+
+
+class SetupBatch:
+
+    def __init__(self, setupFileName, baseSetupDict=None):
+        # inputs
+        self.setupFileName = setupFileName  # .csv, .parquet or .jsonl
+        self.baseSetupDict = baseSetupDict or {}  # missing parameters
+        # outputs
+        self.columns = {}  # {name: (N,) or (N, len) array, texts: list}
+        self.params = []  # columns of the table ("rGearRat[6]", ...)
+        self.nSetups = 0
+
+    @staticmethod
+    def parseColumn(column):
+        """ "name (unit)" or "name[i] (unit)" -> (name, index, factor) """
+        match = re.fullmatch(r"\s*(\w+)(?:\[(\d+)\])?\s*(?:\((.+)\))?\s*",
+                             column)
+        if match is None:
+            raise KeyError("Unknown setup parameter: " + column)
+        name, index, unit = match.groups()
+        if name in TEXT_PARAMS:
+            return name, None, None
+        if name not in SCHEMA:
+            raise KeyError("Unknown setup parameter: " + column)
+        factor = 1.0
+        if unit is not None:
+            unit = unit.strip()
+            if unit not in UNITS or UNITS[unit][0] != SCHEMA[name][0]:
+                raise ValueError("Unit " + unit + " not valid for " + name
+                                 + " [" + SCHEMA[name][0] + "]")
+            factor = UNITS[unit][1]
+        if index is not None and not SCHEMA[name][3]:
+            raise KeyError("Not an array parameter: " + column)
+        return name, (int(index) if index is not None else None), factor
+
+    @staticmethod
+    def readTable(setupFileName):
+        """ reads the table as ({column: values}, nRows) """
+        if setupFileName.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = pq.read_table(setupFileName)
+            return ({name: table.column(name).to_pylist()
+                     for name in table.column_names}, table.num_rows)
+        if setupFileName.endswith(".jsonl"):
+            with open(setupFileName) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(setupFileName, newline="") as csvFile:
+                rows = list(csv.DictReader(csvFile))
+        names = []
+        for row in rows:
+            names += [name for name in row if name not in names]
+        return ({name: [row.get(name) for row in rows] for name in names},
+                len(rows))
+
+    def load(self):
+        table, nSetups = SetupBatch.readTable(self.setupFileName)
+        self.nSetups = nSetups
+        self.params = []
+        self.columns = {}
+        columns = {}
+        entries = {}  # {name: {index: values}}
+        for column, values in table.items():
+            name, index, factor = SetupBatch.parseColumn(column)
+            if None in values:  # key missing in some rows
+                raise ValueError("Missing " + column + " in setup "
+                                 + str(values.index(None)))
+            if name in TEXT_PARAMS:
+                columns[name] = [str(v) for v in values]
+            elif index is not None:
+                entries.setdefault(name, {})[index] = factor*np.array(
+                    values, dtype=float)
+            elif SCHEMA[name][3]:  # whole arrays (JSON lines)
+                try:
+                    columns[name] = factor*np.array(values, dtype=float)
+                except ValueError:
+                    raise ValueError("Different array lengths in " + name)
+            else:
+                columns[name] = factor*np.array(values, dtype=float)
+            self.params.append(column)
+
+        # array entries on top of the whole arrays (or of the base setup)
+        for name, values in entries.items():
+            if name in columns:
+                array = columns[name]
+            elif name in self.baseSetupDict:
+                array = np.tile(np.array(self.baseSetupDict[name],
+                                         dtype=float), (nSetups, 1))
+            else:
+                array = np.full((nSetups, max(values)+1), np.nan)
+            if max(values) >= array.shape[1]:
+                raise ValueError("Index out of range in " + name)
+            for index, value in values.items():
+                array[:, index] = value
+            columns[name] = array
+
+        # missing parameters from the base setup
+        for name in list(SCHEMA) + list(TEXT_PARAMS):
+            if name in columns or name not in self.baseSetupDict:
+                continue
+            value = self.baseSetupDict[name]
+            if name in TEXT_PARAMS:
+                columns[name] = [value]*nSetups
+            else:
+                columns[name] = np.tile(np.array(value, dtype=float),
+                                        (nSetups,) + (1,)*np.ndim(value))
+        self.columns = columns
+        self.validate()
+        return self.columns
+
+    def validate(self):
+        """ checks the whole batch: parameters, values and lengths """
+        columns = self.columns
+        missing = [name for name in SCHEMA
+                   if name not in columns and name not in INT_PARAMS]
+        if missing:
+            raise KeyError("Missing setup parameters: " + ", ".join(missing))
+        for name, values in columns.items():
+            if name in TEXT_PARAMS:
+                continue
+            unit, vmin, vmax, bArray = SCHEMA[name]
+            if values.ndim != (2 if bArray else 1):
+                raise ValueError("Wrong shape of " + name)
+            bBad = ~np.isfinite(values) | (values < vmin) | (values > vmax)
+            if bBad.any():
+                row = np.argwhere(bBad)[0][0]
+                raise ValueError("Invalid " + name + " [" + unit + "] in "
+                                 "setup " + str(row))
+            if name in INT_PARAMS and (values != np.round(values)).any():
+                raise ValueError(name + " must be an integer")
+        if columns["EngNm"].shape[1] != columns["EngRpm"].shape[1]:
+            raise ValueError("EngNm and EngRpm have different lengths")
+        if (np.diff(columns["EngRpm"], axis=1) <= 0).any():
+            raise ValueError("EngRpm must be increasing")
+
+    def setupDict(self, i):
+        """ setupDict of the setup i (row of the batch) """
+        setupDict = {}
+        for name, values in self.columns.items():
+            if name in TEXT_PARAMS:
+                setupDict[name] = values[i]
+            elif name in INT_PARAMS:
+                setupDict[name] = int(values[i])
+            elif SCHEMA[name][3]:
+                setupDict[name] = values[i].tolist()
+            else:
+                setupDict[name] = float(values[i])
+        return setupDict
+
+    def variants(self):
+        """ the values of the table columns per setup (as the SweepRunner
+            variants, "rGearRat[6]" for the array entries) """
+        variants = [{} for _ in range(self.nSetups)]
+        for column in self.params:
+            name, index, _ = SetupBatch.parseColumn(column)
+            if name in TEXT_PARAMS:
+                continue
+            if index is not None:
+                key = name + "[" + str(index) + "]"
+                values = self.columns[name][:, index]
+            elif SCHEMA[name][3]:
+                continue  # whole arrays are not table columns
+            else:
+                key, values = name, self.columns[name]
+            for variant, value in zip(variants, values):
+                variant[key] = float(value)
+        return variants
+
+    def __len__(self):
+        return self.nSetups
+
+    def __iter__(self):
+        return (self.setupDict(i) for i in range(self.nSetups))
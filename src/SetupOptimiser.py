@@ -0,0 +1,253 @@
+"""
+---------------------------
+Setup Optimiser - OLS
+---------------------------
+
+This class optimises setup parameters (e.g. "clt", "cx", "rGearRat[5]")
+for the minimum lap time, or the minimum weighted sum of the lap times of
+several tracks, with scipy.optimize:
+    - "differential_evolution" (default): global, population based, the
+      population is evaluated on nWorkers processes.
+    - any scipy.optimize.minimize method (e.g. "Powell", "L-BFGS-B",
+      "Nelder-Mead"), started from the setup file values. The start and
+      every evaluated point are clipped to the bounds, as some methods
+      ignore them (e.g. "Nelder-Mead" on scipy 1.5).
+
+Constraints:
+    - bounds: {name: (min, max)} of every optimised parameter.
+    - gear ratios decreasing (bMonotonicGears=1): a setup where an
+      optimised rGearRat entry is not between its neighbours gets a
+      penalty instead of a lap time.
+
+Every process keeps an EnvelopeCache and an LRU cache of the evaluations
+(keyed on the parameters, the setup, the tracks, the weights and the gear
+constraint), and warm starts each flying lap from the end speed of the
+previous lap on the same track. These caches belong to one optimiser run:
+a new run (runId) clears them. The optimisation stops at maxTime [s]
+(checked after every iteration) and reports the evaluation rate.
+
+Command line example (from /src):
+    python3 SetupOptimiser.py SetupFile.json TrackFile.txt
+        --param clt=2.8:3.6 --param rGearRat[6]=3.6:4.4 --workers 4
+        --maxtime 600
+
+"""
+# Import Packages
+import argparse
+import collections
+import hashlib
+import time
+import uuid
+import numpy as np
+
+# import packages (OLP)
+from EnvelopeCache import EnvelopeCache
+from LapTimeSimCalc import LapTimeSimCalc
+from SensitivityRunner import SensitivityRunner
+from SetupFileLoader import SetupFileLoader
+from SweepRunner import SweepRunner
+
+PENALTY = 1e4  # [s] objective of the setups out of the constraints
+EVAL_CACHE_SIZE = 10000  # evaluations cached per process
+
+# per process caches of one optimiser run (see evaluateSetup)
+_runCache = {
+    "runId": None,
+    "envCache": EnvelopeCache(),
+    "evalCache": collections.OrderedDict(),  # {key: objective}, LRU
+    "warmStart": {},  # {track id: vxaccEnd of the last lap}
+}
+
+
+def gearViolation(setupDict, names):
+    """ how much the optimised gear ratios break the decreasing order """
+    rGearRat = setupDict["rGearRat"]
+    indexes = set()
+    for name in names:
+        if name.startswith("rGearRat["):
+            index = int(name[len("rGearRat["):-1])
+            indexes.update((index-1, index))
+    violation = 0.0
+    for i in sorted(indexes):
+        if 0 <= i < len(rGearRat)-1:
+            violation += max(0.0, rGearRat[i+1] - rGearRat[i])
+    return violation
+
+
+def trackId(track):
+    """ hash of the track points """
+    return hashlib.sha1(np.ascontiguousarray(track).tobytes()).hexdigest()
+
+
+def evaluateSetup(x, names, setupDict, tracks, weights, bMonotonicGears,
+                  runId=None):
+    """ objective: weighted sum of the (unrounded) lap times of the setup
+        with the parameters x, cached per process and per run """
+    if runId != _runCache["runId"]:  # new optimiser run: clear the caches
+        _runCache.update(runId=runId, envCache=EnvelopeCache(),
+                         evalCache=collections.OrderedDict(), warmStart={})
+    evalCache = _runCache["evalCache"]
+    trackIds = [trackId(track) for track in tracks]
+    key = (tuple(names), EnvelopeCache.setupHash(setupDict), tuple(trackIds),
+           tuple(weights), bool(bMonotonicGears), tuple(np.round(x, 12)))
+    if key in evalCache:
+        evalCache.move_to_end(key)
+        return evalCache[key]
+    newSetupDict = SweepRunner.applyParams(setupDict, dict(zip(names, x)))
+    violation = gearViolation(newSetupDict, names) if bMonotonicGears else 0
+    if violation > 0:
+        objective = PENALTY*(1 + violation)
+    else:
+        accEnvDict = _runCache["envCache"].getEnvelope(newSetupDict)
+        warmStart = _runCache["warmStart"]
+        objective = 0.0
+        for track, iD, weight in zip(tracks, trackIds, weights):
+            lS = LapTimeSimCalc(track, accEnvDict, warmStart.get(iD, 10),
+                                bVerbose=0)
+            lS.RunFlyingLap()
+            warmStart[iD] = lS.lapTimeSimDict["vxaccEnd"]
+            objective += weight*lS.lapTimeSimDict["time"][-1]
+    evalCache[key] = objective
+    if len(evalCache) > EVAL_CACHE_SIZE:
+        evalCache.popitem(last=False)
+    return objective
+
+
+class SetupOptimiser:
+
+    def __init__(self, setupFileName, trackFileNames, bounds, weights=None,
+                 method="differential_evolution", nWorkers=1, maxTime=None,
+                 maxIter=50, popSize=10, seed=None, bMonotonicGears=1):
+        # inputs
+        self.setupFileName = setupFileName
+        self.trackFileNames = trackFileNames  # list of tracks
+        self.bounds = bounds  # {name: (min, max)}
+        self.weights = weights  # None: sum of the lap times
+        self.method = method
+        self.nWorkers = nWorkers  # processes (differential_evolution)
+        self.maxTime = maxTime  # [s] time budget, None: no limit
+        self.maxIter = maxIter
+        self.popSize = popSize
+        self.seed = seed
+        self.bMonotonicGears = bMonotonicGears
+        self.trackFilesPath = "trackFiles/"
+        self.setupFilesPath = "setupFiles/"
+        # outputs
+        self.optimDict = None
+
+    def run(self):
+        import scipy.optimize as opt  # imported on demand
+        s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+        s.loadJSON()
+        names = list(self.bounds.keys())
+        bounds = [self.bounds[name] for name in names]
+        tracks = [np.column_stack(LapTimeSimCalc.loadTrack(
+            self.trackFilesPath + trackFileName))
+            for trackFileName in self.trackFileNames]
+        weights = self.weights or [1.0]*len(tracks)
+        args = (names, s.setupDict, tracks, weights, self.bMonotonicGears,
+                uuid.uuid4().hex)  # runId: caches of this run only
+
+        # time budget, checked after every iteration (legacy callback
+        # signature of scipy 1.5: returning True stops differential
+        # evolution, minimize only stops on StopIteration)
+        tstart = time.perf_counter()
+        budget = {"bStopped": False, "x": None}
+
+        def callback(xk, convergence=None):
+            budget["x"] = np.copy(xk)
+            if (self.maxTime is not None
+                    and time.perf_counter() - tstart > self.maxTime):
+                budget["bStopped"] = True
+                if convergence is None:  # minimize
+                    raise StopIteration
+                return True
+            return False
+
+        if self.method == "differential_evolution":
+            result = opt.differential_evolution(
+                evaluateSetup, bounds, args=args, maxiter=self.maxIter,
+                popsize=self.popSize, seed=self.seed, polish=False,
+                callback=callback, workers=self.nWorkers,
+                updating="deferred" if self.nWorkers != 1 else "immediate")
+        else:
+            lower, upper = np.array(bounds, dtype=float).T
+            x0 = np.clip([SensitivityRunner.paramValue(s.setupDict, name)
+                          for name in names], lower, upper)
+            nfev = [0]
+
+            def objective(x, *args):
+                nfev[0] += 1
+                return evaluateSetup(np.clip(x, lower, upper), *args)
+            try:
+                result = opt.minimize(objective, x0, args=args,
+                                      method=self.method, bounds=bounds,
+                                      callback=callback,
+                                      options={"maxiter": self.maxIter})
+            except StopIteration:  # scipy < 1.11: not caught by minimize
+                result = opt.OptimizeResult(
+                    x=budget["x"], fun=objective(budget["x"], *args),
+                    nfev=nfev[0], message="Stopped by the time budget")
+            result.x = np.clip(result.x, lower, upper)
+        tWall = time.perf_counter() - tstart
+
+        self.optimDict = {
+            "params": names,
+            "x": result.x,
+            "objective": result.fun,
+            "setupDict": SweepRunner.applyParams(s.setupDict,
+                                                 dict(zip(names, result.x))),
+            "nfev": result.nfev,
+            "tWall": tWall,
+            "evalRate": result.nfev/tWall,  # [evaluations/s]
+            "bStopped": budget["bStopped"],  # time budget reached
+            "message": result.message,
+        }
+        return self.optimDict
+
+    def printReport(self):
+        oD = self.optimDict
+        for name, x in zip(oD["params"], oD["x"]):
+            print("  ", name, "= %.4f" % x)
+        print("Objective: %.3f s" % oD["objective"])
+        print("Evaluations:", oD["nfev"], "in %.1f s" % oD["tWall"],
+              "(%.1f evaluations/s)" % oD["evalRate"])
+        if oD["bStopped"]:
+            print("Stopped by the time budget")
+
+
+def parseBounds(paramString):
+    """ parses "name=min:max" """
+    name, values = paramString.split("=")
+    low, high = values.split(":")
+    return name, (float(low), float(high))
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="OpenLapSim setup "
+                                     "optimiser")
+    parser.add_argument("setupFileName", help="setup in setupFiles/")
+    parser.add_argument("trackFileNames", nargs="+",
+                        help="tracks in trackFiles/")
+    parser.add_argument("--param", action="append", default=[],
+                        help="name=min:max")
+    parser.add_argument("--method", default="differential_evolution")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--maxtime", type=float, default=None,
+                        help="time budget [s]")
+    parser.add_argument("--maxiter", type=int, default=50)
+    args = parser.parse_args()
+
+    # object instantiation
+    setupOptimiser = SetupOptimiser(args.setupFileName, args.trackFileNames,
+                                    dict(parseBounds(p) for p in args.param),
+                                    method=args.method,
+                                    nWorkers=args.workers,
+                                    maxTime=args.maxtime,
+                                    maxIter=args.maxiter)
+    setupOptimiser.run()
+    setupOptimiser.printReport()
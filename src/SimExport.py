@@ -0,0 +1,151 @@
+"""
+---------------------------
+Simulation Export - OLS
+---------------------------
+
+This class exports all the channels of a simulation in one bulk write.
+
+Formats (chosen by the file extension):
+    - ".npz":     NumPy archive (default), one array per channel.
+    - ".h5":      HDF5, one dataset per channel (needs h5py).
+    - ".parquet": Parquet table of the lap channels (needs pyarrow), the
+                  envelope channels are saved in the file metadata.
+    - ".txt":     legacy text export, one "dist<TAB>vcar" line per point.
+
+Channels:
+    - lap:      "dist", "vcar", "time", "vxacc", "vxdec", "vxcor"
+    - envelope: "env_vxvect", "env_ay", "env_axacc", "env_axdec", ...
+                (one point per envelope speed), "env_GGVfull"
+
+Every export has a unique run id (in the file name) and a metadata dict:
+runId, timestamp, setupName, setupHash (see EnvelopeCache), trackFile,
+laptime, vcarmax and the stage timings.
+
+"""
+# Import Packages
+import datetime
+import json
+import os
+import uuid
+import numpy as np
+
+# import packages (OLP)
+from EnvelopeCache import EnvelopeCache
+
+LAP_CHANNELS = ("dist", "vcar", "time", "vxacc", "vxdec", "vxcor")
+ENV_CHANNELS = ("vxvect", "ay", "axacc", "axdec", "nGear", "EngNm",
+                "EngRpm", "Fzaero", "Fxaero", "Fxgrip", "Fxdrive", "GGVfull")
+FORMATS = (".npz", ".h5", ".parquet", ".txt")
+
+
+class SimExport:
+
+    def __init__(self, exportFilesPath="exportFiles/", exportFormat=".npz"):
+        # inputs
+        self.exportFilesPath = exportFilesPath
+        self.exportFormat = exportFormat
+        if exportFormat not in FORMATS:
+            raise ValueError("Unknown export format: " + str(exportFormat))
+        # outputs
+        self.runId = None
+        self.exportFileName = None
+
+    @staticmethod
+    def newRunId():
+        """ unique run id: date, time and a random suffix """
+        timestrf = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        return timestrf + "-" + uuid.uuid4().hex[:8]
+
+    @staticmethod
+    def channels(accEnvDict, lapTimeSimDict):
+        """ returns the export channels {name: array} """
+        channels = {name: np.asarray(lapTimeSimDict[name])
+                    for name in LAP_CHANNELS}
+        for name in ENV_CHANNELS:
+            if accEnvDict.get(name) is not None:
+                channels["env_" + name] = np.asarray(accEnvDict[name])
+        return channels
+
+    def export(self, accEnvDict, lapTimeSimDict, setupDict=None,
+               trackFile=None, timings=None):
+        """ writes the channels and the metadata, returns the file name """
+        self.runId = SimExport.newRunId()
+        metadata = {
+            "runId": self.runId,
+            "timestamp": datetime.datetime.now().isoformat(),
+            "setupName": (setupDict or {}).get("setupName"),
+            "setupHash": (EnvelopeCache.setupHash(setupDict)
+                          if setupDict is not None else None),
+            "trackFile": trackFile,
+            "laptime": float(lapTimeSimDict["laptime"]),
+            "vcarmax": float(lapTimeSimDict["vcarmax"]),
+            "timings": timings or {},
+        }
+        os.makedirs(self.exportFilesPath, exist_ok=True)
+        self.exportFileName = (self.exportFilesPath + "SimExport_"
+                               + self.runId + self.exportFormat)
+        SimExport.writeExportFile(self.exportFileName,
+                                  SimExport.channels(accEnvDict,
+                                                     lapTimeSimDict),
+                                  metadata)
+        return self.exportFileName
+
+    @staticmethod
+    def writeExportFile(exportFileName, channels, metadata):
+        """ writes the channels in one bulk call, format by extension """
+        metaString = json.dumps(metadata)
+        if exportFileName.endswith(".npz"):
+            np.savez(exportFileName, metadata=np.array(metaString),
+                     **channels)
+        elif exportFileName.endswith(".h5"):
+            import h5py
+            with h5py.File(exportFileName, "w") as f:
+                for name, channel in channels.items():
+                    f.create_dataset(name, data=channel)
+                f.attrs["metadata"] = metaString
+        elif exportFileName.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            envelope = {name: channel.tolist()
+                        for name, channel in channels.items()
+                        if name not in LAP_CHANNELS}
+            table = pa.table({name: channels[name] for name in LAP_CHANNELS})
+            table = table.replace_schema_metadata(
+                {"metadata": metaString, "envelope": json.dumps(envelope)})
+            pq.write_table(table, exportFileName)
+        else:
+            lines = [str(float(d)) + "\t" + str(float(v)) + "\n"
+                     for d, v in zip(channels["dist"], channels["vcar"])]
+            with open(exportFileName, "w") as newFile:
+                newFile.write("".join(lines))
+        return exportFileName
+
+    @staticmethod
+    def readExportFile(exportFileName):
+        """ reads an export file, returns (channels, metadata). The legacy
+            text export only has "dist" and "vcar" and no metadata. """
+        if exportFileName.endswith(".npz"):
+            with np.load(exportFileName) as data:
+                channels = {name: data[name] for name in data.files
+                            if name != "metadata"}
+                metadata = json.loads(str(data["metadata"]))
+        elif exportFileName.endswith(".h5"):
+            import h5py
+            with h5py.File(exportFileName, "r") as f:
+                channels = {name: f[name][()] for name in f.keys()}
+                metadata = json.loads(f.attrs["metadata"])
+        elif exportFileName.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = pq.read_table(exportFileName)
+            channels = {name: table.column(name).to_numpy()
+                        for name in table.column_names}
+            schemaMetadata = table.schema.metadata
+            channels.update({name: np.array(channel) for name, channel
+                             in json.loads(schemaMetadata[b"envelope"])
+                             .items()})
+            metadata = json.loads(schemaMetadata[b"metadata"])
+        else:
+            track = np.loadtxt(exportFileName)
+            channels = {"dist": track[:, 0], "vcar": track[:, 1]}
+            metadata = {}
+        return channels, metadata
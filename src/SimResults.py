@@ -0,0 +1,137 @@
+"""
+---------------------------
+Simulation Results - OLS
+---------------------------
+
+Compact result types for the runs kept in memory in large numbers (sweeps,
+seasons, optimisations):
+    - AccEnvResult: the envelope channels (vxvect, axacc, ... Fxdrive) as
+      one contiguous (nChannels, nSteps) array, plus GGVfull.
+    - LapResult: the lap traces (vcar, dist, time, vxacc, vxdec, vxcor) as
+      one contiguous (nChannels, nPoints) array, plus the scalars. The GGV
+      is not stored (PostProc splits it again from the envelope).
+
+Both use __slots__ (no per object __dict__), store the arrays as float64
+or float32 (dtype) and can drop the per point traces and keep only the
+scalars (bTraces=0). Channels are read as in the dicts, e.g.
+lapResult["vcar"], so PostProc takes them in place of accEnvDict and
+lapTimeSimDict.
+
+nbytes() and dictBytes() measure the memory footprint of a run.
+
+"""
+# Import Packages
+import sys
+import numpy as np
+
+ENV_CHANNELS = ("vxvect", "axacc", "axdec", "ay", "nGear", "EngNm",
+                "EngRpm", "Fzaero", "Fxaero", "Fxgrip", "Fxdrive")
+LAP_CHANNELS = ("vcar", "dist", "time", "vxacc", "vxdec", "vxcor")
+
+
+def arrayBytes(array):
+    """ memory footprint [bytes] of an array (getsizeof only counts the data
+        of the arrays owning it) """
+    return sys.getsizeof(array) + (array.nbytes if array.base is not None
+                                   else 0)
+
+
+def dictBytes(resultDict):
+    """ memory footprint [bytes] of a result dict: the dict, its values
+        (arrays, lists of numbers, scalars), each object counted once """
+    seen = set()
+
+    def size(obj):
+        if obj is None or id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            return arrayBytes(obj)
+        if isinstance(obj, (list, tuple)):
+            return sys.getsizeof(obj) + sum(size(item) for item in obj)
+        return sys.getsizeof(obj)
+
+    return sys.getsizeof(resultDict) + sum(size(value) for value in
+                                           resultDict.values())
+
+
+class AccEnvResult:
+
+    __slots__ = ("channels", "GGVfull")
+
+    def __init__(self, channels, GGVfull):
+        self.channels = channels  # (nChannels, nSteps), ENV_CHANNELS order
+        self.GGVfull = GGVfull  # ax, ay, vx
+
+    @classmethod
+    def fromDict(cls, accEnvDict, dtype=np.float64, bTraces=1):
+        """ from an AccEnvCalc accEnvDict; bTraces=0 keeps only GGVfull """
+        channels = None
+        if bTraces == 1:
+            channels = np.array([accEnvDict[name] for name in ENV_CHANNELS],
+                                dtype=dtype)
+        return cls(channels, np.ascontiguousarray(accEnvDict["GGVfull"],
+                                                  dtype=dtype))
+
+    def __getitem__(self, key):
+        if key == "GGVfull":
+            return self.GGVfull
+        if self.channels is None:
+            raise KeyError(key + " (traces not stored)")
+        return self.channels[ENV_CHANNELS.index(key)]
+
+    def nbytes(self):
+        """ memory footprint [bytes] """
+        return sys.getsizeof(self) + sum(
+            arrayBytes(array) for array in (self.channels, self.GGVfull)
+            if array is not None)
+
+
+class LapResult:
+
+    __slots__ = ("traces", "laptime", "vcarmax", "vxaccEnd", "nIter",
+                 "bConverged")
+
+    def __init__(self, traces, laptime, vcarmax, vxaccEnd, nIter,
+                 bConverged):
+        self.traces = traces  # (nChannels, nPoints), LAP_CHANNELS order
+        self.laptime = laptime
+        self.vcarmax = vcarmax
+        self.vxaccEnd = vxaccEnd
+        self.nIter = nIter
+        self.bConverged = bConverged
+
+    @classmethod
+    def fromDict(cls, lapTimeSimDict, dtype=np.float64, bTraces=1):
+        """ from a LapTimeSimCalc lapTimeSimDict; bTraces=0 keeps only the
+            scalars """
+        traces = None
+        if bTraces == 1:
+            traces = np.array([lapTimeSimDict[name] for name in LAP_CHANNELS],
+                              dtype=dtype)
+        return cls(traces, float(lapTimeSimDict["laptime"]),
+                   float(lapTimeSimDict["vcarmax"]),
+                   float(lapTimeSimDict["vxaccEnd"]),
+                   lapTimeSimDict["nIter"], lapTimeSimDict["bConverged"])
+
+    def __getitem__(self, key):
+        if key in LAP_CHANNELS:
+            if self.traces is None:
+                raise KeyError(key + " (traces not stored)")
+            return self.traces[LAP_CHANNELS.index(key)]
+        if key in LapResult.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def nbytes(self):
+        """ memory footprint [bytes] """
+        size = sys.getsizeof(self)
+        if self.traces is not None:
+            size += arrayBytes(self.traces)
+        return size
@@ -0,0 +1,51 @@
+"""
+---------------------------
+Stage Timer - OLS
+---------------------------
+
+This class records high resolution wall times (time.perf_counter) and
+call counts of the simulation stages.
+
+Usage:
+    timer = StageTimer()
+    with timer.stage("envelope"):
+        aE.Run()
+    timer.timingDict  # {"envelope": {"time": 0.0012, "calls": 1}}
+
+Stages used by OpenLapSim: "setupLoad", "envelope", "ggvSplit",
+"ggvSurface", "trackLoad", "vxcor", "accPass", "decPass", "lapKernel",
+"export", "plot".
+
+"""
+# Import Packages
+import contextlib
+import time
+
+
+class StageTimer:
+
+    def __init__(self):
+        # outputs
+        self.timingDict = {}  # {stage: {"time": [s], "calls": n}}
+
+    def add(self, name, dt):
+        timing = self.timingDict.setdefault(name, {"time": 0.0, "calls": 0})
+        timing["time"] += dt
+        timing["calls"] += 1
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tstart = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - tstart)
+
+    def total(self):
+        return sum(timing["time"] for timing in self.timingDict.values())
+
+    def printTimings(self):
+        print("Stage timings [s]:")
+        for name, timing in self.timingDict.items():
+            print("  ", name, ": %.6f" % timing["time"],
+                  "(" + str(timing["calls"]) + " calls)")
@@ -0,0 +1,324 @@
+"""
+---------------------------
+Sweep Runner - OLS
+---------------------------
+
+This class runs parameter studies: a base SetupFile.json is varied with
+parameter ranges (full factorial) or with a design of experiments table,
+and every variant (AccEnvCalc + LapTimeSimCalc) is run on a process pool.
+Each worker loads the track only once and keeps an EnvelopeCache, so
+variants which only differ in the track-related inputs share one envelope.
+With bBatch=1 the laps of all the variants are solved together on one core
+by BatchLapSolver (GGV lookup grids, see LapTimeSimCalc surfMethod="grid").
+
+Parameters are the setupDict keys (e.g. "clt", "cx", "mcar"); a single
+entry of an array is addressed with its index, e.g. "rGearRat[6]".
+The variants can also be a SetupBatch (csv/parquet/jsonl table of setups,
+validated once when loaded) in place of the ranges and the DOE table.
+
+The results are returned as one columnar table (dict of arrays):
+    - "run":      variant index
+    - one column per varied parameter
+    - "laptime":  [s]
+    - "laptimeRaw": [s] not rounded (finite differences, SensitivityRunner)
+    - "vcarmax":  [m/s]
+    - "nIter":    laps solved by the flying lap solver
+    - "tEnvelope", "tAccPass", ...: time [s] of every stage (StageTimer),
+                  "tBatchLap" is the batch solve time divided by the runs
+    - "dist", "vcar": (optional, bTraces=1) distance and speed traces,
+                  "vcar" has one row per variant.
+
+Command line example (from /src):
+    python3 SweepRunner.py SetupFile.json TrackFile.txt
+        --param clt=2.8:3.4:4 --param cx=0.9,1.0 --workers 4
+        --out sweep.csv
+    (add --batch to solve all the laps together)
+    python3 SweepRunner.py SetupFile.json TrackFile.txt
+        --setups Setups.csv
+
+"""
+# Import Packages
+import argparse
+import concurrent.futures as cf
+import copy
+import csv
+import itertools
+import os
+import re
+import numpy as np
+
+# import packages (OLP)
+from AccEnvCalc import AccEnvCalc
+from BatchLapSolver import BatchLapSolver
+from EnvelopeCache import EnvelopeCache
+from LapTimeSimCalc import LapTimeSimCalc
+from SetupBatch import SetupBatch
+from SetupFileLoader import SetupFileLoader
+from StageTimer import StageTimer
+
+# track loaded once per worker process (see initWorker)
+_workerTrack = None
+_workerBTraces = 0
+_workerEnvCache = None
+
+
+def initWorker(trackFile, bTraces):
+    """ process pool initializer: load the track once per worker """
+    global _workerTrack, _workerBTraces, _workerEnvCache
+    _workerTrack = np.column_stack(LapTimeSimCalc.loadTrack(trackFile))
+    _workerBTraces = bTraces
+    _workerEnvCache = EnvelopeCache()
+
+
+def runWorker(setupDict):
+    """ process pool task: simulate one setup on the worker track """
+    return SweepRunner.simulate(setupDict, _workerTrack, _workerBTraces,
+                                _workerEnvCache)
+
+
+class SweepRunner:
+
+    def __init__(self, setupFileName, trackFileName, paramRanges=None,
+                 doeTable=None, nWorkers=None, bTraces=0, bBatch=0,
+                 setupBatch=None):
+        # inputs
+        self.setupFileName = setupFileName
+        self.trackFileName = trackFileName
+        self.paramRanges = paramRanges  # {"clt": [2.8, 3.0], ...}
+        self.doeTable = doeTable  # [{"clt": 2.8, "cx": 1.0}, ...]
+        self.nWorkers = nWorkers  # None: all cores, 1: no process pool
+        self.bTraces = bTraces
+        self.bBatch = bBatch  # 1: BatchLapSolver for all the variants
+        self.setupBatch = setupBatch  # SetupBatch: one setup per variant
+        self.trackFilesPath = "trackFiles/"
+        self.setupFilesPath = "setupFiles/"
+        # outputs
+        self.resultsDict = None
+
+    @staticmethod
+    def fullFactorial(paramRanges):
+        """ returns the list of variants (dicts) of all the combinations
+            of the parameter ranges """
+        names = list(paramRanges.keys())
+        values = [np.atleast_1d(paramRanges[name]) for name in names]
+        return [dict(zip(names, combo))
+                for combo in itertools.product(*values)]
+
+    @staticmethod
+    def loadDOE(doeFileName):
+        """ loads a design of experiments table (csv with one column per
+            parameter and one row per variant) as a list of variants """
+        with open(doeFileName) as csvFile:
+            csvReader = csv.DictReader(csvFile)
+            doeTable = [{name: float(value) for name, value in row.items()}
+                        for row in csvReader]
+        return doeTable
+
+    @staticmethod
+    def applyParams(setupDict, params):
+        """ returns a copy of setupDict with the parameters of a variant,
+            "name[i]" sets the entry i of an array parameter """
+        newSetupDict = copy.deepcopy(setupDict)
+        for name, value in params.items():
+            match = re.fullmatch(r"(\w+)\[(\d+)\]", name)
+            if match:
+                key, index = match.group(1), int(match.group(2))
+                if key not in newSetupDict:
+                    raise KeyError("Unknown setup parameter: " + name)
+                newSetupDict[key][index] = float(value)
+            elif name in ("nSteps", "nAx"):
+                newSetupDict[name] = int(value)  # envelope resolution
+            elif name in newSetupDict:
+                newSetupDict[name] = value
+            else:
+                raise KeyError("Unknown setup parameter: " + name)
+        return newSetupDict
+
+    @staticmethod
+    def simulate(setupDict, track, bTraces=0, envCache=None):
+        """ runs the envelope (or takes it from envCache) and the lap time
+            simulation of one setup """
+        timer = StageTimer()
+        with timer.stage("envelope"):
+            if envCache is not None:
+                accEnvDict = envCache.getEnvelope(setupDict)
+            else:
+                aE = AccEnvCalc(setupDict, bVerbose=0)
+                aE.Run()
+                accEnvDict = aE.accEnvDict
+        lS = LapTimeSimCalc(track, accEnvDict, 10, bVerbose=0,
+                            timer=timer)
+        lS.RunFlyingLap()
+        result = {
+            "laptime": lS.lapTimeSimDict["laptime"],
+            "laptimeRaw": lS.lapTimeSimDict["time"][-1],
+            "vcarmax": lS.lapTimeSimDict["vcarmax"],
+            "nIter": lS.lapTimeSimDict["nIter"],
+            "timings": {name: timing["time"]
+                        for name, timing in timer.timingDict.items()},
+        }
+        if bTraces == 1:
+            result["vcar"] = lS.lapTimeSimDict["vcar"]
+        return result
+
+    @staticmethod
+    def simulateBatch(setupDicts, track, bTraces=0, envCache=None):
+        """ runs the envelopes (serially, through envCache) and solves all
+            the laps together with BatchLapSolver """
+        envCache = envCache or EnvelopeCache()
+        tEnvelopes = []
+        accEnvDicts = []
+        for setupDict in setupDicts:
+            timer = StageTimer()
+            with timer.stage("envelope"):
+                accEnvDicts.append(envCache.getEnvelope(setupDict))
+            tEnvelopes.append(timer.total())
+        timer = StageTimer()
+        with timer.stage("batchLap"):
+            bS = BatchLapSolver(track, accEnvDicts, 10, bVerbose=0)
+            batchDict = bS.RunFlyingLap()
+        results = []
+        for k in range(len(setupDicts)):
+            result = {
+                "laptime": batchDict["laptime"][k],
+                "laptimeRaw": batchDict["time"][k, -1],
+                "vcarmax": batchDict["vcarmax"][k],
+                "nIter": batchDict["nIter"][k],
+                "timings": {"envelope": tEnvelopes[k],
+                            "batchLap": timer.total()/len(setupDicts)},
+            }
+            if bTraces == 1:
+                result["vcar"] = batchDict["vcar"][k]
+            results.append(result)
+        return results
+
+    def variants(self):
+        """ returns the list of variants from the DOE table and/or the
+            parameter ranges """
+        variants = []
+        if self.doeTable is not None:
+            variants += list(self.doeTable)
+        if self.paramRanges is not None:
+            variants += SweepRunner.fullFactorial(self.paramRanges)
+        return variants
+
+    def run(self):
+        # base setup and variants
+        if self.setupBatch is not None:
+            variants = self.setupBatch.variants()
+            setupDicts = list(self.setupBatch)
+        else:
+            s = SetupFileLoader(self.setupFilesPath + self.setupFileName)
+            s.loadJSON()
+            variants = self.variants()
+            setupDicts = [SweepRunner.applyParams(s.setupDict, params)
+                          for params in variants]
+        trackFile = self.trackFilesPath + self.trackFileName
+
+        # run all variants
+        if self.bBatch == 1:
+            track = np.column_stack(LapTimeSimCalc.loadTrack(trackFile))
+            results = SweepRunner.simulateBatch(setupDicts, track,
+                                                self.bTraces)
+        elif self.nWorkers == 1:
+            initWorker(trackFile, self.bTraces)
+            results = [runWorker(setupDict) for setupDict in setupDicts]
+        else:
+            nWorkers = self.nWorkers or os.cpu_count() or 1
+            chunksize = max(1, len(setupDicts) // (4*nWorkers))
+            with cf.ProcessPoolExecutor(max_workers=nWorkers,
+                                        initializer=initWorker,
+                                        initargs=(trackFile,
+                                                  self.bTraces)) as pool:
+                results = list(pool.map(runWorker, setupDicts,
+                                        chunksize=chunksize))
+
+        # columnar results table
+        names = []
+        for params in variants:
+            names += [name for name in params if name not in names]
+        resultsDict = {"run": np.arange(len(variants))}
+        for name in names:
+            resultsDict[name] = np.array([params.get(name, np.nan)
+                                          for params in variants],
+                                         dtype=float)
+        resultsDict["laptime"] = np.array([r["laptime"] for r in results])
+        resultsDict["laptimeRaw"] = np.array([r["laptimeRaw"]
+                                              for r in results])
+        resultsDict["vcarmax"] = np.array([r["vcarmax"] for r in results])
+        resultsDict["nIter"] = np.array([r["nIter"] for r in results])
+        stages = []
+        for r in results:
+            stages += [name for name in r["timings"] if name not in stages]
+        for name in stages:
+            resultsDict["t" + name[0].upper() + name[1:]] = np.array(
+                [r["timings"].get(name, 0.0) for r in results])
+        if self.bTraces == 1:
+            resultsDict["dist"] = LapTimeSimCalc.loadTrack(trackFile)[0]
+            resultsDict["vcar"] = np.array([r["vcar"] for r in results])
+        self.resultsDict = resultsDict
+        return resultsDict
+
+    @staticmethod
+    def saveResults(resultsDict, fileName):
+        """ saves the results table: .npz (all columns and traces) or .csv
+            (one row per variant, scalar columns only) """
+        if fileName.endswith(".npz"):
+            np.savez(fileName, **resultsDict)
+        else:
+            nRuns = len(resultsDict["run"])
+            names = [name for name, col in resultsDict.items()
+                     if name != "dist" and np.ndim(col) == 1
+                     and len(col) == nRuns]
+            table = np.column_stack([resultsDict[name] for name in names])
+            np.savetxt(fileName, table, delimiter=",", fmt="%.10g",
+                       header=",".join(names), comments="")
+        return fileName
+
+
+def parseParam(paramString):
+    """ parses "name=start:stop:n" (linspace) or "name=v1,v2,..." """
+    name, values = paramString.split("=")
+    if ":" in values:
+        start, stop, n = values.split(":")
+        return name, np.linspace(float(start), float(stop), int(n))
+    return name, np.array([float(v) for v in values.split(",")])
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="OpenLapSim sweep runner")
+    parser.add_argument("setupFileName", help="base setup in setupFiles/")
+    parser.add_argument("trackFileName", help="track in trackFiles/")
+    parser.add_argument("--param", action="append", default=[],
+                        help="name=start:stop:n or name=v1,v2,...")
+    parser.add_argument("--doe", help="design of experiments table (csv)")
+    parser.add_argument("--setups", help="table of setups (csv, parquet or "
+                        "jsonl, missing parameters from setupFileName)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--traces", action="store_true")
+    parser.add_argument("--batch", action="store_true",
+                        help="solve all the laps together (BatchLapSolver)")
+    parser.add_argument("--out", default="exportFiles/Sweep.csv",
+                        help="results table (.csv or .npz)")
+    args = parser.parse_args()
+
+    paramRanges = dict(parseParam(p) for p in args.param) or None
+    doeTable = SweepRunner.loadDOE(args.doe) if args.doe else None
+    setupBatch = None
+    if args.setups:
+        s = SetupFileLoader("setupFiles/" + args.setupFileName)
+        s.loadJSON()
+        setupBatch = SetupBatch(args.setups, s.setupDict)
+        setupBatch.load()
+
+    # object instantiation
+    sweepRunner = SweepRunner(args.setupFileName, args.trackFileName,
+                              paramRanges, doeTable, args.workers,
+                              int(args.traces), int(args.batch), setupBatch)
+    resultsDict = sweepRunner.run()
+    SweepRunner.saveResults(resultsDict, args.out)
+    print("Sweep completed: ", len(resultsDict["run"]), "runs ->", args.out)
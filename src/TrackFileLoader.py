@@ -0,0 +1,130 @@
+"""
+---------------------------
+Track File - OLS
+---------------------------
+
+This class loads a track file (dist, curv) for the lap time simulation.
+
+Formats (chosen by the file extension):
+    - ".txt": text file, one "dist<TAB>curv" line per track point.
+    - ".npy": binary NumPy file of a structured array with the named
+              fields "dist" and "curv" (float64). It is loaded memory
+              mapped, so only the pages used are read from disk.
+
+Loaded tracks are kept in an in-process cache keyed on the file path, its
+modification time, its size and its inode, so repeated simulations on the
+same circuit do not parse (or read) the file again. A file loaded within
+one mtime tick (MTIME_TICK_NS) of its last write could be rewritten with
+the same mtime: its content hash is kept too and checked on the next
+loads, until the file is older than one tick. The cached arrays are read
+only.
+
+Conversion (from /src):
+    python3 TrackFileLoader.py trackFiles/TrackFile.txt
+                               trackFiles/TrackFile.npy
+
+"""
+# Import Packages
+import hashlib
+import os
+import sys
+import time
+import numpy as np
+
+TRACK_DTYPE = np.dtype([("dist", "<f8"), ("curv", "<f8")])
+
+MTIME_TICK_NS = 2*10**9  # coarsest file timestamp resolution (FAT: 2 s)
+
+# {abspath: ((mtime_ns, size, inode), digest or None, dist, curv)}
+_trackCache = {}
+
+
+class TrackFileLoader:
+
+    def __init__(self, trackFileName):
+        self.trackFileName = trackFileName
+        self.dist = None
+        self.curv = None
+
+    def load(self):
+        """ loads dist and curv, from the cache if the file did not change
+            since it was last loaded """
+        path = os.path.abspath(self.trackFileName)
+        key, bRacy = TrackFileLoader.cacheKey(path)
+        cached = _trackCache.get(path)
+        if cached is not None and cached[0] == key and cached[1] is not None:
+            # loaded within one mtime tick of its last write: check content
+            digest = TrackFileLoader.contentHash(path)
+            if digest != cached[1]:
+                cached = None
+            elif not bRacy:  # older than one tick now: the key is enough
+                cached = (key, None) + cached[2:]
+                _trackCache[path] = cached
+        if cached is None or cached[0] != key:
+            digest = TrackFileLoader.contentHash(path) if bRacy else None
+            dist, curv = TrackFileLoader.readTrackFile(path)
+            cached = (key, digest, dist, curv)
+            _trackCache[path] = cached
+        self.dist, self.curv = cached[2], cached[3]
+        return self.dist, self.curv
+
+    @staticmethod
+    def cacheKey(path):
+        """ ((mtime_ns, size, inode), bRacy): bRacy if the file was written
+            within one mtime tick of now """
+        stat = os.stat(path)
+        bRacy = time.time_ns() - stat.st_mtime_ns < MTIME_TICK_NS
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino), bRacy
+
+    @staticmethod
+    def contentHash(path):
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    @staticmethod
+    def clearCache():
+        _trackCache.clear()
+
+    @staticmethod
+    def readTrackFile(trackFileName):
+        """ reads a .txt or .npy track file, returns (dist, curv) """
+        if trackFileName.endswith(".npy"):
+            track = np.load(trackFileName, mmap_mode="r")
+            if track.dtype.names != TRACK_DTYPE.names:
+                raise ValueError("Track file without dist/curv fields: "
+                                 + trackFileName)
+            return track["dist"], track["curv"]
+        track = np.loadtxt(trackFileName)
+        track.flags.writeable = False
+        return track[:, 0], track[:, 1]
+
+    @staticmethod
+    def writeTrackFile(trackFileName, dist, curv):
+        """ writes a .txt or .npy track file in one bulk write """
+        if trackFileName.endswith(".npy"):
+            track = np.empty(len(dist), dtype=TRACK_DTYPE)
+            track["dist"] = dist
+            track["curv"] = curv
+            np.save(trackFileName, track)
+        else:
+            lines = [str(float(d)) + "\t" + str(float(c)) + "\n"
+                     for d, c in zip(dist, curv)]
+            with open(trackFileName, "w") as newFile:
+                newFile.write("".join(lines))
+        return trackFileName
+
+    @staticmethod
+    def convertTrackFile(inTrackFileName, outTrackFileName):
+        """ converts between the track file formats (.txt <-> .npy) """
+        dist, curv = TrackFileLoader.readTrackFile(inTrackFileName)
+        return TrackFileLoader.writeTrackFile(outTrackFileName, dist, curv)
+
+
+# ----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    inTrackFileName, outTrackFileName = sys.argv[1], sys.argv[2]
+    TrackFileLoader.convertTrackFile(inTrackFileName, outTrackFileName)
+    print("Track file converted: ", outTrackFileName)
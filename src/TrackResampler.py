@@ -0,0 +1,159 @@
+"""
+---------------------------
+Track Resampler - OLS
+---------------------------
+
+This class builds an adaptive distance grid for the lap time simulation:
+coarse steps on the straights, fine steps where the curvature or its
+gradient is high and where the speed changes (acceleration and braking).
+
+Steps:
+    1 - Pilot lap on the track file grid (LapTimeSimCalc flying lap).
+    2 - Local step ds(s) = dsMax / (1 + |curv|/curvScale
+                                    + |dcurv/ds|/curvGradScale
+                                    + |dv/ds|/dvScale + |d2v/ds2|/d2vScale),
+        limited to [dsMin, dsMax], with dv/ds from the pilot lap.
+    3 - Grid points placed so every step follows ds(s) (equidistribution),
+        plus the corner apexes (max |curv|) and the braking points.
+    4 - Curvature interpolated on the new grid (linear).
+
+run() reports the laptime error of the adaptive and of the track file
+grids against a fine uniform grid (dsRef) reference.
+
+"""
+# Import Packages
+import numpy as np
+
+# import packages (OLP)
+from LapTimeSimCalc import LapTimeSimCalc
+
+
+class TrackResampler:
+
+    def __init__(self, TrackFile, dsMin=2.0, dsMax=50.0, curvScale=0.004,
+                 curvGradScale=0.0002, dvScale=0.04, d2vScale=0.0002,
+                 apexCurvMin=0.002):
+        # inputs
+        self.dist, self.curv = LapTimeSimCalc.loadTrack(TrackFile)
+        self.dsMin = dsMin  # [m]
+        self.dsMax = dsMax  # [m]
+        self.curvScale = curvScale  # [1/m]
+        self.curvGradScale = curvGradScale  # [1/m^2]
+        self.dvScale = dvScale  # [1/s]
+        self.d2vScale = d2vScale  # [1/(m s)]
+        self.apexCurvMin = apexCurvMin  # [1/m] min |curv| of an apex
+        # outputs
+        self.resampleDict = None
+
+    @staticmethod
+    def solveTrack(track, accEnvDict, bKernel=0):
+        """ flying lap on a (dist, curv) track array """
+        lS = LapTimeSimCalc(track, accEnvDict, 10, bVerbose=0,
+                            bKernel=bKernel)
+        lS.RunFlyingLap()
+        return lS.lapTimeSimDict
+
+    @staticmethod
+    def uniformGrid(dist, ds):
+        """ uniform grid from the first to the last point of dist """
+        return np.linspace(dist[0], dist[-1],
+                           int(np.ceil((dist[-1] - dist[0])/ds)) + 1)
+
+    @staticmethod
+    def equidistribute(distSupport, step):
+        """ grid following the local step (given on distSupport) """
+        nSteps = np.concatenate(([0], np.cumsum(np.diff(distSupport)
+                                                / step[:-1])))
+        nPoints = int(np.ceil(nSteps[-1])) + 1
+        return np.interp(np.linspace(0, nSteps[-1], nPoints), nSteps,
+                         distSupport)
+
+    def track(self, distGrid):
+        """ (dist, curv) track array on a new grid """
+        return np.column_stack((distGrid,
+                                np.interp(distGrid, self.dist, self.curv)))
+
+    def apexDist(self):
+        """ distance of the corner apexes (local max of |curv|) """
+        curvAbs = np.absolute(self.curv)
+        bApex = ((curvAbs[1:-1] >= curvAbs[:-2])
+                 & (curvAbs[1:-1] >= curvAbs[2:])
+                 & (curvAbs[1:-1] > self.apexCurvMin))
+        return self.dist[1:-1][bApex]
+
+    @staticmethod
+    def brakeDist(lapTimeSimDict):
+        """ distance of the braking points: the speed starts to follow the
+            deceleration pass """
+        bBrake = (lapTimeSimDict["vxdec"]
+                  < np.minimum(lapTimeSimDict["vxacc"],
+                               lapTimeSimDict["vxcor"]))
+        iBrake = np.flatnonzero(bBrake[1:] & ~bBrake[:-1]) + 1
+        return lapTimeSimDict["dist"][iBrake]
+
+    def adaptiveGrid(self, pilotDict):
+        """ adaptive grid from the track curvature and a pilot lap """
+        dist, vcar = pilotDict["dist"], pilotDict["vcar"]
+        dvds = np.gradient(vcar, dist)
+        d2vds2 = np.gradient(dvds, dist)
+
+        distSupport = TrackResampler.uniformGrid(dist, 0.5*self.dsMin)
+        curv = np.interp(distSupport, self.dist, self.curv)
+        step = self.dsMax/(
+            1 + np.absolute(curv)/self.curvScale
+            + np.absolute(np.gradient(curv, distSupport))/self.curvGradScale
+            + np.interp(distSupport, dist, np.absolute(dvds))/self.dvScale
+            + np.interp(distSupport, dist, np.absolute(d2vds2))/self.d2vScale)
+        step = np.clip(step, self.dsMin, self.dsMax)
+
+        distGrid = TrackResampler.equidistribute(distSupport, step)
+        distKeys = np.unique(np.concatenate((self.apexDist(),
+                                             TrackResampler.brakeDist(
+                                                 pilotDict))))
+        # drop the grid points too close to an apex or braking point
+        if len(distKeys) > 0:
+            iKey = np.clip(np.searchsorted(distKeys, distGrid), 1,
+                           len(distKeys)-1)
+            gap = np.minimum(np.absolute(distGrid - distKeys[iKey-1]),
+                             np.absolute(distGrid - distKeys[iKey]))
+            if len(distKeys) == 1:
+                gap = np.absolute(distGrid - distKeys[0])
+            distGrid = distGrid[gap > 0.25*self.dsMin]
+        return np.union1d(distGrid, distKeys)
+
+    def run(self, accEnvDict, dsRef=1.0, bKernel=0):
+        """ adaptive track and laptime error against a fine uniform grid
+            (unrounded laptimes) """
+        inputTrack = np.column_stack((self.dist, self.curv))
+        pilotDict = TrackResampler.solveTrack(inputTrack, accEnvDict,
+                                              bKernel)
+        distGrid = self.adaptiveGrid(pilotDict)
+        adaptiveDict = TrackResampler.solveTrack(self.track(distGrid),
+                                                 accEnvDict, bKernel)
+        refGrid = TrackResampler.uniformGrid(self.dist, dsRef)
+        refDict = TrackResampler.solveTrack(self.track(refGrid), accEnvDict,
+                                            bKernel)
+
+        laptimeRef = refDict["time"][-1]
+        self.resampleDict = {
+            "dist": distGrid,
+            "curv": np.interp(distGrid, self.dist, self.curv),
+            "nPoints": len(distGrid),
+            "laptime": adaptiveDict["time"][-1],
+            "error": adaptiveDict["time"][-1] - laptimeRef,
+            "nPointsInput": len(self.dist),
+            "laptimeInput": pilotDict["time"][-1],
+            "errorInput": pilotDict["time"][-1] - laptimeRef,
+            "nPointsRef": len(refGrid),
+            "laptimeRef": laptimeRef,
+        }
+        return self.resampleDict
+
+    def printReport(self):
+        r = self.resampleDict
+        print("Reference: ", r["nPointsRef"], "points, laptime %.3f s"
+              % r["laptimeRef"])
+        print("Track file:", r["nPointsInput"], "points, error %+.3f s"
+              % r["errorInput"])
+        print("Adaptive:  ", r["nPoints"], "points, error %+.3f s"
+              % r["error"])
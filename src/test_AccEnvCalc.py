@@ -2,6 +2,7 @@
 
 
 import unittest
+import numpy as np
 from AccEnvCalc import AccEnvCalc
 from SetupFileLoader import SetupFileLoader
 
@@ -59,6 +60,43 @@ class test_AccEnvCalc(unittest.TestCase):
         self.assertEqual(actual, expected, "Error in test 8")
         # print("act: ", actual, "; exp: ", expected)
 
+    # Test the array GGV generation gives the same rows as the loop
+    def test_9(self):
+        aED = self.AEC.accEnvDict
+        actual, _ = AccEnvCalc.generateGGVVect(aED["axacc"], aED["axdec"],
+                                               aED["ay"], aED["vxvect"],
+                                               self.AEC.nAx)
+        expected = aED["GGVacc"][:len(actual)]
+        np.testing.assert_array_equal(actual, expected, "Error in test 9")
+
+    # Test the array final drive selects the same gears as the loop
+    def test_10(self):
+        aED = self.AEC.accEnvDict
+        actual = self.AEC.MfinaldriveVect(aED["vxvect"])[3]
+        expected = aED["nGear"]
+        np.testing.assert_array_equal(actual, expected, "Error in test 10")
+
+    # Test the vector mode resolution and top speed (same as the loop)
+    def test_11(self):
+        setupDict = dict(self.SFL.setupDict, envMode="vector",
+                         nSteps=200, nAx=100)
+        AECvect = AccEnvCalc(setupDict)
+        AECvect.Run()
+        GGVfull = AECvect.accEnvDict["GGVfull"]
+        self.assertEqual(np.shape(GGVfull), (4*200*100, 3), "Error in test 11")
+        actual = max(AECvect.accEnvDict["vxvect"])
+        expected = max(self.AEC.accEnvDict["vxvect"])
+        self.assertEqual(actual, expected, "Error in test 11")
+
+    # Test the vector mode gives the same envelope as the loop
+    def test_12(self):
+        AECvect = AccEnvCalc(dict(self.SFL.setupDict, envMode="vector"),
+                             bVerbose=0)
+        AECvect.Run()
+        np.testing.assert_array_equal(AECvect.accEnvDict["GGVfull"],
+                                      self.AEC.accEnvDict["GGVfull"],
+                                      "Error in test 12")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+"""Unit Test for BatchLapSolver.py"""
+
+
+import unittest
+import numpy as np
+from SetupFileLoader import SetupFileLoader
+from AccEnvCalc import AccEnvCalc
+from BatchLapSolver import BatchLapSolver
+from LapTimeSimCalc import LapTimeSimCalc
+
+
+class test_BatchLapSolver(unittest.TestCase):
+
+    SFL = SetupFileLoader("setupFiles/SetupFile.json")
+    SFL.loadJSON()
+    accEnvDicts = []
+    for clt in [3.1, 2.8, 3.4]:
+        AEC = AccEnvCalc(dict(SFL.setupDict, clt=clt), bVerbose=0)
+        AEC.Run()
+        accEnvDicts.append(AEC.accEnvDict)
+    trackPath = "trackFiles/TrackFile.txt"
+    BLS = BatchLapSolver(trackPath, accEnvDicts, 10, bVerbose=0)
+    BLS.RunFlyingLap()
+
+    # Test one setup gives the traces of the reference on its grid
+    def test_1(self):
+        bS = BatchLapSolver(self.trackPath, self.accEnvDicts[:1], 10,
+                            bVerbose=0)
+        bS.RunFlyingLap()
+        lS = LapTimeSimCalc(self.trackPath, self.accEnvDicts[0], 10,
+                            surfMethod="grid", bVerbose=0)
+        lS.RunFlyingLap()
+        for channel in ["vxacc", "vxdec", "vcar"]:
+            np.testing.assert_allclose(bS.batchDict[channel][0],
+                                       lS.lapTimeSimDict[channel],
+                                       rtol=1e-12, err_msg="Error in test 1")
+
+    # Test the batch laptimes against the single setup ones (tol 0.05 s)
+    def test_2(self):
+        for k, accEnvDict in enumerate(self.accEnvDicts):
+            lS = LapTimeSimCalc(self.trackPath, accEnvDict, 10, bVerbose=0)
+            lS.RunFlyingLap()
+            self.assertAlmostEqual(self.BLS.batchDict["laptime"][k],
+                                   lS.lapTimeSimDict["laptime"], delta=0.05,
+                                   msg="Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
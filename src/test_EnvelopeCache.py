@@ -0,0 +1,74 @@
+"""Unit Test for EnvelopeCache.py"""
+
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from EnvelopeCache import EnvelopeCache
+from SetupFileLoader import SetupFileLoader
+
+
+class test_EnvelopeCache(unittest.TestCase):
+
+    setupFileName = "setupFiles/SetupFile.json"
+    s = SetupFileLoader(setupFileName)
+    s.loadJSON()
+    setupDict = s.setupDict
+
+    # Test the hash ignores key order, number types and setup name
+    def test_1(self):
+        reordered = dict(reversed(list(self.setupDict.items())))
+        reordered["setupName"] = "Other"
+        reordered["mcar"] = int(self.setupDict["mcar"])
+        self.assertEqual(EnvelopeCache.setupHash(reordered),
+                         EnvelopeCache.setupHash(self.setupDict),
+                         "Error in test 1")
+        self.assertNotEqual(EnvelopeCache.setupHash(dict(self.setupDict,
+                                                         gripx=None)),
+                            EnvelopeCache.setupHash(self.setupDict),
+                            "Error in test 1")
+        explicit = dict(self.setupDict, nSteps=10)  # default resolution
+        self.assertEqual(EnvelopeCache.setupHash(explicit),
+                         EnvelopeCache.setupHash(self.setupDict),
+                         "Error in test 1")
+        for changed in (dict(self.setupDict, clt=3.0),
+                        dict(self.setupDict, nSteps=12)):
+            self.assertNotEqual(EnvelopeCache.setupHash(changed),
+                                EnvelopeCache.setupHash(self.setupDict),
+                                "Error in test 1")
+
+    # Test the envelope is computed once and the LRU eviction
+    def test_2(self):
+        eC = EnvelopeCache(maxSize=1)
+        first = eC.getEnvelope(self.setupDict)
+        again = eC.getEnvelope(dict(self.setupDict, setupName="Other"))
+        self.assertIs(again, first, "Error in test 2")
+        eC.getEnvelope(dict(self.setupDict, clt=3.0))
+        eC.getEnvelope(self.setupDict)  # evicted: computed again
+        actual = (eC.nMemHits, eC.nMisses)
+        expected = (1, 3)
+        self.assertEqual(actual, expected, "Error in test 2")
+
+    # Test the disk tier and its size limit
+    def test_3(self):
+        with tempfile.TemporaryDirectory() as cacheDir:
+            first = EnvelopeCache(cacheDir=cacheDir).getEnvelope(
+                self.setupDict)
+            eC = EnvelopeCache(cacheDir=cacheDir)
+            loaded = eC.getEnvelope(self.setupDict)
+            self.assertEqual(eC.nDiskHits, 1, "Error in test 3")
+            np.testing.assert_array_equal(loaded["GGVfull"],
+                                          first["GGVfull"],
+                                          "Error in test 3")
+            # same keys as a memory hit, no temporary file left
+            self.assertEqual(set(loaded), set(first), "Error in test 3")
+            self.assertIsNone(loaded["gripx"], "Error in test 3")
+            self.assertEqual(len(os.listdir(cacheDir)), 1, "Error in test 3")
+            eC = EnvelopeCache(cacheDir=cacheDir, maxDiskBytes=1)
+            eC.getEnvelope(dict(self.setupDict, clt=3.0))
+            self.assertEqual(len(os.listdir(cacheDir)), 0, "Error in test 3")
+
+
+if __name__ == '__main__':
+    unittest.main()
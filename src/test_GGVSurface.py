@@ -0,0 +1,74 @@
+"""Unit Test for GGVSurface.py"""
+
+
+import unittest
+import numpy as np
+from SetupFileLoader import SetupFileLoader
+from AccEnvCalc import AccEnvCalc
+from LapTimeSimCalc import LapTimeSimCalc
+from GGVSurface import GGVSurface
+
+
+class test_GGVSurface(unittest.TestCase):
+
+    SFL = SetupFileLoader("setupFiles/SetupFile.json")
+    SFL.loadJSON()
+    AEC = AccEnvCalc(SFL.setupDict)
+    AEC.Run()
+    GGVacc, GGVdec = LapTimeSimCalc.splitGGVfull(AEC.accEnvDict["GGVfull"])
+    X, Y, Z = GGVdec[:, 0], GGVdec[:, 1], GGVdec[:, 2]
+    # query points inside and outside the envelope
+    rng = np.random.RandomState(0)
+    vxq = rng.uniform(0, max(Z)*1.1, 50)
+    ayq = rng.uniform(min(Y)*1.1, max(Y)*1.1, 50)
+
+    # Test the triangulated surface is the same as griddata
+    def test_1(self):
+        surf = GGVSurface(self.GGVdec, "delaunay")
+        for vx, ay in zip(self.vxq, self.ayq):
+            actual = surf.interp(vx, ay)
+            expected = LapTimeSimCalc.GGVSurfInterp(vx, ay,
+                                                    self.X, self.Y, self.Z)
+            np.testing.assert_equal(actual, expected, "Error in test 1")
+
+    # Test the lookup grid is close to griddata inside the envelope
+    def test_2(self):
+        surf = GGVSurface(self.GGVdec, "grid")
+        vxmax = max(self.Z)
+        actual = surf.interp(vxmax*0.5, 0)
+        expected = LapTimeSimCalc.GGVSurfInterp(vxmax*0.5, 0,
+                                                self.X, self.Y, self.Z)
+        self.assertAlmostEqual(actual, expected, 1, "Error in test 2")
+
+    # Test the lookup grid returns nan outside the envelope
+    def test_3(self):
+        surf = GGVSurface(self.GGVdec, "grid")
+        actual = surf.interp(max(self.Z)*2, 0)
+        self.assertTrue(np.isnan(actual), "Error in test 3")
+
+    # Test the triangulation is built on demand only
+    def test_4(self):
+        surf = GGVSurface(self.GGVdec, "delaunay")
+        self.assertIsNone(surf.tri, "Error in test 4")
+        surf.interp(self.vxq[0], self.ayq[0])
+        self.assertIsNotNone(surf.tri, "Error in test 4")
+        surf = GGVSurface(self.GGVdec, "grid")
+        self.assertIsNone(surf.tri, "Error in test 4")
+
+    # Test the grid laptime at a finer envelope (grid sized from the GGV)
+    def test_5(self):
+        AEC = AccEnvCalc(dict(self.SFL.setupDict, nSteps=50, nAx=40),
+                         bVerbose=0)
+        AEC.Run()
+        laptimes = []
+        for surfMethod in ("delaunay", "grid"):
+            LTSC = LapTimeSimCalc("trackFiles/TrackFile.txt", AEC.accEnvDict,
+                                  10, surfMethod=surfMethod, bVerbose=0)
+            LTSC.RunFlyingLap()
+            laptimes.append(LTSC.lapTimeSimDict["laptime"])
+        self.assertAlmostEqual(laptimes[1], laptimes[0], delta=0.02,
+                               msg="Error in test 5")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Unit Test for LapKernel.py"""
+
+
+import unittest
+import numpy as np
+from SetupFileLoader import SetupFileLoader
+from AccEnvCalc import AccEnvCalc
+from LapTimeSimCalc import LapTimeSimCalc
+
+
+class test_LapKernel(unittest.TestCase):
+
+    SFL = SetupFileLoader("setupFiles/SetupFile.json")
+    SFL.loadJSON()
+    AEC = AccEnvCalc(SFL.setupDict)
+    AEC.Run()
+    trackPath = "trackFiles/TrackFile.txt"
+    # reference implementation on the same lookup grids
+    LTSCref = LapTimeSimCalc(trackPath, AEC.accEnvDict, 10,
+                             surfMethod="grid")
+    LTSCref.RunFlyingLap()
+    LTSCkernel = LapTimeSimCalc(trackPath, AEC.accEnvDict, 10, bKernel=1)
+    LTSCkernel.RunFlyingLap()
+
+    # Test equivalence of the kernel speed traces with the reference
+    def test_1(self):
+        for channel in ["vxacc", "vxdec", "vcar"]:
+            actual = self.LTSCkernel.lapTimeSimDict[channel]
+            expected = self.LTSCref.lapTimeSimDict[channel]
+            np.testing.assert_allclose(actual, expected, rtol=1e-12,
+                                       err_msg="Error in test 1")
+
+    # Test the kernel laptime is the reference one (tol 0.05 s)
+    def test_2(self):
+        actual = self.LTSCkernel.lapTimeSimDict["laptime"]
+        expected = 121.054  # laptime (as test_RunOpenLapSim)
+        self.assertAlmostEqual(actual, expected, delta=0.05,
+                               msg="Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
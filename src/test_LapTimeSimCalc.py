@@ -1,10 +1,14 @@
 """Unit Test for LapTimeSimCalc.py"""
 
 
+import os
+import tempfile
 import unittest
+import numpy as np
 from SetupFileLoader import SetupFileLoader
 from AccEnvCalc import AccEnvCalc
 from LapTimeSimCalc import LapTimeSimCalc
+from TrackFileLoader import TrackFileLoader
 
 
 class test_LapTimeSimCalc(unittest.TestCase):
@@ -38,5 +42,164 @@ class test_LapTimeSimCalc(unittest.TestCase):
         self.assertTrue(bInRange, "Error in test 2")
         # print("act: ", actual, "; exp: ", expected)
 
+    # Test the lookup grid GGV surface gives the same laptime (tol 0.05 s)
+    def test_3(self):
+        LTSCgrid = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict, 10,
+                                  surfMethod="grid")
+        LTSCgrid.Run()
+        actual = LTSCgrid.lapTimeSimDict["laptime"]
+        expected = self.LTSC.lapTimeSimDict["laptime"]
+        self.assertAlmostEqual(actual, expected, delta=0.05,
+                               msg="Error in test 3")
+
+    # Test the flying lap gives the same laptime as the two laps l1/l2
+    def test_4(self):
+        l2 = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict,
+                            self.LTSC.lapTimeSimDict["vxaccEnd"])
+        l2.Run()
+        LTSCfly = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict, 10)
+        LTSCfly.RunFlyingLap(tol=0.001)
+        actual = LTSCfly.lapTimeSimDict["laptime"]
+        expected = l2.lapTimeSimDict["laptime"]
+        self.assertEqual(actual, expected, "Error in test 4")
+        self.assertTrue(LTSCfly.lapTimeSimDict["bConverged"],
+                        "Error in test 4")
+        # start and end speed match
+        vxaccStart = LTSCfly.lapTimeSimDict["vxacc"][0]
+        vxaccEnd = LTSCfly.lapTimeSimDict["vxaccEnd"]
+        self.assertAlmostEqual(vxaccStart, vxaccEnd, delta=0.001,
+                               msg="Error in test 4")
+
+    # Test the binary (.npy) track gives the same laptime
+    def test_5(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            npyPath = os.path.join(tempDir, "TrackFile.npy")
+            TrackFileLoader.convertTrackFile(self.trackPath, npyPath)
+            LTSCnpy = LapTimeSimCalc(npyPath, self.AEC.accEnvDict, 10)
+            LTSCnpy.Run()
+        actual = LTSCnpy.lapTimeSimDict["laptime"]
+        expected = self.LTSC.lapTimeSimDict["laptime"]
+        self.assertEqual(actual, expected, "Error in test 5")
+
+    # Test the cornering speed table against the per point reference
+    def test_6(self):
+        GGVacc = self.LTSC.GGVacc
+        curv = self.LTSC.curv
+        curvvect, vxvect = [], []
+        for i in range(len(GGVacc[:, 2])):
+            if (GGVacc[i, 0] == 0) and (GGVacc[i, 1] >= 0):
+                vxclipped = max(GGVacc[i, 2], 0.00000001)
+                curvvect.append(GGVacc[i, 1]/pow(vxclipped, 2))
+                vxvect.append(vxclipped)
+        curvvect[0] = 0.5
+        curvclipped = [max(abs(c), min(curvvect)) for c in curv]
+        expected = np.interp(curvclipped, curvvect, vxvect, period=360)
+        curvTable, vxTable = LapTimeSimCalc.calcVxcorTable(GGVacc)
+        actual = LapTimeSimCalc.calcVxcor(curv, curvTable, vxTable)
+        np.testing.assert_array_equal(actual, expected, "Error in test 6")
+
+    # Test the vectorized vcar and lap time against the per point reference
+    def test_7(self):
+        lapDict = self.LTSC.lapTimeSimDict
+        vxcor, vxacc = lapDict["vxcor"], lapDict["vxacc"]
+        vxdec, dist = lapDict["vxdec"], lapDict["dist"]
+        vcar = np.zeros(len(dist))
+        timestep = np.zeros(len(dist))
+        time = np.zeros(len(dist))
+        for i in range(len(dist)-1):
+            vcar[i] = min(vxcor[i], vxacc[i], vxdec[i])
+            timestep[i] = (dist[i+1]-dist[i])/vcar[i]
+            time[i] = sum(timestep)
+        vcar[-1] = vcar[-2]
+        actualVcar = LapTimeSimCalc.calcVcar(vxcor, vxacc, vxdec)
+        actualTime, actualLaptime = LapTimeSimCalc.calcLapTime(vcar, dist)
+        np.testing.assert_array_equal(actualVcar, vcar, "Error in test 7")
+        np.testing.assert_array_equal(actualTime[:-1], time[:-1],
+                                      "Error in test 7")
+        self.assertEqual(actualLaptime, np.round(max(time), 3),
+                         "Error in test 7")
+
+    # Test the masked GGV split against the per row reference
+    def test_8(self):
+        GGVfull = self.LTSC.GGVfull
+        vxmax = max(GGVfull[:, 2])
+        expectedAcc = [row for row in GGVfull if row[0] >= 0]
+        expectedDec = [row for row in GGVfull if row[0] < 0 or
+                       (row[0] == 0 and row[2] < vxmax)]
+        actualAcc, actualDec = LapTimeSimCalc.splitGGVfull(GGVfull, bDedup=0)
+        np.testing.assert_array_equal(actualAcc, expectedAcc,
+                                      "Error in test 8")
+        np.testing.assert_array_equal(actualDec, expectedDec,
+                                      "Error in test 8")
+        # deduplicated rows are unique and the split is stored once
+        GGVacc, GGVdec = LapTimeSimCalc.getSplitGGV(self.AEC.accEnvDict)
+        self.assertEqual(len(np.unique(GGVacc + 0.0, axis=0)), len(GGVacc),
+                         "Error in test 8")
+        self.assertIs(self.LTSC.GGVacc, GGVacc, "Error in test 8")
+
+    # Test the incremental re-solve of a curvature edit against a full lap
+    def test_9(self):
+        dist, curv = LapTimeSimCalc.loadTrack(self.trackPath)
+        iStart, iEnd = 300, 311
+        curvEdit = np.array(curv)
+        curvEdit[iStart:iEnd] *= 1.2
+        LTSCedit = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict, 10,
+                                  bVerbose=0)
+        LTSCedit.Run()
+        nSteps = LTSCedit.updateCurvature(iStart, curvEdit[iStart:iEnd])
+        LTSCfull = LapTimeSimCalc(np.column_stack((dist, curvEdit)),
+                                  self.AEC.accEnvDict, 10, bVerbose=0)
+        LTSCfull.Run()
+        for key in ("vxacc", "vxdec", "vcar", "time"):
+            np.testing.assert_array_equal(LTSCedit.lapTimeSimDict[key],
+                                          LTSCfull.lapTimeSimDict[key],
+                                          "Error in test 9")
+        self.assertLess(nSteps, len(dist)/4, "Error in test 9")
+        # the track of the original object is not modified
+        np.testing.assert_array_equal(self.LTSC.curv, curv, "Error in test 9")
+
+    # Test the incremental re-solve of a flying lap
+    def test_10(self):
+        dist, curv = LapTimeSimCalc.loadTrack(self.trackPath)
+        iStart, iEnd = 300, 311
+        curvEdit = np.array(curv)
+        curvEdit[iStart:iEnd] *= 1.2
+        LTSCedit = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict, 10,
+                                  bVerbose=0)
+        LTSCedit.RunFlyingLap()
+        LTSCedit.updateCurvature(iStart, curvEdit[iStart:iEnd])
+        LTSCfull = LapTimeSimCalc(np.column_stack((dist, curvEdit)),
+                                  self.AEC.accEnvDict, 10, bVerbose=0)
+        LTSCfull.RunFlyingLap()
+        self.assertAlmostEqual(LTSCedit.lapTimeSimDict["laptime"],
+                               LTSCfull.lapTimeSimDict["laptime"],
+                               delta=0.002, msg="Error in test 10")
+
+    # Test the re-solve of a kernel lap is the same as a full re-solve
+    def test_11(self):
+        dist, curv = LapTimeSimCalc.loadTrack(self.trackPath)
+        iStart, iEnd = 300, 311
+        curvEdit = np.array(curv)
+        curvEdit[iStart:iEnd] *= 1.2
+        for bFlying in (0, 1):
+            LTSCedit = LapTimeSimCalc(self.trackPath, self.AEC.accEnvDict,
+                                      10, bVerbose=0, bKernel=1)
+            LTSCfull = LapTimeSimCalc(np.column_stack((dist, curvEdit)),
+                                      self.AEC.accEnvDict, 10, bVerbose=0,
+                                      bKernel=1)
+            if bFlying:
+                LTSCedit.RunFlyingLap()
+                LTSCfull.RunFlyingLap(vxaccStart=LTSCedit.lapTimeSimDict[
+                    "vxacc"][0])
+            else:
+                LTSCedit.Run()
+                LTSCfull.Run()
+            LTSCedit.updateCurvature(iStart, curvEdit[iStart:iEnd])
+            for key in ("vxacc", "vxdec", "vcar", "time"):
+                np.testing.assert_array_equal(LTSCedit.lapTimeSimDict[key],
+                                              LTSCfull.lapTimeSimDict[key],
+                                              "Error in test 11")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+"""Unit Test for RunBenchmarks.py"""
+
+
+import json
+import os
+import tempfile
+import unittest
+from RunBenchmarks import RunBenchmarks
+
+
+class test_RunBenchmarks(unittest.TestCase):
+
+    RB = RunBenchmarks(trackSizes=(100,), envResolutions=((10, 20),),
+                       repeat=1)
+    RB.run()
+
+    # Test all the stages are timed
+    def test_1(self):
+        actual = {r["name"] for r in self.RB.benchDict["results"]}
+        expected = {"AccEnvCalc.Run", "splitGGVfull", "GGVSurfInterp",
+                    "GGVSurface.interp", "accPass", "decPass", "lapKernel",
+                    "pipeline", "importTime", "coldRun", "batchLap"}
+        self.assertEqual(actual, expected, "Error in test 1")
+        # memory footprint of the dicts and of the result types
+        actual = {r["name"] for r in self.RB.benchDict["memory"]}
+        expected = {"accEnvDict", "lapTimeSimDict", "AccEnvResult",
+                    "LapResult"}
+        self.assertEqual(actual, expected, "Error in test 1")
+
+    # Test the JSON export
+    def test_2(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            benchFileName = os.path.join(tempDir, "Bench.json")
+            self.RB.saveJSON(benchFileName)
+            with open(benchFileName) as f:
+                benchDict = json.load(f)
+        actual = len(benchDict["results"])
+        expected = len(self.RB.benchDict["results"])
+        self.assertEqual(actual, expected, "Error in test 2")
+
+    # Test a slower benchmark is reported as regression
+    def test_3(self):
+        old = {"results": [{"name": "a", "params": {"n": 1}, "min": 1.0}]}
+        new = {"results": [{"name": "a", "params": {"n": 1}, "min": 1.5}]}
+        actual = RunBenchmarks.compareBenchmarks(old, new, threshold=1.2)
+        expected = [("a", {"n": 1}, 1.5)]
+        self.assertEqual(actual, expected, "Error in test 3")
+
+    # Test the core and the headless run import neither matplotlib nor scipy
+    def test_4(self):
+        for statement in ("import AccEnvCalc, LapTimeSimCalc, SetupFileLoader",
+                          "import RunOpenLapSim"):
+            modules = RunBenchmarks.importModules(statement)
+            actual = [m for m in modules
+                      if m.split(".")[0] in ("matplotlib", "scipy")]
+            self.assertEqual(actual, [], "Error in test 4")
+            # the Numba kernel is only imported with bKernel=1
+            self.assertNotIn("numba", modules, "Error in test 4")
+            self.assertNotIn("LapKernel", modules, "Error in test 4")
+        # a whole headless run does not import matplotlib
+        modules = RunBenchmarks.importModules(
+            "from RunOpenLapSim import RunOpenLapSim; "
+            "RunOpenLapSim('SetupFile.json', 'TrackFile.txt', 0, 0, 0).run()")
+        self.assertIn("AccEnvCalc", modules, "Error in test 4")
+        self.assertNotIn("matplotlib", modules, "Error in test 4")
+
+    # Test the warm-up call is not timed
+    def test_5(self):
+        calls = []
+        result = RunBenchmarks.timeit(lambda: calls.append(1), 3)
+        self.assertEqual(len(calls), 4, "Error in test 5")
+        self.assertEqual(result["repeat"], 3, "Error in test 5")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,6 +28,16 @@ class test_LapTimeSimCalc(unittest.TestCase):
         expected = 296.6  # vxcarmax
         self.assertEqual(actual, expected, "Error in test 2")
 
+    # Test the stage timings are in the results dict
+    def test_4(self):
+        timings = self.ROLS.resultsDict["timings"]
+        for stage in ["setupLoad", "envelope", "ggvSplit", "vxcor",
+                      "accPass", "decPass"]:
+            self.assertTrue(timings[stage]["time"] > 0, "Error in test 4")
+        actual = timings["accPass"]["calls"]
+        expected = self.ROLS.nIter
+        self.assertEqual(actual, expected, "Error in test 4")
+
     # (TEST OFF FOR CI) Test the computational time is less then expected
     # def test_3(self):
     #     actual = self.ROLS.tcomp
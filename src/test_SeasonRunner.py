@@ -0,0 +1,40 @@
+"""Unit Test for SeasonRunner.py"""
+
+
+import unittest
+from SeasonRunner import SeasonRunner
+
+
+class test_SeasonRunner(unittest.TestCase):
+
+    setupFileName = "SetupFile.json"
+    trackFileNames = ["TrackFile.txt", "TrackFile.txt"]
+    SR = SeasonRunner(setupFileName, trackFileNames, nWorkers=2)
+    SR.run()
+
+    # Test the per track laptimes from the process pool
+    def test_1(self):
+        actual = list(self.SR.resultsDict["laptime"])
+        expected = [121.054, 121.054]  # laptime (as test_RunOpenLapSim)
+        self.assertEqual(actual, expected, "Error in test 1")
+
+    # Test the total laptime of the season
+    def test_2(self):
+        actual = self.SR.resultsDict["totalLaptime"]
+        expected = 242.108
+        self.assertEqual(actual, expected, "Error in test 2")
+
+    # Test the glob pattern on the thread pool, envelope computed once
+    def test_3(self):
+        sR = SeasonRunner(self.setupFileName, "*.txt", nWorkers=2,
+                          poolType="thread", envCache=self.SR.envCache)
+        sR.run()
+        self.assertEqual(list(sR.resultsDict["track"]), ["TrackFile.txt"],
+                         "Error in test 3")
+        self.assertEqual(sR.resultsDict["laptime"][0], 121.054,
+                         "Error in test 3")
+        self.assertEqual(self.SR.envCache.nMisses, 1, "Error in test 3")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit Test for SensitivityRunner.py"""
+
+
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from SensitivityRunner import SensitivityRunner
+from SetupFileLoader import SetupFileLoader
+
+
+class test_SensitivityRunner(unittest.TestCase):
+
+    setupFileName = "SetupFile.json"
+    trackFileName = "TrackFile.txt"
+    SR = SensitivityRunner(setupFileName, trackFileName,
+                           params=["clt", "mcar", "rGearRat[0]",
+                                   "rGearRat[5]"],
+                           nWorkers=1)
+    SR.run()
+
+    # Test the sign of the laptime derivatives
+    def test_1(self):
+        dTdp = self.SR.sensitivityDict["dTdp"]
+        self.assertTrue(dTdp[0] < 0, "Error in test 1")  # more downforce
+        self.assertTrue(dTdp[1] > 0, "Error in test 1")  # more mass
+        self.assertEqual(round(self.SR.sensitivityDict["laptime"], 3), 121.054,
+                         "Error in test 1")
+
+    # Test the exchange rates between the parameters
+    def test_2(self):
+        exchangeRate = self.SR.sensitivityDict["exchangeRate"]
+        self.assertAlmostEqual(exchangeRate[0, 1]*exchangeRate[1, 0], 1.0,
+                               msg="Error in test 2")
+        self.assertEqual(exchangeRate[0, 0], 1.0, "Error in test 2")
+        self.assertTrue(np.isnan(exchangeRate[0, 2]), "Error in test 2")
+
+    # Test a derivative magnitude and the consistency flags
+    def test_3(self):
+        sD = self.SR.sensitivityDict
+        # reference: mcar central differences with 0.2% to 4% steps
+        self.assertAlmostEqual(sD["dTdp"][1], 0.0364, delta=0.001,
+                               msg="Error in test 3")
+        # the rGearRat[5] differences cross laptime steps: flagged
+        actual = list(sD["bConsistent"])
+        expected = [True, True, True, False]
+        self.assertEqual(actual, expected, "Error in test 3")
+        self.assertTrue(np.isnan(sD["exchangeRate"][3, 1]), "Error in test 3")
+
+    # Test a parameter with a zero value gets a finite derivative
+    def test_4(self):
+        s = SetupFileLoader("setupFiles/" + self.setupFileName)
+        s.loadJSON()
+        with tempfile.TemporaryDirectory() as tempDir:
+            with open(os.path.join(tempDir, "SetupZero.json"), "w") as f:
+                json.dump(dict(s.setupDict, loadEff=0.0), f)
+            SR = SensitivityRunner("SetupZero.json", self.trackFileName,
+                                   params=["loadEff"], nWorkers=1)
+            SR.setupFilesPath = tempDir + "/"
+            with np.errstate(all="raise"):
+                sD = SR.run()
+        self.assertEqual(sD["step"][0], 0.001, "Error in test 4")
+        self.assertTrue(np.isfinite(sD["dTdp"][0]), "Error in test 4")
+        self.assertTrue(np.isfinite(sD["dTdpHalf"][0]), "Error in test 4")
+
+
+if __name__ == '__main__':
+    unittest.main()
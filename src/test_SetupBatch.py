@@ -0,0 +1,96 @@
+"""Unit Test for SetupBatch.py"""
+
+
+import json
+import os
+import tempfile
+import unittest
+from SetupBatch import SetupBatch
+from SetupFileLoader import SetupFileLoader
+from SweepRunner import SweepRunner
+
+
+class test_SetupBatch(unittest.TestCase):
+
+    setupPath = "setupFiles/SetupFile.json"
+    SFL = SetupFileLoader(setupPath)
+    SFL.loadJSON()
+    tempDir = tempfile.TemporaryDirectory()
+
+    def writeFile(self, fileName, text):
+        path = os.path.join(self.tempDir.name, fileName)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test a csv DOE table on the base setup (units and array entries)
+    def test_1(self):
+        path = self.writeFile("Setups.csv", "clt,rGearRat[6],mcar (t)\n"
+                                            "3.1,4.0,0.728\n"
+                                            "3.5,4.2,0.75\n")
+        setupBatch = SetupBatch(path, self.SFL.setupDict)
+        setupBatch.load()
+        self.assertEqual(len(setupBatch), 2, "Error in test 1")
+        setupDict = setupBatch.setupDict(1)
+        self.assertEqual(setupDict["clt"], 3.5, "Error in test 1")
+        self.assertEqual(setupDict["mcar"], 750.0, "Error in test 1")
+        self.assertEqual(setupDict["rGearRat"],
+                         [10.0, 7.8, 6.1, 7.8, 5.2, 4.5, 4.2],
+                         "Error in test 1")
+        self.assertEqual(setupBatch.setupDict(0),
+                         SweepRunner.applyParams(self.SFL.setupDict, {}),
+                         "Error in test 1")
+        self.assertEqual(setupBatch.variants()[1],
+                         {"clt": 3.5, "rGearRat[6]": 4.2, "mcar": 750.0},
+                         "Error in test 1")
+
+    # Test the validation of JSON lines setups
+    def test_2(self):
+        lines = [json.dumps(self.SFL.setupDict),
+                 json.dumps(dict(self.SFL.setupDict, mcar=-1))]
+        path = self.writeFile("Setups.jsonl", "\n".join(lines))
+        with self.assertRaises(ValueError):  # negative mass
+            SetupBatch(path).load()
+        lines[1] = json.dumps(dict(self.SFL.setupDict, EngNm=[200, 300]))
+        path = self.writeFile("Setups.jsonl", "\n".join(lines))
+        with self.assertRaises(ValueError):  # EngNm and EngRpm lengths
+            SetupBatch(path).load()
+        path = self.writeFile("Setups.csv", "mcar (m)\n728\n")
+        with self.assertRaises(ValueError):  # unit
+            SetupBatch(path, self.SFL.setupDict).load()
+        path = self.writeFile("Setups.csv", "cl\n3.1\n")
+        with self.assertRaises(KeyError):  # unknown parameter
+            SetupBatch(path, self.SFL.setupDict).load()
+
+    # Test the sweep of a setup batch
+    def test_3(self):
+        path = self.writeFile("Setups.jsonl",
+                              json.dumps(self.SFL.setupDict) + "\n")
+        setupBatch = SetupBatch(path)
+        setupBatch.load()
+        sweepRunner = SweepRunner("SetupFile.json", "TrackFile.txt",
+                                  nWorkers=1, setupBatch=setupBatch)
+        resultsDict = sweepRunner.run()
+        actual = resultsDict["laptime"][0]
+        expected = 121.054  # laptime (as test_RunOpenLapSim)
+        self.assertEqual(actual, expected, "Error in test 3")
+
+    # Test a second load and a key missing in a JSON lines setup
+    def test_4(self):
+        path = self.writeFile("Setups4.csv", "clt\n3.1\n3.5\n")
+        setupBatch = SetupBatch(path, self.SFL.setupDict)
+        setupBatch.load()
+        setupBatch.load()
+        self.assertEqual(setupBatch.params, ["clt"], "Error in test 4")
+        self.assertEqual(setupBatch.variants()[1], {"clt": 3.5},
+                         "Error in test 4")
+        setupDict = dict(self.SFL.setupDict)
+        del setupDict["EngNm"]
+        lines = [json.dumps(self.SFL.setupDict), json.dumps(setupDict)]
+        path = self.writeFile("Setups4.jsonl", "\n".join(lines))
+        with self.assertRaisesRegex(ValueError, "Missing EngNm in setup 1"):
+            SetupBatch(path).load()
+
+
+if __name__ == '__main__':
+    unittest.main()
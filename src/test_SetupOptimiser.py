@@ -0,0 +1,78 @@
+"""Unit Test for SetupOptimiser.py"""
+
+
+import unittest
+import numpy as np
+from LapTimeSimCalc import LapTimeSimCalc
+from SetupFileLoader import SetupFileLoader
+from SetupOptimiser import SetupOptimiser, evaluateSetup, gearViolation
+
+
+class test_SetupOptimiser(unittest.TestCase):
+
+    setupFileName = "SetupFile.json"
+    trackFileNames = ["TrackFile.txt"]
+    SO = SetupOptimiser(setupFileName, trackFileNames, {"clt": (3.1, 3.5)},
+                        maxIter=2, popSize=4, seed=1)
+    SO.run()
+
+    # Test the optimised setup is not slower than the baseline
+    def test_1(self):
+        actual = self.SO.optimDict["objective"]
+        expected = 121.054  # laptime at clt = 3.1 (lower bound)
+        self.assertTrue(actual < expected, "Error in test 1")
+        self.assertEqual(self.SO.optimDict["setupDict"]["clt"],
+                         self.SO.optimDict["x"][0], "Error in test 1")
+
+    # Test the decreasing gear ratios constraint
+    def test_2(self):
+        setupDict = {"rGearRat": [10.0, 7.8, 6.1, 7.8, 5.2, 4.5, 4.0]}
+        self.assertEqual(gearViolation(setupDict, ["rGearRat[5]"]), 0,
+                         "Error in test 2")
+        self.assertAlmostEqual(gearViolation(setupDict, ["rGearRat[2]"]),
+                               1.7, msg="Error in test 2")
+
+    # Test the time budget stops the optimisation
+    def test_3(self):
+        sO = SetupOptimiser(self.setupFileName, self.trackFileNames,
+                            {"clt": (3.1, 3.5)}, maxIter=50, popSize=4,
+                            maxTime=0.0, seed=1)
+        sO.run()
+        self.assertTrue(sO.optimDict["bStopped"], "Error in test 3")
+        self.assertTrue(sO.optimDict["evalRate"] > 0, "Error in test 3")
+
+    # Test the evaluation cache is keyed on the setup, not only on x
+    def test_4(self):
+        s = SetupFileLoader("setupFiles/" + self.setupFileName)
+        s.loadJSON()
+        tracks = [np.column_stack(LapTimeSimCalc.loadTrack(
+            "trackFiles/" + self.trackFileNames[0]))]
+        x = [s.setupDict["cx"]]
+        first = evaluateSetup(x, ["cx"], s.setupDict, tracks, [1.0], 1)
+        other = evaluateSetup(x, ["afrcar"], dict(s.setupDict, clt=3.5),
+                              tracks, [1.0], 1)
+        again = evaluateSetup(x, ["cx"], s.setupDict, tracks, [1.0], 1)
+        self.assertNotEqual(other, first, "Error in test 4")
+        self.assertEqual(again, first, "Error in test 4")
+
+    # Test the time budget stops a minimize method
+    def test_5(self):
+        sO = SetupOptimiser(self.setupFileName, self.trackFileNames,
+                            {"clt": (3.1, 3.5)}, method="Powell",
+                            maxIter=50, maxTime=0.0)
+        sO.run()
+        self.assertTrue(sO.optimDict["bStopped"], "Error in test 5")
+        self.assertTrue(3.1 <= sO.optimDict["x"][0] <= 3.5, "Error in test 5")
+
+    # Test a method ignoring the bounds stays within them
+    def test_6(self):
+        sO = SetupOptimiser(self.setupFileName, self.trackFileNames,
+                            {"clt": (2.0, 2.5)}, method="Nelder-Mead",
+                            maxIter=5)
+        sO.run()
+        actual = sO.optimDict["setupDict"]["clt"]
+        self.assertTrue(2.0 <= actual <= 2.5, "Error in test 6")
+
+
+if __name__ == '__main__':
+    unittest.main()
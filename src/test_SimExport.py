@@ -0,0 +1,58 @@
+"""Unit Test for SimExport.py"""
+
+
+import tempfile
+import unittest
+import numpy as np
+from AccEnvCalc import AccEnvCalc
+from EnvelopeCache import EnvelopeCache
+from LapTimeSimCalc import LapTimeSimCalc
+from SetupFileLoader import SetupFileLoader
+from SimExport import SimExport
+
+
+class test_SimExport(unittest.TestCase):
+
+    s = SetupFileLoader("setupFiles/SetupFile.json")
+    s.loadJSON()
+    aE = AccEnvCalc(s.setupDict, bVerbose=0)
+    aE.Run()
+    lS = LapTimeSimCalc("trackFiles/TrackFile.txt", aE.accEnvDict, 10,
+                        bVerbose=0)
+    lS.RunFlyingLap()
+
+    # Test the npz export round trip of channels and metadata
+    def test_1(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            sE = SimExport(tempDir + "/")
+            exportFileName = sE.export(self.aE.accEnvDict,
+                                       self.lS.lapTimeSimDict,
+                                       self.s.setupDict, "TrackFile.txt")
+            channels, metadata = SimExport.readExportFile(exportFileName)
+        for name in ("vcar", "vxacc", "vxdec", "vxcor", "time"):
+            np.testing.assert_array_equal(channels[name],
+                                          self.lS.lapTimeSimDict[name],
+                                          "Error in test 1")
+        np.testing.assert_array_equal(channels["env_axacc"],
+                                      self.aE.accEnvDict["axacc"],
+                                      "Error in test 1")
+        self.assertEqual(metadata["setupHash"],
+                         EnvelopeCache.setupHash(self.s.setupDict),
+                         "Error in test 1")
+        self.assertEqual(metadata["laptime"], 121.054, "Error in test 1")
+
+    # Test the legacy text export and the unique file names
+    def test_2(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            sE = SimExport(tempDir + "/", ".txt")
+            first = sE.export(self.aE.accEnvDict, self.lS.lapTimeSimDict)
+            second = sE.export(self.aE.accEnvDict, self.lS.lapTimeSimDict)
+            channels, metadata = SimExport.readExportFile(second)
+        self.assertNotEqual(first, second, "Error in test 2")
+        np.testing.assert_array_equal(channels["vcar"],
+                                      self.lS.lapTimeSimDict["vcar"],
+                                      "Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
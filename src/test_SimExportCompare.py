@@ -0,0 +1,53 @@
+"""Unit Test for utilities/SimExportCompare.py"""
+
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from SimExport import SimExport
+from utilities import SimExportCompare
+
+
+class test_SimExportCompare(unittest.TestCase):
+
+    # three synthetic exports on different distance grids
+    tempDir = tempfile.TemporaryDirectory()
+    sims = []
+    for name, dist, vcar in (
+            ("A", np.linspace(0, 1000, 101), lambda d: 50 + 0*d),
+            ("B", np.linspace(0, 1000, 151), lambda d: 40 + 0*d),
+            ("C", np.linspace(0, 1000, 77), lambda d: 50 + 10*d/1000)):
+        sims.append(SimExport.writeExportFile(
+            os.path.join(tempDir.name, name + ".npz"),
+            {"dist": dist, "vcar": vcar(dist)}, {}))
+
+    # Test the resampled speed deltas to the reference
+    def test_1(self):
+        distGrid, vCars = SimExportCompare.resampleExports(
+            SimExportCompare.loadExports(self.sims))
+        np.testing.assert_array_equal(distGrid, np.linspace(0, 1000, 101),
+                                      "Error in test 1")
+        compareDict = SimExportCompare.compareExports(distGrid, vCars)
+        np.testing.assert_allclose(compareDict["DvCar"][1], -10,
+                                   err_msg="Error in test 1")
+        np.testing.assert_allclose(compareDict["DvCar"][2],
+                                   10*distGrid/1000, atol=1e-12,
+                                   err_msg="Error in test 1")
+
+    # Test the delta laptimes and the ranking
+    def test_2(self):
+        compareDict = SimExportCompare.simRank(self.sims)
+        self.assertAlmostEqual(compareDict["laptime"][0], 20.0, places=9,
+                               msg="Error in test 2")
+        self.assertAlmostEqual(compareDict["Dlaptime"][1], 5.0, places=9,
+                               msg="Error in test 2")
+        self.assertEqual(list(compareDict["rank"]), [2, 0, 1],
+                         "Error in test 2")
+        np.testing.assert_allclose(compareDict["Dtime"][:, -1],
+                                   compareDict["Dlaptime"],
+                                   err_msg="Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Unit Test for SimResults.py"""
+
+
+import unittest
+import numpy as np
+from SetupFileLoader import SetupFileLoader
+from AccEnvCalc import AccEnvCalc
+from LapTimeSimCalc import LapTimeSimCalc
+from PostProc import PostProc
+from SimResults import AccEnvResult, LapResult, dictBytes
+
+
+class test_SimResults(unittest.TestCase):
+
+    setupPath = "setupFiles/SetupFile.json"
+    SFL = SetupFileLoader(setupPath)
+    SFL.loadJSON()
+    AEC = AccEnvCalc(SFL.setupDict)
+    AEC.Run()
+    trackPath = "trackFiles/TrackFile.txt"
+    LTSC = LapTimeSimCalc(trackPath, AEC.accEnvDict, 10)
+    LTSC.Run()
+
+    # Test the result types hold the same channels and scalars as the dicts
+    def test_1(self):
+        accEnvResult = AccEnvResult.fromDict(self.AEC.accEnvDict)
+        lapResult = LapResult.fromDict(self.LTSC.lapTimeSimDict)
+        for name in ("vxvect", "axacc", "nGear", "Fxdrive", "GGVfull"):
+            np.testing.assert_array_equal(accEnvResult[name],
+                                          self.AEC.accEnvDict[name],
+                                          "Error in test 1")
+        for name in ("vcar", "dist", "time", "vxacc", "vxdec", "vxcor"):
+            np.testing.assert_array_equal(lapResult[name],
+                                          self.LTSC.lapTimeSimDict[name],
+                                          "Error in test 1")
+        self.assertEqual(lapResult["laptime"],
+                         self.LTSC.lapTimeSimDict["laptime"],
+                         "Error in test 1")
+        self.assertFalse(hasattr(lapResult, "__dict__"), "Error in test 1")
+
+    # Test float32 and scalars only are smaller than the dicts
+    def test_2(self):
+        lapDictBytes = dictBytes(self.LTSC.lapTimeSimDict)
+        lap64 = LapResult.fromDict(self.LTSC.lapTimeSimDict)
+        lap32 = LapResult.fromDict(self.LTSC.lapTimeSimDict, np.float32)
+        lapScalars = LapResult.fromDict(self.LTSC.lapTimeSimDict, bTraces=0)
+        self.assertLess(lap64.nbytes(), lapDictBytes, "Error in test 2")
+        self.assertLess(lap32.nbytes(), 0.6*lap64.nbytes(), "Error in test 2")
+        self.assertLess(lapScalars.nbytes(), 200, "Error in test 2")
+        self.assertEqual(lapScalars.vcarmax, lap64.vcarmax, "Error in test 2")
+        with self.assertRaises(KeyError):
+            lapScalars["vcar"]
+
+    # Test PostProc takes the result types
+    def test_3(self):
+        postProc = PostProc(AccEnvResult.fromDict(self.AEC.accEnvDict),
+                            LapResult.fromDict(self.LTSC.lapTimeSimDict,
+                                               np.float32))
+        np.testing.assert_array_equal(postProc.GGVacc, self.LTSC.GGVacc,
+                                      "Error in test 3")
+        self.assertAlmostEqual(postProc.vcar[100],
+                               self.LTSC.lapTimeSimDict["vcar"][100],
+                               places=4, msg="Error in test 3")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Unit Test for StageTimer.py"""
+
+
+import time
+import unittest
+from StageTimer import StageTimer
+
+
+class test_StageTimer(unittest.TestCase):
+
+    # Test time and call count of a stage
+    def test_1(self):
+        timer = StageTimer()
+        for _ in range(3):
+            with timer.stage("sleep"):
+                time.sleep(0.01)
+        actual = timer.timingDict["sleep"]["calls"]
+        expected = 3
+        self.assertEqual(actual, expected, "Error in test 1")
+        self.assertTrue(timer.timingDict["sleep"]["time"] >= 0.03,
+                        "Error in test 1")
+
+    # Test the stage is recorded when it raises
+    def test_2(self):
+        timer = StageTimer()
+        with self.assertRaises(ValueError):
+            with timer.stage("fail"):
+                raise ValueError
+        self.assertEqual(timer.timingDict["fail"]["calls"], 1,
+                         "Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
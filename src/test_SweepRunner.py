@@ -0,0 +1,61 @@
+"""Unit Test for SweepRunner.py"""
+
+
+import unittest
+import numpy as np
+from SweepRunner import SweepRunner
+
+
+class test_SweepRunner(unittest.TestCase):
+
+    setupFileName = "SetupFile.json"
+    trackFileName = "TrackFile.txt"
+    paramRanges = {"clt": [3.1, 3.5], "rGearRat[6]": [4.0]}
+    SR = SweepRunner(setupFileName, trackFileName, paramRanges,
+                     nWorkers=2, bTraces=1)
+    SR.run()
+
+    # Test the full factorial variants
+    def test_1(self):
+        variants = SweepRunner.fullFactorial({"clt": [1, 2], "cx": [3, 4]})
+        actual = len(variants)
+        expected = 4
+        self.assertEqual(actual, expected, "Error in test 1")
+
+    # Test array entries are set by index on a copy of the setup
+    def test_2(self):
+        setupDict = {"rGearRat": [10.0, 7.8], "clt": 3.1}
+        newSetupDict = SweepRunner.applyParams(setupDict, {"rGearRat[1]": 5})
+        self.assertEqual(newSetupDict["rGearRat"], [10.0, 5.0],
+                         "Error in test 2")
+        self.assertEqual(setupDict["rGearRat"], [10.0, 7.8],
+                         "Error in test 2")
+        with self.assertRaises(KeyError):
+            SweepRunner.applyParams(setupDict, {"cl": 3.0})
+
+    # Test the baseline variant laptime from the process pool
+    def test_3(self):
+        actual = self.SR.resultsDict["laptime"][0]
+        expected = 121.054  # laptime (as test_RunOpenLapSim)
+        self.assertEqual(actual, expected, "Error in test 3")
+
+    # Test more downforce is faster and the traces table shape
+    def test_4(self):
+        laptime = self.SR.resultsDict["laptime"]
+        self.assertTrue(laptime[1] < laptime[0], "Error in test 4")
+        actual = np.shape(self.SR.resultsDict["vcar"])
+        expected = (2, len(self.SR.resultsDict["dist"]))
+        self.assertEqual(actual, expected, "Error in test 4")
+
+    # Test the batch solver laptimes (tol 0.05 s)
+    def test_5(self):
+        sR = SweepRunner(self.setupFileName, self.trackFileName,
+                         self.paramRanges, bBatch=1)
+        sR.run()
+        np.testing.assert_allclose(sR.resultsDict["laptime"],
+                                   self.SR.resultsDict["laptime"], atol=0.05,
+                                   err_msg="Error in test 5")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Unit Test for utilities/TrackFileBuilder.py"""
+
+
+import csv
+import os
+import tempfile
+import unittest
+import numpy as np
+from utilities.TrackFileBuilder import TrackFileBuilder
+
+
+class test_TrackFileBuilder(unittest.TestCase):
+
+    telemetryFileName = "utilities/telemetryFile.csv"
+    firstLine, rowDist, rowSpeed, rowGlat = 2, 1, 2, 8
+    tempDir = tempfile.TemporaryDirectory()
+
+    def writeLog(self, dist):
+        """ telemetry log (two header lines) with the given distances """
+        path = os.path.join(self.tempDir.name, "log.csv")
+        with open(path, "w") as f:
+            f.write('"Time","Distance","Ground Speed"\n"s","m","km/h"\n')
+            for i, d in enumerate(dist):
+                f.write('"%.1f","%g","%.1f"\n' % (0.1*i, d, 100 + d % 7))
+        return path
+
+    # Test the chunked loader against the csv.reader loader
+    def test_1(self):
+        expected = ([], [], [])
+        with open(self.telemetryFileName) as csvDataFile:
+            for line, row in enumerate(csv.reader(csvDataFile)):
+                if line > self.firstLine:
+                    expected[0].append(float(row[self.rowDist]))
+                    expected[1].append(float(row[self.rowSpeed]))
+                    expected[2].append(float(row[self.rowGlat]))
+        tFB = TrackFileBuilder(self.telemetryFileName, self.firstLine,
+                               self.rowDist, self.rowSpeed, self.rowGlat)
+        chunks = list(tFB.iterTelemetryChunks(chunkSize=100))
+        self.assertGreater(len(chunks), 1, "Error in test 1")
+        actual = tuple(np.concatenate(channel) for channel in zip(*chunks))
+        for a, e in zip(actual, expected):
+            np.testing.assert_array_equal(a, e, "Error in test 1")
+        for a, e in zip(tFB.loadTelemetryFile(), expected):
+            np.testing.assert_array_equal(a, e, "Error in test 1")
+
+    # Test the laps split across the chunk boundaries, short laps skipped
+    def test_2(self):
+        dist = (list(range(0, 150)) + list(range(0, 50))  # reset at 150
+                + list(range(0, 5)) + list(range(0, 60)))  # 5 points lap
+        tFB = TrackFileBuilder(self.writeLog(dist), 1, 1, 2, 2)
+        for chunkSize in (50, 75, 1000):
+            laps = list(tFB.iterTelemetryLaps(chunkSize))
+            actual = [list(lap[0]) for lap in laps]
+            expected = [list(range(0, 150)), list(range(0, 50)),
+                        list(range(0, 5)), list(range(0, 60))]
+            self.assertEqual(actual, expected, "Error in test 2")
+        os.makedirs(os.path.join(self.tempDir.name, "trackFiles"),
+                    exist_ok=True)
+        tFB.trackFilesPath = self.tempDir.name
+        newTrackFileNames = tFB.runLaps(chunkSize=75)
+        actual = [name[-9:] for name in newTrackFileNames]
+        expected = ["_Lap1.txt", "_Lap2.txt", "_Lap4.txt"]
+        self.assertEqual(actual, expected, "Error in test 2")
+
+    # Test the curvature of a constant radius arc and of a straight
+    def test_3(self):
+        radius, speed = 100.0, 72.0  # [m], [km/h]
+        glat = np.power(speed/3.6, 2)/radius/9.81  # [g]
+        dist = np.arange(0, 100.0)
+        actual = TrackFileBuilder.calculateCurvature(
+            dist, np.full(100, speed), np.full(100, glat))
+        np.testing.assert_allclose(actual, 1/radius, err_msg="Error in test 3")
+        actual = TrackFileBuilder.calculateCurvature(
+            dist, np.full(100, speed), np.zeros(100))
+        np.testing.assert_array_equal(actual, 0, "Error in test 3")
+        # standing car: speed floored at vxMin, curvature clipped
+        actual = TrackFileBuilder.calculateCurvature([0], [0], [-1])
+        self.assertEqual(actual[0], -0.2, "Error in test 3")
+
+    # Test the uniform resampling keeps the ends and the spacing
+    def test_4(self):
+        telemDist = np.array([3.0, 4.5, 20.0, 51.0, 77.7, 997.0])
+        curvature = telemDist/1000
+        dist, curv = TrackFileBuilder.resampleTrack(telemDist, curvature,
+                                                    10.0)
+        self.assertEqual((dist[0], dist[-1]), (3.0, 997.0), "Error in test 4")
+        step = np.diff(dist)
+        np.testing.assert_allclose(step, step[0], err_msg="Error in test 4")
+        self.assertTrue(9.9 < step[0] <= 10.0, "Error in test 4")
+        np.testing.assert_allclose(curv, dist/1000, err_msg="Error in test 4")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Unit Test for TrackFileLoader.py"""
+
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from TrackFileLoader import TrackFileLoader
+
+
+class test_TrackFileLoader(unittest.TestCase):
+
+    trackPath = "trackFiles/TrackFile.txt"
+    tempDir = tempfile.TemporaryDirectory()
+    npyPath = os.path.join(tempDir.name, "TrackFile.npy")
+    TrackFileLoader.convertTrackFile(trackPath, npyPath)
+
+    # Test the binary track is the same as the text track
+    def test_1(self):
+        dist, curv = TrackFileLoader(self.trackPath).load()
+        distNpy, curvNpy = TrackFileLoader(self.npyPath).load()
+        np.testing.assert_array_equal(distNpy, dist, "Error in test 1")
+        np.testing.assert_array_equal(curvNpy, curv, "Error in test 1")
+
+    # Test the binary track is memory mapped
+    def test_2(self):
+        dist, curv = TrackFileLoader.readTrackFile(self.npyPath)
+        self.assertIsInstance(curv, np.memmap, "Error in test 2")
+
+    # Test the cache returns the same arrays until the file changes
+    def test_3(self):
+        txtPath = os.path.join(self.tempDir.name, "TrackFile.txt")
+        TrackFileLoader.writeTrackFile(txtPath, [0, 10, 20], [0, 0.1, 0])
+        dist1, curv1 = TrackFileLoader(txtPath).load()
+        dist2, curv2 = TrackFileLoader(txtPath).load()
+        self.assertIs(dist1, dist2, "Error in test 3")
+        TrackFileLoader.writeTrackFile(txtPath, [0, 10], [0, 0.2])
+        stat = os.stat(txtPath)
+        os.utime(txtPath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        dist3, curv3 = TrackFileLoader(txtPath).load()
+        self.assertEqual(list(curv3), [0, 0.2], "Error in test 3")
+
+    # Test a file rewritten with the same mtime is read again
+    def test_4(self):
+        txtPath = os.path.join(self.tempDir.name, "TrackFile4.txt")
+        TrackFileLoader.writeTrackFile(txtPath, [0, 10], [0, 0.1])
+        stat = os.stat(txtPath)
+        TrackFileLoader(txtPath).load()
+        TrackFileLoader.writeTrackFile(txtPath, [0, 10], [0, 0.2])
+        os.utime(txtPath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        dist, curv = TrackFileLoader(txtPath).load()
+        self.assertEqual(list(curv), [0, 0.2], "Error in test 4")
+
+    # Test a cache hit of an older file does not read the file
+    def test_5(self):
+        txtPath = os.path.join(self.tempDir.name, "TrackFile5.txt")
+        TrackFileLoader.writeTrackFile(txtPath, [0, 10], [0, 0.1])
+        stat = os.stat(txtPath)
+        os.utime(txtPath, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**10))
+        TrackFileLoader(txtPath).load()
+        calls = []
+        contentHash = TrackFileLoader.contentHash
+        TrackFileLoader.contentHash = staticmethod(
+            lambda path: calls.append(path))
+        try:
+            dist, curv = TrackFileLoader(txtPath).load()
+        finally:
+            TrackFileLoader.contentHash = staticmethod(contentHash)
+        self.assertEqual(calls, [], "Error in test 5")
+        self.assertEqual(list(curv), [0, 0.1], "Error in test 5")
+
+
+if __name__ == '__main__':
+    unittest.main()
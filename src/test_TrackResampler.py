@@ -0,0 +1,42 @@
+"""Unit Test for TrackResampler.py"""
+
+
+import unittest
+import numpy as np
+from AccEnvCalc import AccEnvCalc
+from SetupFileLoader import SetupFileLoader
+from TrackResampler import TrackResampler
+
+
+class test_TrackResampler(unittest.TestCase):
+
+    s = SetupFileLoader("setupFiles/SetupFile.json")
+    s.loadJSON()
+    aE = AccEnvCalc(s.setupDict, bVerbose=0)
+    aE.Run()
+    TR = TrackResampler("trackFiles/TrackFile.txt")
+    TR.run(aE.accEnvDict, bKernel=1)
+
+    # Test the adaptive grid error is lower than the track file one
+    def test_1(self):
+        r = self.TR.resampleDict
+        self.assertTrue(abs(r["error"]) < 0.1, "Error in test 1")
+        self.assertTrue(abs(r["error"]) < abs(r["errorInput"]) / 5,
+                        "Error in test 1")
+        self.assertTrue(r["nPoints"] < r["nPointsRef"] / 4, "Error in test 1")
+
+    # Test the grid follows the local step and keeps the apexes
+    def test_2(self):
+        distSupport = np.linspace(0, 100, 201)
+        step = np.where(distSupport < 50, 10.0, 2.0)
+        distGrid = TrackResampler.equidistribute(distSupport, step)
+        ds = np.diff(distGrid)
+        self.assertTrue(np.allclose(ds[:4], 10.0), "Error in test 2")
+        self.assertTrue(np.allclose(ds[-20:], 2.0), "Error in test 2")
+        self.assertTrue(np.all(np.isin(self.TR.apexDist(),
+                                       self.TR.resampleDict["dist"])),
+                        "Error in test 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
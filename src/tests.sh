@@ -9,9 +9,50 @@ python3 test_LapTimeSimCalc.py
 t3=$?
 python3 test_RunOpenLapSim.py
 t4=$?
+python3 test_GGVSurface.py
+t5=$?
+python3 test_SweepRunner.py
+t6=$?
+python3 test_TrackFileLoader.py
+t7=$?
+python3 test_LapKernel.py
+t8=$?
+python3 test_RunBenchmarks.py
+t9=$?
+python3 test_StageTimer.py
+t10=$?
+python3 test_EnvelopeCache.py
+t11=$?
+python3 test_SeasonRunner.py
+t12=$?
+python3 test_SimExport.py
+t13=$?
+python3 test_TrackResampler.py
+t14=$?
+python3 test_BatchLapSolver.py
+t15=$?
+python3 test_SensitivityRunner.py
+t16=$?
+python3 test_SetupOptimiser.py
+t17=$?
+python3 test_SimResults.py
+t18=$?
+python3 test_SetupBatch.py
+t19=$?
+python3 test_SimExportCompare.py
+t20=$?
+python3 test_TrackFileBuilder.py
+t21=$?
 
 # based on the output code $? (0 is OK else error)
-if [ $t1 -ne 0 ] || [ $t2 -ne 0 ] || [ $t3 -ne 0 ] || [ $t4 -ne 0 ]; then
+if [ $t1 -ne 0 ] || [ $t2 -ne 0 ] || [ $t3 -ne 0 ] || [ $t4 -ne 0 ] ||
+   [ $t5 -ne 0 ] || [ $t6 -ne 0 ] || [ $t7 -ne 0 ] || [ $t8 -ne 0 ] ||
+   [ $t9 -ne 0 ] || [ $t10 -ne 0 ] || [ $t11 -ne 0 ] ||
+   [ $t12 -ne 0 ] || [ $t13 -ne 0 ] ||
+   [ $t14 -ne 0 ] || [ $t15 -ne 0 ] ||
+   [ $t16 -ne 0 ] || [ $t17 -ne 0 ] || [ $t18 -ne 0 ] ||
+   [ $t19 -ne 0 ] || [ $t20 -ne 0 ] ||
+   [ $t21 -ne 0 ]; then
 	cat < "NOK: Some test failed"
 	exit 1
 else
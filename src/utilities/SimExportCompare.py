@@ -2,7 +2,12 @@
 ---------------------------
 SimExportCompare - OLS
 ---------------------------
-This routine compares two SimExport.txt 
+This routine compares simulation exports (SimExport .npz/.h5/.parquet or
+the legacy SimExport.txt).
+
+The N exports are resampled on a common distance grid and compared, all
+at once, to a reference lap: delta speed and cumulative delta time traces,
+delta laptime and ranking (see compareExports).
 
 ---------------------------
 @autor: Davide Strassera
@@ -10,12 +15,16 @@ This routine compares two SimExport.txt
 by Python 3.7
 ---------------------------
 """
-import csv
 from pathlib import Path
 import os
-import matplotlib.pyplot as plt
+import sys
 import numpy as np
 
+# import packages (OLP)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from LapTimeSimCalc import LapTimeSimCalc  # noqa: E402
+from SimExport import SimExport  # noqa: E402
+
 
 # ----------------------------------------------------------------------------
 
@@ -35,26 +44,96 @@ def calcLapTime(vCar, dist):
         - laptime of type int, is the laptime in sec.
     """
 
-    timestep = np.zeros(len(dist))
-    time = np.zeros(len(dist))
-    for i in range(len(dist)-1):
-        timestep[i] = (dist[i+1]-dist[i])/vCar[i]
-        time[i] = sum(timestep)
-
-    laptime = np.round(max(time), 3)
+    laptime = LapTimeSimCalc.calcLapTime(vCar, dist)[1]
     return laptime
 
 
+def loadExports(sims):
+    """ This function loads the speed traces of simulation exports.
+
+        inputs:
+        - sims of type list of string, are the export file names (in
+          "src/exportFiles" or paths).
+
+        outputs:
+        - exports of type list of (dist, vCar) arrays.
+    """
+
+    exports = []
+    for sim in sims:
+        path = sim if os.path.exists(sim) else PATH+"/exportFiles/"+sim
+        channels = SimExport.readExportFile(path)[0]
+        exports.append((channels["dist"], channels["vcar"]))
+    return exports
+
+
+def resampleExports(exports, distGrid=None):
+    """ This function resamples the speed traces on a common distance grid.
+
+        inputs:
+        - exports of type list of (dist, vCar) arrays.
+        - distGrid of type array, is the common grid in m (default: the
+          first export distance, within the distance covered by all).
+
+        outputs:
+        - distGrid of type array, shape (M,).
+        - vCars of type array, shape (N, M), one speed trace per row.
+    """
+
+    if distGrid is None:
+        distStart = max(dist[0] for dist, _ in exports)
+        distEnd = min(dist[-1] for dist, _ in exports)
+        dist0 = exports[0][0]
+        distGrid = dist0[(dist0 >= distStart) & (dist0 <= distEnd)]
+    vCars = np.empty((len(exports), len(distGrid)))
+    for i, (dist, vCar) in enumerate(exports):
+        vCars[i] = np.interp(distGrid, dist, vCar)
+    return distGrid, vCars
+
+
+def compareExports(distGrid, vCars, iRef=0):
+    """ This function compares all the speed traces to a reference one.
+
+        inputs:
+        - distGrid of type array, shape (M,), is the distance in m.
+        - vCars of type array, shape (N, M), are the speed traces in m/s.
+        - iRef of type int, is the row of the reference lap.
+
+        outputs:
+        - compareDict of type dict with:
+            - "time": cumulative time traces (N, M) [s]
+            - "DvCar": delta speed to the reference (N, M) [m/s]
+            - "Dtime": cumulative delta time to the reference (N, M) [s]
+            - "laptime", "Dlaptime": (N,) [s]
+            - "rank": rows sorted from the fastest lap
+    """
+
+    timestep = np.diff(distGrid)/vCars[:, :-1]
+    time = np.zeros(vCars.shape)
+    np.cumsum(timestep, axis=1, out=time[:, 1:])
+    laptime = time[:, -1]
+    compareDict = {
+        "dist": distGrid,
+        "vCar": vCars,
+        "time": time,
+        "DvCar": vCars - vCars[iRef],
+        "Dtime": time - time[iRef],
+        "laptime": laptime,
+        "Dlaptime": laptime - laptime[iRef],
+        "rank": np.argsort(laptime, kind="stable"),
+    }
+    return compareDict
+
+
 def plot_vCar(vCar1, dist1, vCar2, dist2, bKph):
     """ This funtion plots two speed traces"""
+    import matplotlib.pyplot as plt  # imported on demand
 
     if bKph == 1:
         k = 3.6
     else:
         k = 1
-    DvCar = np.zeros(len(dist1))
-    for i in range(len(dist1)):
-        DvCar[i] = vCar1[i]-vCar2[i]
+    DvCar = vCar1 - np.interp(dist1, dist2, vCar2)
 
     plt.figure(1)
     plt.title("Sim Compare")
@@ -73,20 +152,12 @@ def simCompare(sim1, sim2, bKph=1):
         computes the delta speed and plot the results.
 
         inputs:
-        - sim1 of type string, is the name of the first SimExport...txt;
-        - sim2 of type string, is the name of the second SimExport...txt;
+        - sim1 of type string, is the name of the first SimExport file;
+        - sim2 of type string, is the name of the second SimExport file;
         - bKph of type int [0, 1], defines if the y axle is in kph or m/s.
     """
 
-    path1 = PATH+"/exportFiles/"+sim1
-    file1 = np.loadtxt(path1)
-    dist1 = file1[:, 0]
-    vCar1 = file1[:, 1]
-
-    path2 = PATH+"/exportFiles/"+sim2
-    file2 = np.loadtxt(path2)
-    dist2 = file2[:, 0]
-    vCar2 = file2[:, 1]
+    (dist1, vCar1), (dist2, vCar2) = loadExports([sim1, sim2])
 
     # print delta laptime
     laptime1 = calcLapTime(vCar1, dist1)
@@ -100,12 +171,34 @@ def simCompare(sim1, sim2, bKph=1):
     plot_vCar(vCar1, dist1, vCar2, dist2, bKph)
 
 
+def simRank(sims, iRef=0):
+    """ This function ranks simulation exports against a reference one.
+
+        inputs:
+        - sims of type list of string, are the export file names;
+        - iRef of type int, is the index of the reference export in sims.
+
+        outputs:
+        - compareDict of type dict (see compareExports).
+    """
+
+    distGrid, vCars = resampleExports(loadExports(sims))
+    compareDict = compareExports(distGrid, vCars, iRef)
+    for i in compareDict["rank"]:
+        print(sims[i], ": ", round(compareDict["laptime"][i], 3), "[s]",
+              "delta: ", round(compareDict["Dlaptime"][i], 3), "[s]")
+    return compareDict
+
+
 # ----------------------------------------------------------------------------
 
 
 if __name__ == '__main__':
 
-    sim1 = "SimExport_Oct-28-2020.txt"
-    sim2 = "SimExport_Oct-28-2020.txt"
+    if len(sys.argv) > 2:
+        simRank(sys.argv[1:])  # rank all, the first one is the reference
+    else:
+        sim1 = "SimExport_Oct-28-2020.txt"
+        sim2 = "SimExport_Oct-28-2020.txt"
 
-    simCompare(sim1, sim2, bKph=1)
+        simCompare(sim1, sim2, bKph=1)
@@ -11,10 +11,17 @@ Steps:
             - if different units change the convertions param
     2 - Run the routine.
     3 - The TrackFile.txt generated is saved in \src\trackFile
+        (or a binary TrackFile.npy with trackFileExt=".npy", see
+        TrackFileLoader)
 
 Options:
     4 - Adjust the filter Cutoff frequency, which is applied to smooth noize
         from Glat and Speed telemetry data if necessary (Wn).
+    5 - Large multi-lap logs: runLaps() streams the csv in chunks of rows,
+        parsing only the Dist/Speed/Glat columns (pandas if installed, else
+        the csv module), splits the laps where the distance resets and
+        creates one track file per lap, with bounded memory. Laps too short
+        for the filter (MIN_LAP_POINTS) are skipped.
 
 ---------------------------
 @autor: Davide Strassera
@@ -26,52 +33,108 @@ by Python 3.7
 
 # import packages
 import csv
-import math as mt
+import itertools
 import numpy as np
-import scipy.signal as signal
-import matplotlib.pyplot as plt
 import datetime
 from pathlib import Path
 import os
+import sys
+
+# import packages (OLP)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from TrackFileLoader import TrackFileLoader  # noqa: E402
+
+FILTER_N = 2  # Buterworth filter order
+# filtfilt needs more points than its padding (3*(FILTER_N+1))
+MIN_LAP_POINTS = 3*(FILTER_N+1) + 1
 
 
 class TrackFileBuilder:
 
     def __init__(self, telemetryFileName, firstLine,
-                 rowDist, rowSpeed, rowGlat):
+                 rowDist, rowSpeed, rowGlat, trackFileExt=".txt",
+                 ds=None):
         # inputs
         self.telemetryFileName = telemetryFileName
         self.firstLine = firstLine
         self.rowDist = rowDist
         self.rowSpeed = rowSpeed
         self.rowGlat = rowGlat
+        self.trackFileExt = trackFileExt  # ".txt" or ".npy"
+        self.ds = ds  # uniform distance step [m] (None: telemetry points)
         self.cwd = os.getcwd()
         self.trackFilesPath = str(Path(self.cwd).parent)
 
     def loadTelemetryFile(self):
+        chunks = list(self.iterTelemetryChunks())
+        telemDist = np.concatenate([chunk[0] for chunk in chunks])
+        telemSpeed = np.concatenate([chunk[1] for chunk in chunks])
+        telemGlat = np.concatenate([chunk[2] for chunk in chunks])
+        return telemDist, telemSpeed, telemGlat
 
-        telemDist = []
-        telemSpeed = []
-        telemGlat = []
-
+    def iterTelemetryChunks(self, chunkSize=100000):
+        """ yields (dist, speed, glat) arrays of up to chunkSize rows, only
+            the three columns are parsed (rows up to firstLine skipped) """
+        usecols = [self.rowDist, self.rowSpeed, self.rowGlat]
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            reader = pd.read_csv(self.telemetryFileName, header=None,
+                                 skiprows=self.firstLine+1, usecols=usecols,
+                                 dtype=float, chunksize=chunkSize)
+            for chunk in reader:
+                data = chunk[usecols].to_numpy()
+                yield data[:, 0], data[:, 1], data[:, 2]
+            return
         with open(self.telemetryFileName) as csvDataFile:
-            csvReader = csv.reader(csvDataFile)
-            line = 0
-            for row in csvReader:
-                if line > self.firstLine:
-                    telemDist.append(float(row[self.rowDist]))  # 1
-                    telemSpeed.append(float(row[self.rowSpeed]))  # 2
-                    telemGlat.append(float(row[self.rowGlat]))  # 8
-                    line += 1
-                else:
-                    line += 1
+            lines = itertools.islice(csvDataFile, self.firstLine+1, None)
+            csvReader = csv.reader(lines)
+            while True:
+                rows = list(itertools.islice(csvReader, chunkSize))
+                if not rows:
+                    break
+                data = np.asarray([[row[i] for i in usecols]
+                                   for row in rows if row],
+                                  dtype=float).reshape(-1, 3)
+                yield data[:, 0], data[:, 1], data[:, 2]
 
-        return telemDist, telemSpeed, telemGlat
+    def iterTelemetryLaps(self, chunkSize=100000):
+        """ yields (dist, speed, glat) arrays per lap, a new lap starts
+            where the distance decreases (reset at the start line) """
+        def mergeChunks(lapChunks):
+            return tuple(np.concatenate(channel)
+                         for channel in zip(*lapChunks))
+
+        lapChunks = []  # pieces of the current lap
+        lastDist = None
+        for dist, speed, glat in self.iterTelemetryChunks(chunkSize):
+            if len(dist) == 0:
+                continue
+            iStarts = list(np.flatnonzero(np.diff(dist) < 0) + 1)
+            if lastDist is not None and dist[0] < lastDist:
+                iStarts.insert(0, 0)  # reset between two chunks
+            iPrev = 0
+            for iStart in iStarts:
+                if iStart > iPrev:
+                    lapChunks.append((dist[iPrev:iStart],
+                                      speed[iPrev:iStart],
+                                      glat[iPrev:iStart]))
+                if lapChunks:
+                    yield mergeChunks(lapChunks)
+                lapChunks = []
+                iPrev = iStart
+            lapChunks.append((dist[iPrev:], speed[iPrev:], glat[iPrev:]))
+            lastDist = dist[-1]
+        if lapChunks:
+            yield mergeChunks(lapChunks)
 
     @staticmethod
     def filterTelemetryData(telemData, bplot):
+        import scipy.signal as signal  # imported on demand
         # First, design the Buterworth filter
-        N = 2    # Filter order
+        N = FILTER_N    # Filter order
         Wn = 0.1  # Cutoff frequency
         B, A = signal.butter(N, Wn, output='ba')
 
@@ -79,6 +142,7 @@ class TrackFileBuilder:
         telemDataFilt = signal.filtfilt(B, A, telemData)
 
         if bplot == 1:
+            import matplotlib.pyplot as plt
             plt.figure(1)
             plt.title("Data Filtering")
             plt.plot(telemData, 'r-', label="row data")
@@ -90,49 +154,58 @@ class TrackFileBuilder:
         return telemDataFilt
 
     @staticmethod
-    def calculateCurvature(telemDist, telemSpeed, telemGlatFilt):
+    def calculateCurvature(telemDist, telemSpeed, telemGlatFilt,
+                           vxMin=1.0, curvMax=0.2):
+        """ curvature [1/m] of the whole trace: ay = v^2*curv, with the
+            speed floored at vxMin [m/s] (no division by zero on stops)
+            and |curv| clipped at curvMax (5 m radius). A straight line
+            (glat = 0) has curvature 0. """
         # units conversion
         speedToms = 1/3.6  # kph to ms
         glatToms2 = 9.81  # g to ms2
 
-        curvature = []
-        radius = []
+        vx = np.maximum(np.asarray(telemSpeed, dtype=float)*speedToms, vxMin)
+        ay = np.asarray(telemGlatFilt, dtype=float)*glatToms2
+        curvature = np.clip(ay/np.power(vx, 2), -curvMax, curvMax)
+        return curvature
 
-        for i in range(len(telemDist)):
-            # ay = (v^2)/R --> R = (v^2)/ay
-            try:
-                radius.append(mt.pow((telemSpeed[i]*speedToms), 2)
-                              / (telemGlatFilt[i]*glatToms2))
-            except ZeroDivisionError:
-                radius.append(1000)  # if it is straight line
-            curvature.append(1/radius[i])
+    @staticmethod
+    def resampleTrack(telemDist, curvature, ds):
+        """ resamples the track on a uniform distance step (ds [m] or the
+            closest smaller step keeping the first and last distance) """
+        nSteps = max(1, int(np.ceil((telemDist[-1] - telemDist[0])/ds)))
+        dist = np.linspace(telemDist[0], telemDist[-1], nSteps + 1)
+        return dist, np.interp(dist, telemDist, curvature)
 
-        return curvature
+    def buildTrack(self, telemDist, telemSpeed, telemGlat, bplot=0):
+        """ returns the track (dist, curv) of the telemetry arrays, it can
+            be passed to LapTimeSimCalc as np.column_stack((dist, curv)) """
+        telemSpeedFilt = TrackFileBuilder.filterTelemetryData(telemSpeed, 0)
+        telemGlatFilt = TrackFileBuilder.filterTelemetryData(telemGlat, bplot)
+        curvature = TrackFileBuilder.calculateCurvature(telemDist,
+                                                        telemSpeedFilt,
+                                                        telemGlatFilt)
+        if self.ds is not None:
+            return TrackFileBuilder.resampleTrack(telemDist, curvature,
+                                                  self.ds)
+        return np.asarray(telemDist, dtype=float), curvature
 
     @staticmethod
-    def createNewTrackFile(telemDist, curvature, trackFilesPath):
+    def createNewTrackFile(telemDist, curvature, trackFilesPath,
+                           trackFileExt=".txt", suffix=""):
         time = datetime.datetime.now()
         timestrf = time.strftime("%b-%d-%Y")
         NewTrackFileName = (trackFilesPath+"/trackFiles/TrackFile_"
-                            + str(timestrf)+".txt")
-        newFile = open(NewTrackFileName, "w")
-
-        for i in range(len(telemDist)):
-            lineToWrite = (str(telemDist[i]) + "\t" + str(curvature[i]) + "\n")
-            newFile.write(lineToWrite)
-        newFile.close()
+                            + str(timestrf)+suffix+trackFileExt)
+        TrackFileLoader.writeTrackFile(NewTrackFileName, telemDist, curvature)
         return NewTrackFileName
 
     @staticmethod
     def compareTrackFile(TrackFile1, TrackFile2):
-        track1 = np.loadtxt(TrackFile1)
-        dist1 = track1[:, 0]
-        curv1 = track1[:, 1]
-
-        track2 = np.loadtxt(TrackFile2)
-        dist2 = track2[:, 0]
-        curv2 = track2[:, 1]
+        dist1, curv1 = TrackFileLoader(TrackFile1).load()
+        dist2, curv2 = TrackFileLoader(TrackFile2).load()
 
+        import matplotlib.pyplot as plt
         plt.figure(3)
         plt.title("Calculated Curvature")
         plt.plot(dist1, curv1, 'r-', label=TrackFile1)
@@ -143,17 +216,29 @@ class TrackFileBuilder:
         plt.show()
 
     def run(self):
-        telemDist, telemSpeed, telemGlat = TrackFileBuilder.loadTelemetryFile(self)
-        telemSpeedFilt = TrackFileBuilder.filterTelemetryData(telemSpeed, 0)
-        telemGlatFilt = TrackFileBuilder.filterTelemetryData(telemGlat, 1)
-        curvature = TrackFileBuilder.calculateCurvature(telemDist,
-                                                        telemSpeedFilt,
-                                                        telemGlatFilt)
-        newTrackFileName = TrackFileBuilder.createNewTrackFile(telemDist,
-                                                               curvature,
-                                                               self.trackFilesPath)
+        telemDist, telemSpeed, telemGlat = self.loadTelemetryFile()
+        dist, curvature = self.buildTrack(telemDist, telemSpeed, telemGlat,
+                                          bplot=1)
+        newTrackFileName = TrackFileBuilder.createNewTrackFile(
+            dist, curvature, self.trackFilesPath, self.trackFileExt)
         return newTrackFileName
 
+    def runLaps(self, chunkSize=100000):
+        """ creates one track file per lap of a (large) telemetry log, the
+            laps shorter than MIN_LAP_POINTS are skipped """
+        newTrackFileNames = []
+        for nLap, (telemDist, telemSpeed, telemGlat) in enumerate(
+                self.iterTelemetryLaps(chunkSize)):
+            if len(telemDist) < MIN_LAP_POINTS:
+                print("Lap", nLap+1, "skipped:", len(telemDist), "points")
+                continue
+            dist, curvature = self.buildTrack(telemDist, telemSpeed,
+                                              telemGlat)
+            newTrackFileNames.append(TrackFileBuilder.createNewTrackFile(
+                dist - dist[0], curvature, self.trackFilesPath,
+                self.trackFileExt, "_Lap" + str(nLap+1)))
+        return newTrackFileNames
+
 
 # ----------------------------------------------------------------------------
 